@@ -1,74 +1,380 @@
 # components/ai_model.py
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from components.model_downloader import download_model
+from components.metrics import REGISTRY, SIZE_BOUNDS
+from components.model_downloader import download_model, model_fingerprint
+from components.sentiment_cache import SentimentCache
+from components.sentiment_workers import SentimentWorkerPool
 
 class SentimentAnalyzer:
-    def __init__(self, model_config):
-        """Initialize the sentiment analyzer."""
+    def __init__(self, model_config, background=False):
+        """
+        Initialize the sentiment analyzer.
+        
+        torch and transformers are imported when the model is loaded, not
+        when this module is imported. With background=True the model loads
+        in a thread and the constructor returns at once, so the caller can
+        start collecting news meanwhile; scoring waits until the load is done
+        (cached results are served without waiting).
+        """
         self.logger = logging.getLogger('SentimentAnalyzer')
         self.model_name = model_config['sentiment_analysis']['model_name']
-        self.use_gpu = model_config['sentiment_analysis']['use_gpu'] and torch.cuda.is_available()
+        self.use_gpu = model_config['sentiment_analysis']['use_gpu']
         self.auto_download = model_config['sentiment_analysis']['auto_download']
+        # Batch size of 1 keeps the original one-text-per-forward-pass behaviour
+        self.batch_size = max(1, int(model_config['sentiment_analysis'].get('batch_size', 32)))
+        self.labels = ["negative", "neutral", "positive"]
+        self.backend_name = model_config['sentiment_analysis'].get('backend', 'torch')
+        if self.backend_name != 'torch':
+            # Quantized and ONNX Runtime backends run on CPU
+            self.use_gpu = False
+        self.cache = self._create_cache(model_config['sentiment_analysis'].get('cache', {}))
+        
+        self.pool = None
+        self.request_timeout = model_config['sentiment_analysis'].get('request_timeout', 60)
+        workers = model_config['sentiment_analysis'].get('workers', 0)
+        self._async_executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sentiment')
+        self.load_time = None
+        self._load_error = None
+        self._loaded = threading.Event()
         
-        self.logger.info(f"Loading sentiment model: {self.model_name}")
+        if background:
+            threading.Thread(target=self._load, args=(model_config,), name='sentiment-load', daemon=True).start()
+        else:
+            self._load(model_config)
+            if self._load_error is not None:
+                raise self._load_error
+    
+    def _load(self, model_config):
+        """Load the tokenizer and inference backend, then start the worker processes."""
+        started = time.perf_counter()
+        self.logger.info(f"Loading sentiment model: {self.model_name} ({self.backend_name} backend)")
         try:
+            import torch
+            from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+            from components.inference_backends import create_backend
+            
+            self.use_gpu = self.use_gpu and torch.cuda.is_available()
             if self.auto_download:
-                # Automatically download the model
-                model_path = download_model(self.model_name)
-                self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-                self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
+                # Automatically download the model, or reuse a local copy that matches its manifest
+                model_source = download_model(
+                    self.model_name,
+                    manifest_check=model_config['sentiment_analysis'].get('manifest_check', 'size')
+                )
             else:
                 # Use Hugging Face's default downloading mechanism
-                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                model_source = self.model_name
+            self.tokenizer = AutoTokenizer.from_pretrained(model_source)
             
-            if self.use_gpu:
-                self.model = self.model.to("cuda")
-                self.logger.info("Sentiment model loaded on GPU")
-            else:
-                self.logger.info("Sentiment model loaded on CPU")
+            # Converted models are cached next to the downloaded one, keyed by its manifest
+            self.backend = create_backend(
+                self.backend_name,
+                lambda: AutoModelForSequenceClassification.from_pretrained(model_source),
+                lambda: AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_source)),
+                self.tokenizer,
+                os.path.join("./models", self.model_name.split('/')[-1]),
+                fingerprint=model_fingerprint(model_source) if self.auto_download else None,
+                use_gpu=self.use_gpu,
+                threads=model_config['sentiment_analysis'].get('cpu_threads', 0),
+                parity_config=model_config['sentiment_analysis'].get('parity') or {}
+            )
+            self.model = getattr(self.backend, 'model', None)
+            
+            # Optional worker processes; started after the model is loaded so forked workers can share it
+            workers = model_config['sentiment_analysis'].get('workers', 0)
+            if workers > 0:
+                self.pool = SentimentWorkerPool(
+                    self, model_config, workers, model_config['sentiment_analysis'].get('torch_threads_per_worker', 1)
+                )
+            
+            self.load_time = time.perf_counter() - started
+            self.logger.info(f"Sentiment model loaded on {'GPU' if self.use_gpu else 'CPU'} in {self.load_time:.2f}s")
         except Exception as e:
             self.logger.error(f"Failed to load sentiment model: {e}")
-            raise
+            self._load_error = e
+        finally:
+            self._loaded.set()
     
+    def wait_until_loaded(self, timeout=None):
+        """
+        Block until the model has loaded.
+        
+        Returns:
+            True once loaded; raises the load error if loading failed
+        """
+        if not self._loaded.wait(timeout):
+            return False
+        if self._load_error is not None:
+            raise RuntimeError(f"Sentiment model failed to load: {self._load_error}")
+        return True
+    
+    def _create_cache(self, cache_config):
+        """Create the sentiment result cache, or None if it is disabled."""
+        if not cache_config.get('enabled', True):
+            return None
+        # Other backends can differ slightly from fp32 torch, so their results are cached separately
+        cache_model_name = self.model_name if self.backend_name == 'torch' else f"{self.model_name}:{self.backend_name}"
+        return SentimentCache(
+            cache_model_name,
+            path=cache_config.get('path', './models/sentiment_cache.db'),
+            max_entries=cache_config.get('max_entries', 50000),
+            ttl_seconds=cache_config.get('ttl_seconds', 604800)
+        )
+    
+    @REGISTRY.timed('analyze_sentiment')
     def analyze_sentiment(self, texts):
-        """Analyze sentiment of texts using the loaded model."""
+        """Analyze sentiment of texts, only running the model on texts not seen before."""
+        if self.cache is None:
+            return self._score(texts)[0]
+        
+        keys, results = self.cache.lookup(texts)
+        
+        # Score each unseen text once, even if it appears several times in this call
+        pending = {}
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                pending.setdefault(key, []).append(i)
+        
+        if pending:
+            first_indices = [indices[0] for indices in pending.values()]
+            scored, failed = self._score([texts[i] for i in first_indices])
+            
+            for (key, indices), result in zip(pending.items(), scored):
+                for i in indices:
+                    results[i] = dict(result)
+            
+            # Do not cache fallback results from failed inference
+            failed = set(failed)
+            self.cache.store(
+                [key for j, key in enumerate(pending) if j not in failed],
+                [result for j, result in enumerate(scored) if j not in failed]
+            )
+        
+        misses = sum(len(indices) for indices in pending.values())
+        REGISTRY.inc('sentiment_cache_lookups_total', len(texts) - misses, result='hit')
+        REGISTRY.inc('sentiment_cache_lookups_total', misses, result='miss')
+        # Called for every ticker each cycle; the hit rate is in the periodic metrics summary
+        if self.logger.isEnabledFor(logging.DEBUG):
+            stats = self.cache.get_stats()
+            self.logger.debug(f"Scored {len(pending)} new of {len(texts)} texts. Sentiment cache: "
+                              f"{stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+        return results
+    
+    def analyze_sentiment_per_item(self, texts):
+        """Analyze sentiment one text at a time (one forward pass per text)."""
+        self.wait_until_loaded()
+        return self._score_per_item(texts)[0]
+    
+    def analyze_sentiment_batched(self, texts):
+        """Analyze sentiment in length-bucketed batches of `batch_size` texts."""
+        self.wait_until_loaded()
+        return self._score_batched(texts)[0]
+    
+    def analyze_sentiment_async(self, texts):
+        """
+        Analyze sentiment without blocking the caller.
+        
+        Returns:
+            Future resolving to the analyze_sentiment results
+        """
+        return self._async_executor.submit(self.analyze_sentiment, texts)
+    
+    def __getstate__(self):
+        """Pickle what scoring needs (for spawned workers), without the pool, cache, threads or logger."""
+        state = dict(self.__dict__)
+        for name in ('logger', 'pool', 'cache', '_async_executor', '_loaded'):
+            del state[name]
+        return state
+    
+    def __setstate__(self, state):
+        """Restore a pickled analyzer that scores in its own process only."""
+        self.__dict__.update(state)
+        self.logger = logging.getLogger('SentimentAnalyzer')
+        self.pool = None
+        self.cache = None
+        self._async_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sentiment')
+        self._loaded = threading.Event()
+        self._loaded.set()
+    
+    def close(self):
+        """Stop the worker processes, if any."""
+        self._loaded.wait()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        self._async_executor.shutdown(wait=False)
+    
+    def _score(self, texts):
+        """Run the model on texts, returning (results, indices of texts that failed)."""
+        self.wait_until_loaded()
+        REGISTRY.inc('sentiment_texts_scored_total', len(texts))
+        with REGISTRY.timer('sentiment_inference'):
+            if self.pool is not None and texts:
+                future = self.pool.submit(texts)
+                try:
+                    return future.result(timeout=self.request_timeout)
+                except Exception as e:
+                    # A request that timed out would otherwise keep its chunks pending forever
+                    self.pool.discard(future)
+                    self.logger.error(f"Sentiment workers failed, scoring in process: {e}")
+            return self._score_local(texts)
+    
+    def _score_local(self, texts):
+        """Run the model in this process, returning (results, indices of texts that failed)."""
+        if self.batch_size > 1 and len(texts) > 1:
+            return self._score_batched(texts)
+        return self._score_per_item(texts)
+    
+    def _score_per_item(self, texts):
+        """Score texts one forward pass at a time, returning (results, failed indices)."""
+        import torch
+        
         results = []
+        failed = []
         
-        for text in texts:
+        for index, text in enumerate(texts):
             try:
                 inputs = self.tokenizer(text[:512], return_tensors="pt", truncation=True, padding=True)
                 
-                # Move inputs to GPU if model is on GPU
-                if self.use_gpu:
-                    inputs = {k: v.to("cuda") for k, v in inputs.items()}
-                
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
+                # The backend moves inputs to the model's device
+                logits = self.backend(inputs)
                 
                 # Get prediction
-                probabilities = torch.nn.functional.softmax(outputs.logits, dim=1)
+                probabilities = torch.nn.functional.softmax(logits, dim=1)
                 prediction = torch.argmax(probabilities, dim=1).item()
                 confidence = probabilities[0][prediction].item()
                 
-                # Map prediction to label (specific to FinBERT)
-                labels = ["negative", "neutral", "positive"]
-                if len(labels) > prediction:
-                    label = labels[prediction]
-                else:
-                    label = "unknown"
-                
                 results.append({
-                    'label': label,
+                    'label': self._label_for(prediction),
                     'confidence': confidence
                 })
             except Exception as e:
                 self.logger.error(f"Error analyzing sentiment: {e}")
+                failed.append(index)
                 results.append({
                     'label': 'neutral',
                     'confidence': 0.33
                 })
         
-        return results
+        return results, failed
+    
+    def _score_batched(self, texts):
+        """Score texts in length-bucketed batches, returning (results, failed indices)."""
+        if len(texts) == 0:
+            return [], []
+        import torch
+        
+        try:
+            # Tokenize everything in one call without padding so we can bucket by length
+            encodings = self.tokenizer([text[:512] for text in texts], truncation=True, padding=False)
+        except Exception as e:
+            self.logger.error(f"Error tokenizing sentiment batch: {e}")
+            return self._score_per_item(texts)
+        
+        # Sort by token length so each batch pads to a similar length
+        order = sorted(range(len(texts)), key=lambda i: len(encodings['input_ids'][i]))
+        probabilities = None
+        failed_batches = []
+        
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            REGISTRY.observe('inference_batch_size', len(indices), SIZE_BOUNDS)
+            try:
+                batch = self.tokenizer.pad(
+                    {key: [encodings[key][i] for i in indices] for key in encodings.keys()},
+                    return_tensors="pt"
+                )
+                
+                batch_probabilities = torch.nn.functional.softmax(self.backend(batch), dim=1)
+                if probabilities is None:
+                    probabilities = batch_probabilities.new_zeros((len(texts), batch_probabilities.shape[1]))
+                probabilities[indices] = batch_probabilities
+            except Exception as e:
+                self.logger.error(f"Error analyzing sentiment batch of {len(indices)} texts: {e}")
+                failed_batches.extend(indices)
+        
+        results = [{'label': 'neutral', 'confidence': 0.33} for _ in texts]
+        if probabilities is not None:
+            # Single vectorized argmax and a single device-to-host copy for every text
+            confidences, predictions = probabilities.max(dim=1)
+            for i, (prediction, confidence) in enumerate(zip(predictions.tolist(), confidences.tolist())):
+                results[i] = {
+                    'label': self._label_for(prediction),
+                    'confidence': confidence
+                }
+        
+        # Retry texts from failed batches one at a time so one bad input cannot sink the batch
+        failed = []
+        if failed_batches:
+            retried, retry_failed = self._score_per_item([texts[i] for i in failed_batches])
+            for i, result in zip(failed_batches, retried):
+                results[i] = result
+            failed = [failed_batches[j] for j in retry_failed]
+        
+        return results, failed
+    
+    def _label_for(self, prediction):
+        """Map a class index to its label (specific to FinBERT)."""
+        if len(self.labels) > prediction:
+            return self.labels[prediction]
+        return "unknown"
+
+def main():
+    """Benchmark one-text-per-pass scoring against length-bucketed batches on the same texts."""
+    import argparse
+    import copy
+    import pandas as pd
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Compare per-item and batched sentiment inference")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--news', help="CSV of recorded articles (title and summary columns) to score")
+    parser.add_argument('--texts', type=int, default=256, help="Number of texts to score")
+    parser.add_argument('--batch-sizes', default='8,16,32,64', help="Comma-separated batch sizes to try")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    model_config = copy.deepcopy(ConfigManager(args.config).get_model_config())
+    model_config['sentiment_analysis']['cache'] = {'enabled': False}
+    model_config['sentiment_analysis']['workers'] = 0
+    
+    if args.news:
+        news_df = pd.read_csv(args.news).fillna('')
+        texts = [f"{title}: {summary}" for title, summary in zip(news_df['title'], news_df['summary'])]
+    else:
+        # Headlines alone and headlines with summaries of several lengths, as RSS items come
+        samples = ["Shares surge after record quarterly revenue", "Company cuts full-year guidance amid weak demand",
+                   "Regulators open probe into accounting practices", "Board approves dividend increase and buyback",
+                   "Stock little changed ahead of the earnings call", "Supplier warns of chip shortages into next year"]
+        summary = " Analysts said the results reflected stronger pricing and steady demand across regions."
+        texts = [samples[i % len(samples)] + f" (update {i})" + summary * (i % 5) for i in range(args.texts)]
+    texts = texts[:args.texts]
+    
+    analyzer = SentimentAnalyzer(model_config)
+    analyzer.analyze_sentiment_per_item(texts[:8])  # Warm up
+    
+    started = time.perf_counter()
+    reference = analyzer.analyze_sentiment_per_item(texts)
+    per_item = time.perf_counter() - started
+    print(f"per item: {len(texts) / per_item:.1f} texts/s, {per_item * 1000 / len(texts):.2f}ms/text")
+    
+    for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+        analyzer.batch_size = batch_size
+        analyzer.analyze_sentiment_batched(texts[:batch_size])  # Warm up
+        started = time.perf_counter()
+        results = analyzer.analyze_sentiment_batched(texts)
+        elapsed = time.perf_counter() - started
+        
+        agreement = sum(a['label'] == b['label'] for a, b in zip(results, reference)) / len(texts)
+        drift = max(abs(a['confidence'] - b['confidence']) for a, b in zip(results, reference))
+        print(f"batch {batch_size}: {len(texts) / elapsed:.1f} texts/s, {elapsed * 1000 / len(texts):.2f}ms/text, "
+              f"{per_item / elapsed:.1f}x per item, label agreement {agreement:.1%}, "
+              f"max confidence drift {drift:.4f}")
+    analyzer.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,269 @@
+# components/article_store.py
+import bisect
+import calendar
+import logging
+import math
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+NO_TICKERS = frozenset()
+
+class Article:
+    __slots__ = ('article_id', 'title', 'summary', 'link', 'source', 'published', 'ingested', 'text', 'tickers',
+                 'fingerprint', 'duplicate_of', 'cluster_size')
+    
+    def __init__(self, article_id, title, summary, link, source, published, ingested, tickers=NO_TICKERS):
+        """
+        One stored news article.
+        
+        Args:
+            published: Publication time in epoch seconds (NaN if the feed gave none)
+            ingested: Time the article was first added to the store
+            tickers: Tickers the article mentions, matched once at ingest
+        
+        A syndicated copy of a story already stored points at the first copy
+        through duplicate_of; that first copy counts every copy, itself
+        included, in cluster_size.
+        """
+        self.article_id = article_id
+        self.title = title
+        self.summary = summary
+        self.link = link
+        self.source = source
+        self.published = published
+        self.ingested = ingested
+        self.text = f"{title}: {summary}"  # Sentiment model input
+        self.tickers = tickers
+        self.fingerprint = None
+        self.duplicate_of = None
+        self.cluster_size = 1
+    
+    def __repr__(self):
+        return f"Article({self.source!r}, {self.title!r})"
+
+def parse_published(value, parsed=None):
+    """
+    Convert a feed entry's date to epoch seconds.
+    
+    Uses feedparser's parsed UTC time when available, then RFC 822 and
+    ISO 8601 strings; naive times are taken as UTC.
+    
+    Returns:
+        Epoch seconds, or NaN if the date cannot be parsed
+    """
+    if parsed is not None:
+        try:
+            return float(calendar.timegm(parsed))
+        except (TypeError, ValueError, OverflowError):
+            pass
+    if not value:
+        return math.nan
+    
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return math.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def newest_first(articles):
+    """Sort articles by publication time, newest first, with undated articles last."""
+    return sorted(articles, key=lambda article: math.inf if math.isnan(article.published) else -article.published)
+
+def articles_to_frame(articles):
+    """Convert articles to a DataFrame (title, summary, published, link, source) for recording or analysis."""
+    import pandas as pd
+    
+    published = pd.to_datetime([article.published for article in articles], unit='s', utc=True)
+    return pd.DataFrame({
+        'title': [article.title for article in articles],
+        'summary': [article.summary for article in articles],
+        'published': published,
+        'link': [article.link for article in articles],
+        'source': [article.source for article in articles]
+    })
+
+class ArticleStore:
+    def __init__(self, matcher=None, retention_seconds=172800, clock=time.time, dedup_index=None):
+        """
+        Initialize the append-only article store.
+        
+        Articles are kept as __slots__ records in the order they were first
+        added, so windows by ingest time are a binary search and eviction
+        trims a prefix. A second index sorted by publication time (ingest
+        time for undated articles) serves windowed queries by publish date.
+        Dates are parsed, source names interned and tickers matched once, when
+        an article is added; an article fetched again is returned from the
+        store as is. An article whose link is already stored under another
+        ID, or (with a near-duplicate index) one that rewords a stored story,
+        is kept as a duplicate of that story when both name the same tickers;
+        templated headlines about different tickers stay separate stories.
+        Articles older than the retention window are evicted by prune(), so
+        memory stays flat over long runs.
+        
+        Args:
+            matcher: NewsMatcher used to tag each article with the tickers it mentions
+            retention_seconds: How long articles are kept after they were added
+            clock: Returns the current time in epoch seconds
+            dedup_index: Optional MinHashIndex for near-duplicate detection
+        """
+        self.logger = logging.getLogger('ArticleStore')
+        self.matcher = matcher
+        self.retention = retention_seconds
+        self.clock = clock
+        self.dedup_index = dedup_index
+        
+        self._articles = []  # Ingest order
+        self._ingested = []  # Ingest times, aligned with _articles (non-decreasing)
+        self._by_id = {}
+        self._by_link = {}
+        self._time_keys = []  # Publication times, sorted
+        self._by_time = []  # Articles aligned with _time_keys
+        self._ticker_sets = {}  # Shared frozensets, so articles naming the same tickers share one
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._articles)
+    
+    def add(self, article_id, title, summary, link, source, published):
+        """
+        Add an article, or get the stored one if its ID was added before.
+        
+        Args:
+            published: Publication time in epoch seconds (see parse_published)
+        
+        Returns:
+            The stored Article; check duplicate_of to see whether it repeats another story
+        """
+        article = self._by_id.get(article_id)
+        if article is not None:
+            return article
+        
+        tickers = NO_TICKERS
+        if self.matcher is not None:
+            tickers = frozenset(self.matcher.match_text(f"{title} {summary}"))
+        fingerprint = None
+        if self.dedup_index is not None:
+            fingerprint = self.dedup_index.fingerprint(f"{title} {summary}")
+        
+        with self._lock:
+            article = self._by_id.get(article_id)
+            if article is not None:
+                return article
+            
+            # Keep ingest times sorted even if the wall clock steps back
+            now = max(self.clock(), self._ingested[-1]) if self._ingested else self.clock()
+            # Future dates (clock skew, bad feeds) are capped at the ingest time
+            published = min(published, now) if not math.isnan(published) else published
+            tickers = self._ticker_sets.setdefault(tickers, tickers)
+            article = Article(article_id, title, summary, link, sys.intern(source), published, now, tickers)
+            article.fingerprint = fingerprint
+            
+            self._articles.append(article)
+            self._ingested.append(now)
+            self._by_id[article_id] = article
+            repeated = self._by_link.get(link) if link else None
+            if link and repeated is None:
+                self._by_link[link] = article
+            
+            # A copy only stands in for a story about the same tickers
+            original = None
+            if repeated is not None and repeated.tickers == tickers:
+                original = repeated.duplicate_of or repeated
+            elif fingerprint is not None:
+                original = self.dedup_index.find(fingerprint, accept=lambda stored: stored.tickers == tickers)
+            if original is not None:
+                article.duplicate_of = original
+                original.cluster_size += 1
+            elif fingerprint is not None:
+                self.dedup_index.add(fingerprint, article)
+            
+            sort_time = now if math.isnan(published) else published
+            position = bisect.bisect_right(self._time_keys, sort_time)
+            self._time_keys.insert(position, sort_time)
+            self._by_time.insert(position, article)
+        return article
+    
+    def get(self, article_id):
+        """Get a stored article by ID, or None."""
+        return self._by_id.get(article_id)
+    
+    def since(self, ingested_after):
+        """Get the articles added at or after a time, oldest first."""
+        with self._lock:
+            start = bisect.bisect_left(self._ingested, ingested_after)
+            return self._articles[start:]
+    
+    def window(self, start, end=None):
+        """Get the articles published in [start, end), oldest first (undated articles count at ingest time)."""
+        with self._lock:
+            first = bisect.bisect_left(self._time_keys, start)
+            last = len(self._time_keys) if end is None else bisect.bisect_left(self._time_keys, end)
+            return self._by_time[first:last]
+    
+    def retag(self, matcher):
+        """
+        Switch to another ticker matcher and re-match every stored article with it.
+        
+        Used when the ticker universe changes at runtime, so news stored
+        before the change is found for newly added tickers.
+        
+        Returns:
+            Number of articles whose tickers changed
+        """
+        with self._lock:
+            articles = list(self._articles)
+        retagged = {}
+        for article in articles:
+            tickers = frozenset(matcher.match_text(f"{article.title} {article.summary}"))
+            if tickers != article.tickers:
+                retagged[article] = tickers
+        
+        with self._lock:
+            self.matcher = matcher
+            ticker_sets = {}
+            for article in self._articles:
+                tickers = retagged.get(article, article.tickers)
+                article.tickers = ticker_sets.setdefault(tickers, tickers)
+            self._ticker_sets = ticker_sets
+        return len(retagged)
+    
+    def prune(self):
+        """
+        Evict articles added more than the retention window ago.
+        
+        Returns:
+            Number of articles evicted
+        """
+        cutoff = self.clock() - self.retention
+        with self._lock:
+            count = bisect.bisect_left(self._ingested, cutoff)
+            if count == 0:
+                return 0
+            
+            for article in self._articles[:count]:
+                del self._by_id[article.article_id]
+                if self._by_link.get(article.link) is article:
+                    del self._by_link[article.link]
+                if article.fingerprint is not None and article.duplicate_of is None:
+                    self.dedup_index.remove(article.fingerprint, article)
+            del self._articles[:count]
+            del self._ingested[:count]
+            
+            kept = [position for position, article in enumerate(self._by_time) if article.ingested >= cutoff]
+            self._time_keys = [self._time_keys[position] for position in kept]
+            self._by_time = [self._by_time[position] for position in kept]
+            
+            # Drop shared ticker sets no stored article uses any more
+            in_use = {article.tickers for article in self._articles}
+            self._ticker_sets = {tickers: tickers for tickers in in_use}
+        
+        self.logger.info(f"Evicted {count} articles past the retention window, {len(self._articles)} stored")
+        return count
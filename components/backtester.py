@@ -0,0 +1,376 @@
+# components/backtester.py
+import argparse
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from components.bar_store import BarStore
+from components.config_manager import ConfigManager
+from components.indicators import IndicatorEngine
+from components.news_matcher import NewsMatcher
+from components.trading_strategy import TradingStrategy
+
+# Daily bars are stamped with their session date; they open at the regular session open
+DAILY_BAR_OPEN = np.timedelta64(9 * 60 + 30, 'm')
+
+class SimulatedBroker:
+    def __init__(self, symbol, trade_value, stop_loss_percentage, take_profit_percentage,
+                 slippage_bps=0.0, commission=0.0):
+        """
+        Fill orders for one symbol against recorded bars.
+        
+        The broker is long-only like the live bot: BUY opens a position worth
+        about trade_value when flat, SELL closes it. Open positions are closed
+        early when a bar touches the stop loss or take profit level.
+        """
+        self.symbol = symbol
+        self.trade_value = trade_value
+        self.stop_loss_percentage = stop_loss_percentage
+        self.take_profit_percentage = take_profit_percentage
+        self.slippage = slippage_bps / 10000.0
+        self.commission = commission
+        self.quantity = 0
+        self.entry_price = None
+        self.entry_time = None
+        self.trades = []
+    
+    def buy(self, when, price):
+        """Open a position at price; ignored when a position is already open."""
+        if self.quantity > 0:
+            return False
+        fill = price * (1 + self.slippage)
+        quantity = math.floor(self.trade_value / fill)
+        if quantity <= 0:
+            return False
+        self.quantity = quantity
+        self.entry_price = fill
+        self.entry_time = when
+        return True
+    
+    def sell(self, when, price, reason):
+        """Close the open position at price; ignored when flat."""
+        if self.quantity == 0:
+            return False
+        fill = price * (1 - self.slippage)
+        self.trades.append({
+            'symbol': self.symbol,
+            'entry_time': self.entry_time,
+            'exit_time': when,
+            'quantity': self.quantity,
+            'entry_price': self.entry_price,
+            'exit_price': fill,
+            'pnl': (fill - self.entry_price) * self.quantity - 2 * self.commission,
+            'exit_reason': reason
+        })
+        self.quantity = 0
+        self.entry_price = None
+        self.entry_time = None
+        return True
+    
+    def check_exits(self, times, ohlcv, start, stop):
+        """
+        Close the position on the first bar in [start, stop) that hits the stop loss or take profit.
+        
+        Gaps through a level fill at the bar's open instead of the level.
+        """
+        if self.quantity == 0 or start >= stop:
+            return
+        
+        stop_price = self.entry_price * (1 - self.stop_loss_percentage)
+        target_price = self.entry_price * (1 + self.take_profit_percentage)
+        lows = ohlcv[2, start:stop]
+        highs = ohlcv[1, start:stop]
+        hit = np.flatnonzero((lows <= stop_price) | (highs >= target_price))
+        if len(hit) == 0:
+            return
+        
+        index = start + hit[0]
+        bar_open = ohlcv[0, index]
+        # Assume the stop is hit first when a bar spans both levels
+        if ohlcv[2, index] <= stop_price:
+            self.sell(times[index], min(bar_open, stop_price), 'stop_loss')
+        else:
+            self.sell(times[index], max(bar_open, target_price), 'take_profit')
+
+def load_news_archive(path):
+    """
+    Load recorded articles (e.g. collect_rss_data results saved with article_store.articles_to_frame).
+    
+    CSV, JSON lines (.jsonl) and Parquet files are supported. The archive
+    needs title, summary and published columns; published is parsed to
+    US/Eastern wall time to line up with the bars.
+    """
+    if path.endswith('.parquet'):
+        news_df = pd.read_parquet(path)
+    elif path.endswith('.jsonl'):
+        news_df = pd.read_json(path, lines=True)
+    else:
+        news_df = pd.read_csv(path)
+    
+    news_df = news_df.fillna({'title': '', 'summary': ''})
+    published = pd.to_datetime(news_df['published'], utc=True, errors='coerce', format='mixed')
+    news_df['published_at'] = published.dt.tz_convert('America/New_York').dt.tz_localize(None)
+    return news_df.dropna(subset=['published_at']).sort_values('published_at', kind='stable').reset_index(drop=True)
+
+def load_bars(bar_store, symbols):
+    """Get (bar dates, ohlcv) for every symbol with stored bars."""
+    bars_by_symbol = {}
+    for symbol in symbols:
+        stored = bar_store.get_bars(symbol)
+        if stored is not None and len(stored[0]) > 0:
+            bars_by_symbol[symbol] = stored
+    return bars_by_symbol
+
+def bar_open_times(times):
+    """Convert bar timestamps to the time each bar opens (daily bars open at 09:30)."""
+    times = np.asarray(times)
+    if np.datetime_data(times.dtype)[0] == 'D':
+        return times.astype('datetime64[m]') + DAILY_BAR_OPEN
+    return times.astype('datetime64[m]')
+
+_worker = {}
+
+def _init_worker(config_path, indicators_config):
+    """Build the strategy and indicator engine once per worker process."""
+    logging.getLogger('TradingStrategy').setLevel(logging.WARNING)
+    _worker['strategy'] = TradingStrategy(ConfigManager(config_path))
+    _worker['engine'] = IndicatorEngine(indicators_config)
+
+def _replay_symbol(task):
+    """
+    Replay the news events of one symbol against its bars.
+    
+    An article published at time t is acted on at the open of the first bar
+    that opens after t, using indicators computed from the bars before it,
+    so no decision sees prices from its own future.
+    Articles acting on the same bar are decided together, like one live cycle.
+    
+    Returns:
+        (trades, decisions, timings)
+    """
+    symbol, times, ohlcv, events, broker_config = task
+    strategy = _worker['strategy']
+    engine = _worker['engine']
+    timings = {'indicators': 0.0, 'decisions': 0.0, 'simulation': 0.0}
+    
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    closes = ohlcv[3]
+    broker = SimulatedBroker(symbol, **broker_config)
+    decisions = []
+    
+    # Indicator values as of each event bar, from one O(1)-per-bar streaming pass
+    started = time.perf_counter()
+    min_bars = max(engine.min_bars(), 1)
+    event_bars = sorted(bar for bar in events if bar >= min_bars)
+    indicators_at = {}
+    if event_bars:
+        stream = engine.create_stream(ohlcv[:, :min_bars])
+        position = min_bars
+        for bar in event_bars:
+            for values in ohlcv[:, position:bar].T:
+                stream.update(values)
+            position = bar
+            indicators_at[bar] = stream.values()
+    timings['indicators'] += time.perf_counter() - started
+    
+    previous_bar = 0
+    for bar in event_bars:
+        started = time.perf_counter()
+        broker.check_exits(times, ohlcv, previous_bar, bar)
+        timings['simulation'] += time.perf_counter() - started
+        
+        started = time.perf_counter()
+        decision = strategy.make_trading_decision(symbol, events[bar], indicators_at[bar])
+        timings['decisions'] += time.perf_counter() - started
+        
+        started = time.perf_counter()
+        decisions.append({'symbol': symbol, 'time': times[bar], 'articles': len(events[bar]),
+                          'action': decision['action'], 'confidence': decision['confidence']})
+        if decision['action'] == 'BUY':
+            broker.buy(times[bar], ohlcv[0, bar])
+        elif decision['action'] == 'SELL':
+            broker.sell(times[bar], ohlcv[0, bar], 'signal')
+        previous_bar = bar
+        timings['simulation'] += time.perf_counter() - started
+    
+    started = time.perf_counter()
+    broker.check_exits(times, ohlcv, previous_bar, len(times))
+    # Mark anything still open to the last close
+    broker.sell(times[-1], closes[-1], 'end_of_data')
+    timings['simulation'] += time.perf_counter() - started
+    
+    return broker.trades, decisions, timings
+
+class Backtester:
+    def __init__(self, config_manager, sentiment_analyzer, backtest_config=None):
+        """
+        Initialize the replay engine.
+        
+        Recorded articles are matched to tickers and scored in one batched
+        sentiment pass in this process. Each symbol is then replayed
+        independently (indicators from one streaming pass over its bars,
+        decisions from TradingStrategy, fills from a SimulatedBroker), so
+        symbols are spread over a process pool. Position sizing uses the
+        starting equity rather than the running balance, which keeps the
+        symbols independent.
+        """
+        backtest_config = backtest_config or {}
+        self.logger = logging.getLogger('Backtester')
+        self.config_manager = config_manager
+        self.sentiment_analyzer = sentiment_analyzer
+        self.indicators_config = config_manager.get_model_config()['technical_analysis']['indicators']
+        self.workers = backtest_config.get('workers') or os.cpu_count() or 1
+        self.initial_cash = backtest_config.get('initial_cash', 100000)
+        
+        risk = config_manager.get_risk_parameters()
+        # Risk max_risk_per_trade of equity down to the stop, capped at the allocation limit
+        allocation = min(risk['max_portfolio_allocation'], risk['max_risk_per_trade'] / risk['stop_loss_percentage'])
+        self.broker_config = {
+            'trade_value': self.initial_cash * allocation,
+            'stop_loss_percentage': risk['stop_loss_percentage'],
+            'take_profit_percentage': risk['take_profit_percentage'],
+            'slippage_bps': backtest_config.get('slippage_bps', 0.0),
+            'commission': backtest_config.get('commission', 0.0)
+        }
+    
+    def run(self, news_df, bars_by_symbol, start=None, end=None):
+        """
+        Replay recorded news and bars.
+        
+        Args:
+            news_df: Articles as returned by load_news_archive
+            bars_by_symbol: Dict of symbol -> (bar timestamps, (5, n) OHLCV array)
+            start, end: Optional bounds on article publication time
+        
+        Returns:
+            Dict with trades and decisions DataFrames, a summary and per-stage timings in seconds
+        """
+        timings = {}
+        run_started = time.perf_counter()
+        
+        if start is not None:
+            news_df = news_df[news_df['published_at'] >= pd.Timestamp(start)]
+        if end is not None:
+            news_df = news_df[news_df['published_at'] < pd.Timestamp(end)]
+        news_df = news_df.reset_index(drop=True)
+        
+        started = time.perf_counter()
+        matcher = NewsMatcher(list(bars_by_symbol), self.config_manager.get_ticker_aliases())
+        news_index = matcher.build_index(news_df)
+        timings['matching'] = time.perf_counter() - started
+        
+        # Score every matched article once, in batches
+        started = time.perf_counter()
+        positions = sorted({position for rows in news_index.values() for position in rows})
+        titles, summaries = news_df['title'].values, news_df['summary'].values
+        texts = [f"{titles[position]}: {summaries[position]}" for position in positions]
+        scores = dict(zip(positions, self.sentiment_analyzer.analyze_sentiment(texts))) if texts else {}
+        timings['sentiment'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        published = news_df['published_at'].values.astype('datetime64[m]')
+        tasks = []
+        for symbol, rows in news_index.items():
+            times, ohlcv = bars_by_symbol[symbol]
+            opens_at = bar_open_times(times)
+            events = {}
+            for position in rows:
+                bar = int(np.searchsorted(opens_at, published[position], side='right'))
+                if bar < len(times):
+                    events.setdefault(bar, []).append(scores[position])
+            if events:
+                tasks.append((symbol, times, ohlcv, events, self.broker_config))
+        timings['events'] = time.perf_counter() - started
+        
+        trades, decisions = [], []
+        for stage in ('indicators', 'decisions', 'simulation'):
+            timings[stage] = 0.0
+        
+        started = time.perf_counter()
+        for symbol_trades, symbol_decisions, symbol_timings in self._map(tasks):
+            trades.extend(symbol_trades)
+            decisions.extend(symbol_decisions)
+            for stage, seconds in symbol_timings.items():
+                timings[stage] += seconds
+        timings['replay_wall'] = time.perf_counter() - started
+        timings['total'] = time.perf_counter() - run_started
+        
+        trades_df = pd.DataFrame(trades, columns=['symbol', 'entry_time', 'exit_time', 'quantity',
+                                                  'entry_price', 'exit_price', 'pnl', 'exit_reason'])
+        decisions_df = pd.DataFrame(decisions, columns=['symbol', 'time', 'articles', 'action', 'confidence'])
+        summary = self._summarize(trades_df, len(news_df), len(positions), len(tasks))
+        
+        self.logger.info(f"Replayed {summary['articles']} articles for {summary['symbols']} symbols in "
+                         f"{timings['total']:.2f}s: {summary['trades']} trades, P&L ${summary['pnl']:.2f}")
+        return {'trades': trades_df, 'decisions': decisions_df, 'summary': summary, 'timings': timings}
+    
+    def _map(self, tasks):
+        """Replay symbols in a process pool, or inline with a single worker."""
+        if self.workers <= 1 or len(tasks) <= 1:
+            _init_worker(self.config_manager.config_path, self.indicators_config)
+            return [_replay_symbol(task) for task in tasks]
+        
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(self.config_manager.config_path, self.indicators_config)) as executor:
+            return list(executor.map(_replay_symbol, tasks))
+    
+    def _summarize(self, trades_df, articles, matched_articles, symbols):
+        """Aggregate trade results."""
+        pnl = float(trades_df['pnl'].sum()) if not trades_df.empty else 0.0
+        return {
+            'articles': articles,
+            'matched_articles': matched_articles,
+            'symbols': symbols,
+            'trades': len(trades_df),
+            'win_rate': float((trades_df['pnl'] > 0).mean()) if not trades_df.empty else 0.0,
+            'pnl': pnl,
+            'return': pnl / self.initial_cash,
+            'pnl_by_symbol': trades_df.groupby('symbol')['pnl'].sum().to_dict() if not trades_df.empty else {}
+        }
+
+def main():
+    """Run a backtest from the command line."""
+    parser = argparse.ArgumentParser(description="Replay recorded news and bars through the trading strategy")
+    parser.add_argument('--news', required=True, help="Recorded articles (.csv, .jsonl or .parquet)")
+    parser.add_argument('--bars', help="Bar store directory (defaults to market_data.bar_store.path)")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--start', help="First publication date to replay")
+    parser.add_argument('--end', help="Replay articles published before this date")
+    parser.add_argument('--workers', type=int, help="Worker processes (defaults to backtest.workers)")
+    parser.add_argument('--output', help="Directory for trades.csv and decisions.csv")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger('TradingStrategy').setLevel(logging.WARNING)
+    
+    # Imported here so the replay workers never load torch
+    from components.ai_model import SentimentAnalyzer
+    
+    config = ConfigManager(args.config)
+    backtest_config = dict(config.get_backtest_config())
+    if args.workers:
+        backtest_config['workers'] = args.workers
+    
+    bar_store = BarStore(args.bars or config.get_market_data_config().bar_store_path, history_days=None)
+    news_df = load_news_archive(args.news)
+    bars_by_symbol = load_bars(bar_store, config.get_tickers())
+    
+    backtester = Backtester(config, SentimentAnalyzer(config.get_model_config()), backtest_config)
+    results = backtester.run(news_df, bars_by_symbol, args.start, args.end)
+    
+    for key, value in results['summary'].items():
+        print(f"{key}: {value}")
+    for stage, seconds in results['timings'].items():
+        print(f"time {stage}: {seconds:.3f}s")
+    
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        results['trades'].to_csv(os.path.join(args.output, 'trades.csv'), index=False)
+        results['decisions'].to_csv(os.path.join(args.output, 'decisions.csv'), index=False)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
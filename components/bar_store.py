@@ -0,0 +1,154 @@
+# components/bar_store.py
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+class BarStore:
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+    
+    def __init__(self, path="./data/bars", history_days=365):
+        """
+        Initialize the local daily bar store.
+        
+        Each symbol is kept as one .npy file holding a (6, n) float64 block:
+        bar dates as days since the epoch, then one contiguous row per OHLCV
+        column. Files are memory-mapped on load, so close prices are served as
+        views without copying. Dates and prices live in the same file, so one
+        atomic replace updates both and a reader never pairs new dates with
+        old prices.
+        
+        Args:
+            path: Directory holding the per-symbol files
+            history_days: Bars older than this are dropped when a symbol is updated
+        """
+        self.logger = logging.getLogger('BarStore')
+        self.path = path
+        self.history_days = history_days
+        self._bars = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+    
+    @classmethod
+    def normalize_bars(cls, bars):
+        """
+        Convert Alpaca or yfinance bars to (dates, ohlcv) arrays.
+        
+        Handles lower-case Alpaca columns, capitalised yfinance columns, the
+        (field, ticker) MultiIndex that newer yfinance versions return, and
+        tz-aware or naive timestamps.
+        """
+        if isinstance(bars.columns, pd.MultiIndex):
+            bars = bars.copy()
+            bars.columns = bars.columns.get_level_values(0)
+        columns = {str(column).lower(): column for column in bars.columns}
+        
+        missing = [name for name in cls.COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Bars are missing columns: {', '.join(missing)}")
+        
+        index = pd.DatetimeIndex(bars.index)
+        if index.tz is not None:
+            index = index.tz_convert('America/New_York').tz_localize(None)
+        dates = index.values.astype('datetime64[D]')
+        
+        ohlcv = np.vstack([
+            np.asarray(bars[columns[name]], dtype=np.float64).ravel() for name in cls.COLUMNS
+        ])
+        return dates, ohlcv
+    
+    def last_date(self, symbol):
+        """Get the date of the newest stored bar, or None if nothing is stored."""
+        stored = self._load(symbol)
+        if stored is None or len(stored[0]) == 0:
+            return None
+        return pd.Timestamp(stored[0][-1]).to_pydatetime()
+    
+    def append(self, symbol, bars):
+        """Merge newly fetched bars into the store, replacing overlapping dates."""
+        new_dates, new_ohlcv = self.normalize_bars(bars)
+        if len(new_dates) == 0:
+            return
+        
+        order = np.argsort(new_dates, kind='stable')
+        new_dates, new_ohlcv = new_dates[order], new_ohlcv[:, order]
+        
+        with self._lock:
+            stored = self._load(symbol)
+            if stored is not None:
+                keep = stored[0] < new_dates[0]
+                dates = np.concatenate([stored[0][keep], new_dates])
+                ohlcv = np.concatenate([stored[1][:, keep], new_ohlcv], axis=1)
+            else:
+                dates, ohlcv = new_dates, new_ohlcv
+            
+            if self.history_days:
+                cutoff = dates[-1] - np.timedelta64(self.history_days, 'D')
+                start = np.searchsorted(dates, cutoff)
+                dates, ohlcv = dates[start:], ohlcv[:, start:]
+            
+            self._save(symbol, dates, np.ascontiguousarray(ohlcv))
+    
+    def get_bars(self, symbol, since=None):
+        """Get the stored (dates, ohlcv) arrays (OHLCV as a read-only view), or None if nothing is stored."""
+        stored = self._load(symbol)
+        if stored is None or since is None:
+            return stored
+        
+        dates, ohlcv = stored
+        start = np.searchsorted(dates, np.datetime64(pd.Timestamp(since).date(), 'D'))
+        return dates[start:], ohlcv[:, start:]
+    
+    def get_closes(self, symbol, since=None):
+        """Get closing prices (oldest first) as a read-only view, or None if nothing is stored."""
+        stored = self.get_bars(symbol, since)
+        return None if stored is None else stored[1][self.COLUMNS.index('close')]
+    
+    def _file(self, symbol):
+        """Get the bar file path for a symbol."""
+        return os.path.join(self.path, f"{symbol.replace('/', '_')}.bars.npy")
+    
+    @staticmethod
+    def _split(block):
+        """Get (dates, ohlcv) from a stored (6, n) block; the OHLCV rows stay a view."""
+        return block[0].astype(np.int64).astype('datetime64[D]'), block[1:]
+    
+    def _load(self, symbol):
+        """Get the (dates, ohlcv) arrays for a symbol, memory-mapping them on first use."""
+        stored = self._bars.get(symbol)
+        if stored is not None:
+            return stored
+        
+        # Under the writers' lock, so a load never sees a save half done
+        with self._lock:
+            stored = self._bars.get(symbol)
+            if stored is not None:
+                return stored
+            
+            file = self._file(symbol)
+            if not os.path.exists(file):
+                return None
+            try:
+                stored = self._split(np.load(file, mmap_mode='r'))
+            except Exception as e:
+                self.logger.error(f"Could not load stored bars for {symbol}: {e}")
+                return None
+            
+            self._bars[symbol] = stored
+            return stored
+    
+    def _save(self, symbol, dates, ohlcv):
+        """Write a symbol's dates and OHLCV atomically as one file and reload it memory-mapped."""
+        file = self._file(symbol)
+        block = np.empty((len(self.COLUMNS) + 1, len(dates)), dtype=np.float64)
+        block[0] = dates.astype(np.int64)
+        block[1:] = ohlcv
+        
+        temp_file = f"{file}.tmp"
+        with open(temp_file, 'wb') as handle:
+            np.save(handle, block)
+        os.replace(temp_file, file)
+        
+        # Swapping the cached pair is one assignment, so readers get the old or the new bars
+        self._bars[symbol] = self._split(np.load(file, mmap_mode='r'))
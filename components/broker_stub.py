@@ -0,0 +1,179 @@
+# components/broker_stub.py
+import argparse
+import itertools
+import logging
+import random
+import threading
+import time
+from types import SimpleNamespace
+from components.config_manager import ConfigManager
+
+class StubAPIError(Exception):
+    def __init__(self, message, status_code):
+        """Error carrying an HTTP status, like alpaca_trade_api's APIError."""
+        super().__init__(message)
+        self.status_code = status_code
+
+class AlpacaStub:
+    def __init__(self, latency=0.02, failure_rate=0.0, lost_response_rate=0.0,
+                 equity=100000.0, default_price=100.0, prices=None, seed=None):
+        """
+        In-process stand-in for the parts of the Alpaca REST client OrderExecutor uses.
+        
+        Market orders fill immediately at the symbol's price. Every call
+        sleeps for `latency` seconds (releasing the GIL like a network wait).
+        
+        Args:
+            failure_rate: Chance that submit_order fails with a 503 before the order is accepted
+            lost_response_rate: Chance that submit_order accepts the order but the
+                response is lost (504), to exercise idempotent retries
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.lost_response_rate = lost_response_rate
+        self.default_price = default_price
+        self.prices = dict(prices or {})
+        self.cash = equity
+        self.orders = {}  # client_order_id -> order
+        self.positions = {}  # symbol -> qty
+        self.calls = 0
+        self._subscribers = []
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def _call(self):
+        """Simulate the round trip of one request."""
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def subscribe_trade_updates(self, callback):
+        """Register a callback receiving a fake trade update for every fill."""
+        self._subscribers.append(callback)
+    
+    def _price(self, symbol):
+        return self.prices.get(symbol, self.default_price)
+    
+    def get_account(self):
+        self._call()
+        with self._lock:
+            equity = self.cash + sum(qty * self._price(symbol) for symbol, qty in self.positions.items())
+            return SimpleNamespace(status='ACTIVE', equity=str(equity), cash=str(self.cash),
+                                   buying_power=str(max(self.cash, 0.0)))
+    
+    def get_latest_trade(self, symbol):
+        self._call()
+        return SimpleNamespace(symbol=symbol, price=self._price(symbol))
+    
+    def get_position(self, symbol):
+        self._call()
+        with self._lock:
+            qty = self.positions.get(symbol, 0)
+        if qty == 0:
+            raise StubAPIError("position does not exist", 404)
+        return SimpleNamespace(symbol=symbol, qty=str(qty), market_value=str(qty * self._price(symbol)))
+    
+    def list_positions(self):
+        self._call()
+        with self._lock:
+            return [SimpleNamespace(symbol=symbol, qty=str(qty), market_value=str(qty * self._price(symbol)))
+                    for symbol, qty in self.positions.items() if qty != 0]
+    
+    def list_orders(self, status='open', limit=50, **kwargs):
+        self._call()
+        with self._lock:
+            orders = list(self.orders.values())
+        if status == 'open':
+            orders = [order for order in orders if order.status not in ('filled', 'canceled', 'expired', 'rejected')]
+        return orders[-limit:]
+    
+    def get_order_by_client_order_id(self, client_order_id):
+        self._call()
+        with self._lock:
+            order = self.orders.get(client_order_id)
+        if order is None:
+            raise StubAPIError("order not found", 404)
+        return order
+    
+    def submit_order(self, symbol, qty, side, type='market', time_in_force='day', client_order_id=None, **kwargs):
+        self._call()
+        if self._random.random() < self.failure_rate:
+            raise StubAPIError("service unavailable", 503)
+        
+        qty = float(qty)
+        with self._lock:
+            if client_order_id is not None and client_order_id in self.orders:
+                raise StubAPIError("client_order_id must be unique", 422)
+            if side == 'sell' and qty > self.positions.get(symbol, 0):
+                raise StubAPIError("insufficient qty available for order", 403)
+            price = self._price(symbol)
+            if side == 'buy' and qty * price > self.cash:
+                raise StubAPIError("insufficient buying power", 403)
+            
+            signed_qty = qty if side == 'buy' else -qty
+            self.positions[symbol] = self.positions.get(symbol, 0) + signed_qty
+            self.cash -= signed_qty * price
+            order = SimpleNamespace(
+                id=f"stub-{next(self._ids)}", client_order_id=client_order_id, symbol=symbol,
+                qty=str(qty), side=side, type=type, time_in_force=time_in_force,
+                status='filled', filled_avg_price=str(price)
+            )
+            self.orders[client_order_id or order.id] = order
+            position_qty = self.positions[symbol]
+        
+        update = SimpleNamespace(
+            event='fill', price=price, qty=qty, position_qty=position_qty,
+            order={'id': order.id, 'client_order_id': client_order_id, 'symbol': symbol, 'side': side, 'qty': str(qty)}
+        )
+        for callback in self._subscribers:
+            callback(update)
+        
+        if self._random.random() < self.lost_response_rate:
+            raise StubAPIError("gateway timeout", 504)
+        return order
+
+def main():
+    """Benchmark OrderExecutor against the stub: sequential versus concurrent submission."""
+    from components.order_executor import OrderExecutor
+    
+    parser = argparse.ArgumentParser(description="Benchmark order submission against an in-process broker stub")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds per simulated request")
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--lost-response-rate', type=float, default=0.02)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.ERROR)
+    config = ConfigManager(args.config)
+    tickers = [f"T{i}" for i in range(args.orders)]
+    decision = {'action': 'BUY', 'confidence': 1.0}
+    
+    for mode in ('sequential', 'concurrent'):
+        api = AlpacaStub(latency=args.latency, failure_rate=args.failure_rate,
+                         lost_response_rate=args.lost_response_rate, seed=0)
+        executor = OrderExecutor(api, config)
+        executor.backoff_base = args.latency
+        # Size orders so the whole batch fits in the account
+        allocation = 0.5 / len(tickers)
+        executor.risk_params = dict(executor.risk_params, max_portfolio_allocation=allocation,
+                                    max_risk_per_trade=allocation * executor.risk_params['stop_loss_percentage'])
+        started = time.perf_counter()
+        if mode == 'sequential':
+            results = [executor.execute_trade_with_retry(ticker, decision) for ticker in tickers]
+        else:
+            results = list(executor.execute_trades({ticker: decision for ticker in tickers}).values())
+        elapsed = time.perf_counter() - started
+        executor.close()
+        
+        stats = executor.get_stats()
+        filled = sum(result is not None for result in results)
+        print(f"{mode}: {filled}/{len(tickers)} orders in {elapsed:.2f}s ({filled / elapsed:.1f} orders/s), "
+              f"p50<={stats['p50'] * 1000:.0f}ms p95<={stats['p95'] * 1000:.0f}ms, retries={stats['retries']}, "
+              f"broker orders={len(api.orders)}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
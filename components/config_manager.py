@@ -1,17 +1,91 @@
 # components/config_manager.py
 import yaml
 import os
-from datetime import datetime
-import pytz
 import logging
+import threading
+import time
+from components.config_records import (EventConfig, ExecutionConfig, LoggingConfig, MarketDataConfig, MetricsConfig,
+                                       PipelineConfig, PortfolioConfig, ReloadConfig, ShardingConfig, StartupConfig)
+from components.market_calendar import MarketCalendar, ScheduleConfig
+
+# Settings read once at startup; a reload that changes them is logged but needs a restart
+# (the section records of parse_sections are among them: components keep the records they started with)
+RESTART_REQUIRED = ('api', 'logging', 'metrics', 'startup', 'model.sentiment_analysis.model_name',
+                    'model.sentiment_analysis.backend', 'data_sources.ingestion', 'data_sources.market_data',
+                    'trading.pipeline', 'trading.execution', 'trading.portfolio', 'trading.schedule.mode',
+                    'trading.schedule.event', 'trading.sharding')
+
+def config_changes(old, new, prefix=''):
+    """
+    Get the dotted paths of the settings that differ between two config dicts.
+    
+    Nested dicts are compared key by key; any other value (lists included)
+    is compared as a whole.
+    
+    Returns:
+        Set of paths such as 'trading.tickers' or 'model.sentiment_analysis.confidence_threshold'
+    """
+    changed = set()
+    for key in set(old) | set(new):
+        path = f"{prefix}{key}"
+        before, after = old.get(key), new.get(key)
+        if isinstance(before, dict) and isinstance(after, dict):
+            changed |= config_changes(before, after, f"{path}.")
+        elif before != after:
+            changed.add(path)
+    return changed
+
+def parse_sections(config):
+    """
+    Parse the sections components read at startup into their config records.
+    
+    Returns:
+        Dict of section name -> record (see components.config_records)
+    """
+    trading = config['trading']
+    return {
+        'portfolio': PortfolioConfig.from_dict(trading.get('portfolio')),
+        'execution': ExecutionConfig.from_dict(trading.get('execution')),
+        'pipeline': PipelineConfig.from_dict(trading.get('pipeline')),
+        'sharding': ShardingConfig.from_dict(trading.get('sharding')),
+        'event': EventConfig.from_dict(trading['schedule'].get('event')),
+        'market_data': MarketDataConfig.from_dict(config['data_sources'].get('market_data')),
+        'logging': LoggingConfig.from_dict(config['logging']),
+        'metrics': MetricsConfig.from_dict(config.get('metrics')),
+        'startup': StartupConfig.from_dict(config.get('startup')),
+        'reload': ReloadConfig.from_dict(config.get('reload'))
+    }
+
+def path_changed(changed, *prefixes):
+    """Check whether any changed path is, or is inside, one of the given dotted prefixes."""
+    return any(path == prefix or path.startswith(f"{prefix}.") or prefix.startswith(f"{path}.")
+               for path in changed for prefix in prefixes)
 
 class ConfigManager:
     def __init__(self, config_path="config.yaml"):
-        """Initialize the configuration manager."""
+        """
+        Initialize the configuration manager.
+        
+        check_for_changes() reloads the file when its modification time or
+        size changes (stat()ed at most once per reload.poll_interval). The new
+        file is parsed and validated in full before anything is swapped, so a
+        half-written or invalid edit leaves the running settings untouched.
+        Listeners added with add_listener() are then told which settings
+        changed.
+        """
         self.config_path = config_path
         self.config = self._load_config()
-        self._validate_config()
+        self._validate_config(self.config)
         self.logger = logging.getLogger('ConfigManager')
+        # Parsed once; the main loop reads these instead of walking the config dict
+        self.schedule = ScheduleConfig.from_dict(self.config['trading']['schedule'])
+        self._sections = parse_sections(self.config)
+        self.market_calendar = MarketCalendar(self.schedule)
+        
+        self._stamp = self._file_stamp()
+        self._next_check = 0.0
+        self._listeners = []
+        self._reload_lock = threading.Lock()
     
     def _load_config(self):
         """Load configuration from YAML file."""
@@ -21,17 +95,124 @@ class ConfigManager:
         except Exception as e:
             raise Exception(f"Error loading configuration: {e}")
     
-    def _validate_config(self):
-        """Validate the configuration."""
+    def _validate_config(self, config):
+        """Validate a configuration."""
+        if not isinstance(config, dict):
+            raise ValueError("Configuration is not a mapping")
+        
         # Check for required sections
         required_sections = ['api', 'trading', 'data_sources', 'model', 'logging']
         for section in required_sections:
-            if section not in self.config:
+            if section not in config:
                 raise ValueError(f"Missing required configuration section: {section}")
         
         # Validate API credentials
-        if not self.config['api']['alpaca']['api_key'] or not self.config['api']['alpaca']['api_secret']:
+        if not config['api']['alpaca']['api_key'] or not config['api']['alpaca']['api_secret']:
             raise ValueError("Alpaca API credentials are missing")
+        
+        # Validate the settings components pick up on reload
+        tickers = config['trading'].get('tickers')
+        if not tickers or not all(isinstance(ticker, str) for ticker in tickers):
+            raise ValueError("trading.tickers must be a non-empty list of symbols")
+        for feed in config['data_sources'].get('rss_feeds') or []:
+            if not isinstance(feed, dict) or not feed.get('url'):
+                raise ValueError(f"RSS feed without a url: {feed}")
+        for spec in config['model']['technical_analysis']['indicators']:
+            if not isinstance(spec, dict) or 'type' not in spec:
+                raise ValueError(f"Indicator without a type: {spec}")
+        float(config['model']['sentiment_analysis']['confidence_threshold'])
+    
+    def _file_stamp(self):
+        """Get the config file's modification time and size, or None if it cannot be read."""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def add_listener(self, callback):
+        """
+        Call callback(config_manager, changed) after every reload that changes settings.
+        
+        Args:
+            callback: Function taking this manager and the set of changed dotted paths
+        """
+        self._listeners.append(callback)
+    
+    def check_for_changes(self, force=False):
+        """
+        Reload the file if it changed on disk since it was last read.
+        
+        Args:
+            force: Check now instead of waiting for the poll interval
+        
+        Returns:
+            Set of changed setting paths (empty when nothing was applied)
+        """
+        reload_config = self.get_reload_config()
+        now = time.monotonic()
+        if not reload_config.enabled or (not force and now < self._next_check):
+            return set()
+        self._next_check = now + reload_config.poll_interval
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return set()
+        return self.reload(stamp)
+    
+    def reload(self, stamp=None):
+        """
+        Re-read, validate and apply the config file.
+        
+        The parsed config, schedule, section records and market calendar are
+        built first and swapped in together; on any error the running configuration is kept.
+        
+        Returns:
+            Set of changed setting paths (empty when nothing was applied)
+        """
+        with self._reload_lock:
+            self._stamp = stamp if stamp is not None else self._file_stamp()
+            try:
+                config = self._load_config()
+                self._validate_config(config)
+                schedule = ScheduleConfig.from_dict(config['trading']['schedule'])
+                sections = parse_sections(config)
+                market_calendar = self.market_calendar if schedule == self.schedule else MarketCalendar(schedule)
+            except Exception as e:
+                self.logger.error(f"Ignoring invalid configuration change, keeping the running settings: {e}")
+                return set()
+            
+            changed = config_changes(self.config, config)
+            if not changed:
+                return changed
+            self.config, self.schedule, self._sections, self.market_calendar = config, schedule, sections, market_calendar
+        
+        self.logger.info(f"Reloaded {self.config_path}: {', '.join(sorted(changed))}")
+        restart = sorted(path for path in changed if path_changed({path}, *RESTART_REQUIRED))
+        if restart:
+            self.logger.warning(f"Changes to {', '.join(restart)} take effect after a restart")
+        for callback in self._listeners:
+            try:
+                callback(self, changed)
+            except Exception as e:
+                self.logger.error(f"Error applying configuration change: {e}")
+        return changed
+    
+    def wait_for_change(self, timeout):
+        """
+        Sleep up to timeout seconds, returning early once a configuration change is applied.
+        
+        Returns:
+            Set of changed setting paths (empty after a full sleep)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(remaining, self.get_reload_config().poll_interval))
+            changed = self.check_for_changes(force=True)
+            if changed:
+                return changed
     
     def get_alpaca_credentials(self):
         """Get Alpaca API credentials."""
@@ -45,6 +226,10 @@ class ConfigManager:
         """Get list of tickers to trade."""
         return self.config['trading']['tickers']
     
+    def get_ticker_aliases(self):
+        """Get optional company-name aliases used to match news to tickers."""
+        return self.config['trading'].get('ticker_aliases') or {}
+    
     def get_rss_feeds(self):
         """Get list of RSS feed URLs."""
         return [feed['url'] for feed in self.config['data_sources']['rss_feeds']]
@@ -53,35 +238,86 @@ class ConfigManager:
         """Get list of RSS feeds with names and URLs."""
         return self.config['data_sources']['rss_feeds']
     
+    def get_ingestion_config(self):
+        """Get settings for the RSS download engine."""
+        return self.config['data_sources'].get('ingestion') or {}
+    
+    def get_incremental_fetch_config(self):
+        """Get settings for incremental (conditional GET, deduplicated) RSS fetching."""
+        return self.config['data_sources'].get('incremental') or {}
+    
+    def get_article_store_config(self):
+        """Get settings for the in-memory article store."""
+        return self.config['data_sources'].get('article_store') or {}
+    
+    def get_dedup_config(self):
+        """Get settings for near-duplicate article detection."""
+        return self.config['data_sources'].get('dedup') or {}
+    
+    def get_market_data_config(self):
+        """Get the bar fetching and bar store settings (a MarketDataConfig)."""
+        return self._sections['market_data']
+    
     def get_risk_parameters(self):
         """Get risk management parameters."""
         return self.config['trading']['risk']
     
+    def get_execution_config(self):
+        """Get the order submission settings (an ExecutionConfig)."""
+        return self._sections['execution']
+    
+    def get_portfolio_config(self):
+        """Get the settings for the cached account and position state (a PortfolioConfig)."""
+        return self._sections['portfolio']
+    
+    def get_pipeline_config(self):
+        """Get the settings for the staged trading pipeline (a PipelineConfig)."""
+        return self._sections['pipeline']
+    
+    def get_sharding_config(self):
+        """Get the settings for sharded multi-process execution (a ShardingConfig)."""
+        return self._sections['sharding']
+    
     def get_model_config(self):
         """Get AI model configuration."""
         return self.config['model']
     
     def get_logging_config(self):
-        """Get logging configuration."""
-        return self.config['logging']
+        """Get the logging configuration (a LoggingConfig)."""
+        return self._sections['logging']
+    
+    def get_metrics_config(self):
+        """Get the settings for the metrics endpoint and summary line (a MetricsConfig)."""
+        return self._sections['metrics']
+    
+    def get_backtest_config(self):
+        """Get settings for offline replays."""
+        return self.config.get('backtest') or {}
+    
+    def get_event_config(self):
+        """Get the event scheduler settings (an EventConfig)."""
+        return self._sections['event']
+    
+    def get_reload_config(self):
+        """Get the settings for reloading the config file while running (a ReloadConfig)."""
+        return self._sections['reload']
+    
+    def get_indicators_config(self):
+        """Get the technical indicator specs."""
+        return self.config['model']['technical_analysis']['indicators']
+    
+    def get_startup_config(self):
+        """Get the startup settings (a StartupConfig)."""
+        return self._sections['startup']
     
     def get_check_interval(self):
         """Get the interval for checking new data."""
-        return self.config['trading']['schedule']['check_interval']
+        return self.schedule.check_interval
     
     def is_market_open(self):
-        """Check if the market is currently open based on configuration."""
-        # Get current time in Eastern Time
-        eastern = pytz.timezone('US/Eastern')
-        now = datetime.now(eastern)
-        
-        # Check if today is a trading day
-        if now.weekday() not in self.config['trading']['schedule']['trading_days']:
-            return False
-        
-        # Parse market hours
-        market_open = datetime.strptime(self.config['trading']['schedule']['market_open'], "%H:%M").time()
-        market_close = datetime.strptime(self.config['trading']['schedule']['market_close'], "%H:%M").time()
-        
-        # Check if current time is within market hours
-        return market_open <= now.time() <= market_close
+        """Check if the market is currently open, counting exchange holidays and early closes."""
+        return self.market_calendar.is_open()
+    
+    def seconds_until_market_open(self):
+        """Get the seconds until the market next opens (0 while open, None if no session is scheduled)."""
+        return self.market_calendar.seconds_until_open()
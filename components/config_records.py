@@ -0,0 +1,205 @@
+# components/config_records.py
+import os
+from collections import namedtuple
+from components.structured_logging import AUDIT_MESSAGE_PREFIXES
+
+# Each section of config.yaml that components read at startup is parsed once, like
+# market_calendar.ScheduleConfig, into an immutable record with every default filled in.
+# from_dict accepts a missing (None) section, so FooConfig.from_dict(None) gives the defaults.
+
+def _optional(value, convert):
+    """Convert a setting that may be left unset (None stays None)."""
+    return None if value is None else convert(value)
+
+class PortfolioConfig(namedtuple('PortfolioConfig', ['stream_updates', 'resync_interval', 'pending_grace'])):
+    """The cached account and position state settings (trading.portfolio)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            stream_updates=bool(section.get('stream_updates', True)),
+            resync_interval=float(section.get('resync_interval', 300)),
+            pending_grace=float(section.get('pending_grace', 60))
+        )
+
+class ExecutionConfig(namedtuple('ExecutionConfig', [
+    'max_workers', 'max_retries', 'backoff_base', 'backoff_max', 'client_order_prefix'
+])):
+    """The order submission settings (trading.execution)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            max_workers=int(section.get('max_workers', 8)),
+            max_retries=int(section.get('max_retries', 3)),
+            backoff_base=float(section.get('backoff_base', 0.5)),
+            backoff_max=float(section.get('backoff_max', 8.0)),
+            client_order_prefix=str(section.get('client_order_prefix', 'aibot'))
+        )
+
+class PipelineConfig(namedtuple('PipelineConfig', [
+    'enabled', 'queue_size', 'sentiment_batch_size', 'sentiment_workers', 'indicator_workers',
+    'indicator_batch_size', 'decision_batch_size', 'execution_workers', 'indicator_max_age'
+])):
+    """The staged pipeline settings (trading.pipeline); indicator_max_age None never reuses indicators."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            enabled=bool(section.get('enabled', False)),
+            queue_size=int(section.get('queue_size', 100)),
+            sentiment_batch_size=int(section.get('sentiment_batch_size', 64)),
+            sentiment_workers=int(section.get('sentiment_workers', 1)),
+            indicator_workers=int(section.get('indicator_workers', 4)),
+            indicator_batch_size=int(section.get('indicator_batch_size', 25)),
+            decision_batch_size=int(section.get('decision_batch_size', 256)),
+            execution_workers=int(section.get('execution_workers', 4)),
+            indicator_max_age=_optional(section.get('indicator_max_age'), float)
+        )
+
+class EventConfig(namedtuple('EventConfig', [
+    'initial_feed_interval', 'min_feed_interval', 'max_feed_interval', 'feed_backoff', 'polls_per_article',
+    'bar_refresh_interval', 'active_ticker_window', 'stats_interval'
+])):
+    """The event scheduler settings (trading.schedule.event)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            initial_feed_interval=float(section.get('initial_feed_interval', 30)),
+            min_feed_interval=float(section.get('min_feed_interval', 10)),
+            max_feed_interval=float(section.get('max_feed_interval', 60)),
+            feed_backoff=float(section.get('feed_backoff', 1.2)),
+            polls_per_article=float(section.get('polls_per_article', 6)),
+            bar_refresh_interval=float(section.get('bar_refresh_interval', 60)),
+            active_ticker_window=float(section.get('active_ticker_window', 1800)),
+            stats_interval=float(section.get('stats_interval', 300))
+        )
+
+class GatewayConfig(namedtuple('GatewayConfig', ['max_orders_per_cycle', 'max_open_positions', 'max_gross_exposure'])):
+    """Portfolio-wide order limits (trading.sharding.gateway); None leaves a limit unenforced."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            max_orders_per_cycle=_optional(section.get('max_orders_per_cycle'), int),
+            max_open_positions=_optional(section.get('max_open_positions'), int),
+            max_gross_exposure=_optional(section.get('max_gross_exposure'), float)
+        )
+
+class ShardingConfig(namedtuple('ShardingConfig', [
+    'enabled', 'workers', 'remote_workers', 'host', 'port', 'authkey', 'rebalance_interval',
+    'rebalance_tolerance', 'cycle_timeout', 'connect_timeout', 'gateway'
+])):
+    """The sharded execution settings (trading.sharding), with the gateway limits as a GatewayConfig."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            enabled=bool(section.get('enabled', False)),
+            workers=int(section.get('workers', os.cpu_count() or 1)),
+            remote_workers=int(section.get('remote_workers', 0)),
+            host=str(section.get('host', '127.0.0.1')),
+            port=int(section.get('port', 0)),
+            authkey=section.get('authkey') or '',
+            rebalance_interval=int(section.get('rebalance_interval', 10)),
+            rebalance_tolerance=float(section.get('rebalance_tolerance', 0.2)),
+            cycle_timeout=float(section.get('cycle_timeout', 120)),
+            connect_timeout=float(section.get('connect_timeout', 300)),
+            gateway=GatewayConfig.from_dict(section.get('gateway'))
+        )
+
+class RateLimitConfig(namedtuple('RateLimitConfig', [
+    'enabled', 'interval', 'max_per_interval', 'exclude_loggers', 'exclude_messages'
+])):
+    """Log rate limiting settings (logging.rate_limit); trade decision lines are excluded by default."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            enabled=bool(section.get('enabled', False)),
+            interval=float(section.get('interval', 60)),
+            max_per_interval=int(section.get('max_per_interval', 5)),
+            exclude_loggers=tuple(section.get('exclude_loggers') or ()),
+            exclude_messages=tuple(section.get('exclude_messages', AUDIT_MESSAGE_PREFIXES) or ())
+        )
+
+class LoggingConfig(namedtuple('LoggingConfig', [
+    'level', 'log_to_file', 'log_file', 'max_log_size', 'backup_count', 'queued', 'format', 'rate_limit'
+])):
+    """The logging settings; queued is the logging.async option, rate_limit a RateLimitConfig."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            level=str(section.get('level', 'INFO')),
+            log_to_file=bool(section.get('log_to_file', False)),
+            log_file=str(section.get('log_file', 'trading_bot.log')),
+            max_log_size=int(section.get('max_log_size', 10485760)),
+            backup_count=int(section.get('backup_count', 5)),
+            queued=bool(section.get('async', False)),
+            format=str(section.get('format', 'text')),
+            rate_limit=RateLimitConfig.from_dict(section.get('rate_limit'))
+        )
+
+class MetricsConfig(namedtuple('MetricsConfig', ['enabled', 'host', 'port', 'summary_interval'])):
+    """The metrics endpoint and summary line settings (metrics)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(
+            enabled=bool(section.get('enabled', False)),
+            host=str(section.get('host', '127.0.0.1')),
+            port=int(section.get('port', 9108)),
+            summary_interval=float(section.get('summary_interval', 300))
+        )
+
+class MarketDataConfig(namedtuple('MarketDataConfig', ['bulk_chunk_size', 'bar_store_enabled', 'bar_store_path'])):
+    """The bar fetching and local bar store settings (data_sources.market_data)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        bar_store = section.get('bar_store') or {}
+        return cls(
+            bulk_chunk_size=int(section.get('bulk_chunk_size', 100)),
+            bar_store_enabled=bool(bar_store.get('enabled', False)),
+            bar_store_path=str(bar_store.get('path', './data/bars'))
+        )
+
+class StartupConfig(namedtuple('StartupConfig', ['background_model_load'])):
+    """The startup settings (startup)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(background_model_load=bool(section.get('background_model_load', True)))
+
+class ReloadConfig(namedtuple('ReloadConfig', ['enabled', 'poll_interval'])):
+    """The config file reload settings (reload)."""
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, section):
+        section = section or {}
+        return cls(enabled=bool(section.get('enabled', True)), poll_interval=float(section.get('poll_interval', 5)))
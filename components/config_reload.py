@@ -0,0 +1,86 @@
+# components/config_reload.py
+import logging
+from components.config_manager import path_changed
+
+class ConfigReloader:
+    def __init__(self, data_collector, technical_analyzer, trading_strategy, sentiment_accumulator=None,
+                 order_executor=None, portfolio_state=None, trading_pipeline=None, event_scheduler=None):
+        """
+        Push reloaded settings into running components.
+        
+        Register with ConfigManager.add_listener. Each change is applied to
+        the components that use that setting, and only those caches are
+        invalidated. The sentiment model, the sentiment cache, stored bars and
+        stored articles stay in memory:
+        - tickers and aliases: the news matcher is rebuilt and stored articles
+          are re-matched; cached indicators of dropped tickers are discarded
+        - RSS feeds: read at every collection; the event scheduler adds and
+          drops feeds, keeping learned intervals for the others
+        - sentiment threshold, decision settings and aggregation: set on the
+          strategy and accumulator
+        - risk parameters: swapped into order sizing
+        - indicator specs: every cached indicator result is dropped and the
+          engine rebuilt, and bars are reused from the bar store
+        
+        Components that are not running can be omitted (shard workers pass
+        no data collector; their tickers are assigned by the coordinator).
+        """
+        self.logger = logging.getLogger('ConfigReloader')
+        self.data_collector = data_collector
+        self.technical_analyzer = technical_analyzer
+        self.trading_strategy = trading_strategy
+        self.sentiment_accumulator = sentiment_accumulator
+        self.order_executor = order_executor
+        self.portfolio_state = portfolio_state
+        self.trading_pipeline = trading_pipeline
+        self.event_scheduler = event_scheduler
+    
+    def __call__(self, config_manager, changed):
+        """Apply a set of changed setting paths (the ConfigManager listener signature)."""
+        applied = []
+        
+        if self.data_collector is not None and path_changed(changed, 'trading.tickers', 'trading.ticker_aliases'):
+            previous = set(self.data_collector.matcher.tickers)
+            tickers = config_manager.get_tickers()
+            self.data_collector.update_tickers()
+            self.technical_analyzer.invalidate_indicators(previous - set(tickers))
+            if self.event_scheduler is not None:
+                self.event_scheduler.update_tickers(tickers)
+            applied.append('tickers')
+        
+        if path_changed(changed, 'data_sources.rss_feeds'):
+            if self.event_scheduler is not None:
+                self.event_scheduler.update_feeds()
+            applied.append('feeds')
+        
+        model_config = config_manager.get_model_config()
+        if path_changed(changed, 'model.sentiment_analysis.confidence_threshold', 'model.decision'):
+            self.trading_strategy.apply_model_config(model_config)
+            applied.append('decision thresholds')
+        
+        if self.sentiment_accumulator is not None and path_changed(
+                changed, 'model.sentiment_analysis.aggregation', 'model.sentiment_analysis.confidence_threshold'):
+            self.sentiment_accumulator.configure(
+                model_config['sentiment_analysis'].get('aggregation') or {},
+                model_config['sentiment_analysis']['confidence_threshold']
+            )
+            applied.append('sentiment aggregation')
+        
+        if path_changed(changed, 'trading.risk'):
+            risk_params = config_manager.get_risk_parameters()
+            for component in (self.order_executor, self.portfolio_state):
+                if component is not None:
+                    component.risk_params = risk_params
+            applied.append('risk parameters')
+        
+        if path_changed(changed, 'model.technical_analysis.indicators'):
+            indicators_config = config_manager.get_indicators_config()
+            self.technical_analyzer.invalidate_indicators()
+            for component in (self.trading_pipeline, self.event_scheduler):
+                if component is not None:
+                    component.indicators_config = indicators_config
+            applied.append('indicator specs')
+        
+        if applied:
+            self.logger.info(f"Applied configuration changes: {', '.join(applied)}")
+        return applied
@@ -1,11 +1,15 @@
 # components/data_collector.py
-import feedparser
-import pandas as pd
-from datetime import datetime
 import logging
 import threading
 import concurrent.futures
 import time
+import hashlib
+from components.article_store import ArticleStore, newest_first, parse_published
+from components.metrics import REGISTRY
+from components.near_duplicates import MinHashIndex
+from components.news_matcher import NewsMatcher
+from components.feed_state import FeedStateStore
+from components.feed_fetcher import AsyncFeedFetcher
 
 class RSSDataCollector:
     def __init__(self, config_manager):
@@ -13,95 +17,330 @@ class RSSDataCollector:
         self.config_manager = config_manager
         self.logger = logging.getLogger('RSSDataCollector')
         self.timeout = 10  # Timeout in seconds for each feed
+        self.matcher = NewsMatcher(config_manager.get_tickers(), config_manager.get_ticker_aliases())
+        self._news_index = {}
+        self._indexed_articles = None
+        self.last_new_counts = {}  # url -> articles first stored from that feed in the last collection
+        
+        # Articles are parsed and matched to tickers once, then kept until the retention window passes
+        store_config = config_manager.get_article_store_config()
+        dedup_config = config_manager.get_dedup_config()
+        dedup_index = None
+        if dedup_config.get('enabled', True):
+            # Syndicated copies of a story collapse into the first copy seen
+            dedup_index = MinHashIndex(
+                similarity=dedup_config.get('similarity', 0.6),
+                bands=dedup_config.get('bands', 16),
+                rows=dedup_config.get('rows', 4),
+                min_tokens=dedup_config.get('min_tokens', 6)
+            )
+        self.store = ArticleStore(
+            self.matcher, retention_seconds=store_config.get('retention_hours', 48) * 3600, dedup_index=dedup_index
+        )
+        
+        # Conditional GETs and cross-cycle dedup of entries already returned
+        incremental_config = config_manager.get_incremental_fetch_config()
+        self.feed_state = None
+        self._pending_claims = {}  # Entry ID -> Article, claimed but not yet confirmed as processed
+        self._retries = {}  # Entry ID -> Article whose processing failed, collected again next time
+        self._attempts = {}  # Entry ID -> failed processing attempts
+        self.max_attempts = incremental_config.get('max_processing_attempts', 3)
+        if incremental_config.get('enabled', False):
+            self.feed_state = FeedStateStore(
+                path=incremental_config.get('state_path', './data/feed_state.db'),
+                seen_retention_days=incremental_config.get('seen_retention_days', 7)
+            )
+        # Previously returned entries are re-emitted while they are younger than this window
+        self.rolling_window = incremental_config.get('rolling_window_minutes', 0) * 60
+        
+        # Feed download engine: "threads" (thread per feed) or "async" (aiohttp, pooled)
+        ingestion_config = config_manager.get_ingestion_config()
+        self.timeout = ingestion_config.get('timeout', self.timeout)
+        self.async_fetcher = None
+        if ingestion_config.get('engine', 'threads') == 'async':
+            try:
+                self.async_fetcher = AsyncFeedFetcher(
+                    timeout=self.timeout,
+                    max_connections=ingestion_config.get('max_connections', 20),
+                    per_host_limit=ingestion_config.get('per_host_limit', 2),
+                    parse_workers=ingestion_config.get('parse_workers', 2)
+                )
+            except ImportError:
+                self.logger.warning("aiohttp is not installed, falling back to threaded feed fetching")
+    
+    def update_tickers(self):
+        """Rebuild the ticker matcher from the configuration and re-match stored articles with it."""
+        self.matcher = NewsMatcher(self.config_manager.get_tickers(), self.config_manager.get_ticker_aliases())
+        retagged = self.store.retag(self.matcher)
+        self._indexed_articles = None
+        self.logger.info(f"Matching news against {len(self.matcher.tickers)} tickers ({retagged} stored articles re-tagged)")
+    
+    @staticmethod
+    def _entry_id(entry):
+        """Get a stable ID for a feed entry (GUID, then link, then a content hash)."""
+        entry_id = entry.get('id') or entry.get('link')
+        if entry_id:
+            return entry_id
+        content = f"{entry.get('title', '')}\n{entry.get('summary', '')}"
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
     
     def _parse_single_feed(self, feed_info):
         """Parse a single RSS feed with timeout using threading."""
         url = feed_info['url']
-        name = feed_info.get('name', url)
-        result = []
-        error = None
+        outcome = {}
+        
+        etag, modified = (None, None)
+        if self.feed_state is not None:
+            etag, modified = self.feed_state.get_validators(url)
         
         def parse_feed():
-            nonlocal result, error
             try:
-                feed = feedparser.parse(url)
-                if hasattr(feed, 'status') and feed.status != 200 and feed.status != 301:
-                    error = f"Feed returned status code {feed.status}"
+                import feedparser
+                feed = feedparser.parse(url, etag=etag, modified=modified)
+                if getattr(feed, 'status', None) == 304:
+                    outcome['not_modified'] = True
                     return
-                    
-                if not hasattr(feed, 'entries') or len(feed.entries) == 0:
-                    error = "Feed returned no entries"
+                
+                if hasattr(feed, 'status') and feed.status not in (200, 301, 302):
+                    outcome['error'] = f"Feed returned status code {feed.status}"
                     return
-                    
-                for entry in feed.entries:
-                    result.append({
-                        'title': entry.get('title', ''),
-                        'summary': entry.get('summary', ''),
-                        'published': entry.get('published', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
-                        'link': entry.get('link', ''),
-                        'source': name
-                    })
+                
+                outcome['feed'] = feed
+                outcome['etag'] = feed.get('etag')
+                outcome['modified'] = feed.get('modified')
             except Exception as e:
-                error = str(e)
+                outcome['error'] = str(e)
         
+        started = time.perf_counter()
         thread = threading.Thread(target=parse_feed)
         thread.daemon = True
         thread.start()
         thread.join(self.timeout)
         
         if thread.is_alive():
+            return self._process_feed_result(feed_info, {
+                'error': f"timed out after {self.timeout} seconds",
+                'timed_out': True,
+                'elapsed': time.perf_counter() - started
+            })
+        
+        outcome['elapsed'] = time.perf_counter() - started
+        return self._process_feed_result(feed_info, outcome)
+    
+    def _process_feed_result(self, feed_info, outcome):
+        """Turn a fetch outcome into stored articles for its new entries, updating the feed state."""
+        url = feed_info['url']
+        name = feed_info.get('name', url)
+        if 'elapsed' in outcome:
+            REGISTRY.observe('feed_fetch_seconds', outcome['elapsed'], feed=name)
+        
+        if outcome.get('timed_out'):
+            REGISTRY.inc('feed_errors_total', feed=name, reason='timeout')
             self.logger.warning(f"Feed {name} timed out after {self.timeout} seconds")
             return []
         
-        if error:
-            self.logger.warning(f"Error parsing feed {name}: {error}")
+        if outcome.get('not_modified'):
+            REGISTRY.inc('feed_not_modified_total', feed=name)
+            self.logger.info(f"Feed {name} not modified since last fetch")
+            return []
+        
+        if outcome.get('error'):
+            REGISTRY.inc('feed_errors_total', feed=name, reason='error')
+            self.logger.warning(f"Error parsing feed {name}: {outcome['error']}")
             return []
         
-        self.logger.info(f"Successfully fetched {len(result)} entries from {name}")
+        feed = outcome['feed']
+        if not hasattr(feed, 'entries') or len(feed.entries) == 0:
+            REGISTRY.inc('feed_errors_total', feed=name, reason='empty')
+            self.logger.warning(f"Error parsing feed {name}: Feed returned no entries")
+            return []
+        
+        entries = [(self._entry_id(entry), entry) for entry in feed.entries]
+        fetched = len(entries)
+        
+        if self.feed_state is not None:
+            # Only keep entries that no earlier fetch (of any feed) has returned
+            new_ids = self.feed_state.claim_new_entries(url, [entry_id for entry_id, _ in entries])
+            new_entries = []
+            for entry_id, entry in entries:
+                if entry_id in new_ids:
+                    new_entries.append((entry_id, entry))
+                    new_ids.discard(entry_id)  # A feed can repeat an entry
+            entries = new_entries
+            self.feed_state.set_validators(url, outcome.get('etag'), outcome.get('modified'))
+        
+        result = [
+            self.store.add(
+                entry_id, entry.get('title', ''), entry.get('summary', ''), entry.get('link', ''), name,
+                parse_published(entry.get('published'), entry.get('published_parsed'))
+            )
+            for entry_id, entry in entries
+        ]
+        if self.feed_state is not None:
+            for (entry_id, _), article in zip(entries, result):
+                self._pending_claims[entry_id] = article
+        REGISTRY.inc('articles_fetched_total', len(result), feed=name)
+        
+        if self.feed_state is not None:
+            self.logger.info(f"Successfully fetched {fetched} entries from {name}, {len(result)} new")
+        else:
+            self.logger.info(f"Successfully fetched {len(result)} entries from {name}")
         return result
     
-    def collect_rss_data(self):
-        """Collect data from RSS feeds with parallel processing and error handling."""
+    def confirm_processed(self, failed=()):
+        """
+        Confirm that the articles collected so far have been scored and traded, except the failed ones.
+        
+        Until then their entries are only claimed, so a process that dies
+        mid-cycle fetches them again on restart instead of losing the news.
+        Failed articles stay claimed and are returned again by the next
+        collect_rss_data, up to max_processing_attempts times.
+        
+        Args:
+            failed: Articles of the collection whose processing failed
+        """
+        claims, self._pending_claims = self._pending_claims, {}
+        failed = {id(article) for article in failed}
+        confirmed = []
+        for entry_id, article in claims.items():
+            if id(article.duplicate_of or article) in failed:
+                attempts = self._attempts.get(entry_id, 0) + 1
+                if attempts < self.max_attempts:
+                    self._attempts[entry_id] = attempts
+                    self._retries[entry_id] = article
+                    continue
+                self.logger.error(f"Giving up on article {entry_id} after {attempts} failed processing attempts")
+            self._attempts.pop(entry_id, None)
+            confirmed.append(entry_id)
+        
+        if self._retries:
+            self.logger.warning(f"{len(self._retries)} articles failed processing and will be retried")
+        if self.feed_state is not None and confirmed:
+            self.feed_state.confirm_entries(confirmed)
+    
+    def _take_retries(self):
+        """Get the articles to process again, claiming them for this collection."""
+        retries, self._retries = self._retries, {}
+        self._pending_claims.update(retries)
+        return [article.duplicate_of or article for article in retries.values()]
+    
+    def _collect_async(self, feeds):
+        """Fetch all feeds on the asyncio engine and return their new articles per feed."""
+        requests = []
+        for feed in feeds:
+            etag, modified = (None, None)
+            if self.feed_state is not None:
+                etag, modified = self.feed_state.get_validators(feed['url'])
+            requests.append((feed['url'], etag, modified))
+        
+        outcomes = self.async_fetcher.fetch_all(requests)
+        return [self._process_feed_result(feed, outcome) for feed, outcome in zip(feeds, outcomes)]
+    
+    @REGISTRY.timed('collect_rss_data')
+    def collect_rss_data(self, feeds=None):
+        """
+        Collect data from RSS feeds (all configured feeds by default) with parallel processing and error handling.
+        
+        Returns:
+            List of Articles from the article store, newest first
+        """
         # Get feed configurations which include name and url
-        feeds = self.config_manager.get_rss_feeds_with_names()
+        if feeds is None:
+            feeds = self.config_manager.get_rss_feeds_with_names()
+        if self.feed_state is not None:
+            # Fetch each URL once; conditional GET state is tracked per URL
+            unique_feeds = {}
+            for feed in feeds:
+                unique_feeds.setdefault(feed['url'], feed)
+            feeds = list(unique_feeds.values())
+            self.feed_state.prune()
+        self.store.prune()
         self.logger.info(f"Attempting to collect data from {len(feeds)} RSS feeds")
         
         all_entries = []
         successful_feeds = 0
+        started = self.store.clock()
+        new_counts = {}
+        
+        if self.async_fetcher is not None:
+            for feed, entries in zip(feeds, self._collect_async(feeds)):
+                new_counts[feed['url']] = sum(1 for article in entries if article.ingested >= started)
+                if len(entries) > 0:
+                    all_entries.extend(entries)
+                    successful_feeds += 1
+        else:
+            # Process feeds with a timeout
+            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+                future_to_feed = {executor.submit(self._parse_single_feed, feed): feed for feed in feeds}
+                
+                for future in concurrent.futures.as_completed(future_to_feed):
+                    feed = future_to_feed[future]
+                    try:
+                        entries = future.result()
+                        new_counts[feed['url']] = sum(1 for article in entries if article.ingested >= started)
+                        if len(entries) > 0:  # Check length instead of truthiness
+                            all_entries.extend(entries)
+                            successful_feeds += 1
+                    except Exception as e:
+                        self.logger.error(f"Exception processing feed {feed.get('name', 'unknown')}: {e}")
         
-        # Process feeds with a timeout
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_feed = {executor.submit(self._parse_single_feed, feed): feed for feed in feeds}
-            
-            for future in concurrent.futures.as_completed(future_to_feed):
-                feed = future_to_feed[future]
-                try:
-                    entries = future.result()
-                    if len(entries) > 0:  # Check length instead of truthiness
-                        all_entries.extend(entries)
-                        successful_feeds += 1
-                except Exception as e:
-                    self.logger.error(f"Exception processing feed {feed.get('name', 'unknown')}: {e}")
-        
-        # Convert to DataFrame for easier processing
-        df = pd.DataFrame(all_entries)
-        if not df.empty:
-            # Add utc=True to fix the FutureWarning about mixed time zones
-            df['published'] = pd.to_datetime(df['published'], errors='coerce', utc=True)
-            df = df.sort_values('published', ascending=False)
-        
-        self.logger.info(f"Successfully collected from {successful_feeds}/{len(feeds)} feeds with {len(df)} total news items")
-        return df
+        # Per feed, before duplicates are collapsed: how often each feed publishes
+        self.last_new_counts = new_counts
+        all_entries.extend(self._take_retries())
+        if self.rolling_window > 0:
+            all_entries = self._apply_rolling_window(all_entries)
+        articles = newest_first(self._unique_stories(all_entries))
+        
+        self.logger.info(f"Successfully collected from {successful_feeds}/{len(feeds)} feeds with {len(articles)} total news items")
+        return articles
     
-    def filter_news_by_ticker(self, news_df, ticker):
-        """Filter news relevant to a specific ticker."""
-        if news_df.empty:
-            return pd.DataFrame()
-        
-        # Filter news that mentions the ticker in title or summary
-        ticker_news = news_df[
-            news_df['title'].str.contains(ticker, case=False, na=False) | 
-            news_df['summary'].str.contains(ticker, case=False, na=False)
-        ]
+    def _unique_stories(self, articles):
+        """Drop repeats of an article within a collection and copies of stories already stored."""
+        unique = {}
+        duplicates = 0
+        for article in articles:
+            if article.duplicate_of is not None:
+                duplicates += 1
+            else:
+                unique.setdefault(id(article), article)
+        
+        repeated = len(articles) - duplicates - len(unique)
+        REGISTRY.inc('articles_duplicate_total', duplicates, kind='near')
+        REGISTRY.inc('articles_duplicate_total', repeated, kind='repeat')
+        if duplicates or repeated:
+            self.logger.info(f"Collapsed {duplicates} near-duplicate and {repeated} repeated articles")
+        return list(unique.values())
+    
+    def _apply_rolling_window(self, new_articles):
+        """Add the stored articles first seen within the rolling window to the new ones."""
+        recent = self.store.since(time.time() - self.rolling_window)
+        in_window = {id(article) for article in recent}
+        return recent + [article for article in new_articles if id(article) not in in_window]
+    
+    def index_news_by_ticker(self, articles):
+        """Build the ticker -> article index for a collection from the tickers matched at ingest."""
+        index = {}
+        for position, article in enumerate(articles):
+            for ticker in article.tickers:
+                index.setdefault(ticker, []).append(position)
+        self._news_index = index
+        self._indexed_articles = articles
+        self.logger.info(f"Indexed {len(articles)} news items: {len(self._news_index)} tickers mentioned")
+        return self._news_index
+    
+    def filter_news_by_ticker(self, articles, ticker):
+        """Get the articles of a collection relevant to a specific ticker."""
+        if not articles:
+            return []
+        
+        # Reuse the index when it was built for this collection
+        if self._indexed_articles is not articles:
+            self.index_news_by_ticker(articles)
+        
+        positions = self._news_index.get(ticker)
+        if positions is None and ticker not in self.matcher.tickers:
+            # Ticker outside the configured universe: match it directly
+            matcher = NewsMatcher([ticker])
+            return [article for article in articles if ticker in matcher.match_text(article.text)]
         
-        return ticker_news
+        return [articles[position] for position in positions or ()]
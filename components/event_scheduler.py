@@ -0,0 +1,394 @@
+# components/event_scheduler.py
+import bisect
+import heapq
+import logging
+import time
+from components.config_records import EventConfig
+from components.structured_logging import start_cycle
+
+class FeedSchedule:
+    __slots__ = ('feed', 'interval', 'average_gap', 'last_new_at', 'next_poll')
+    
+    def __init__(self, feed, interval, now):
+        """Polling state for one feed."""
+        self.feed = feed
+        self.interval = interval
+        self.average_gap = None  # Smoothed seconds between new entries
+        self.last_new_at = None
+        self.next_poll = now
+    
+    def __lt__(self, other):
+        return self.next_poll < other.next_poll
+
+class EventScheduler:
+    def __init__(self, data_collector, trading_pipeline, technical_analyzer, tickers,
+                 indicators_config, scheduler_config=None, check_interval=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        Initialize the event-driven scheduler.
+        
+        Instead of sweeping every feed and ticker on a fixed interval, each
+        feed is polled on its own adaptive interval (frequent publishers more
+        often, quiet feeds backed off), new articles are handed straight to the
+        trading pipeline for the tickers they mention, and indicators are only
+        refreshed for tickers that have had news recently. Idle tickers are
+        never touched.
+        
+        Args:
+            check_interval: Sweep interval of the fixed loop; no feed is polled
+                less often than this, so no article waits longer than it would there
+            clock, sleep: Injectable time functions, used for replays
+        """
+        scheduler_config = scheduler_config or EventConfig.from_dict(None)
+        self.logger = logging.getLogger('EventScheduler')
+        self.data_collector = data_collector
+        self.trading_pipeline = trading_pipeline
+        self.technical_analyzer = technical_analyzer
+        self.tickers = tickers
+        self.indicators_config = indicators_config
+        self.clock = clock
+        self.sleep = sleep
+        
+        self.min_interval = scheduler_config.min_feed_interval
+        self.max_interval = scheduler_config.max_feed_interval
+        if check_interval is not None:
+            self.max_interval = min(self.max_interval, check_interval)
+        self.backoff = scheduler_config.feed_backoff
+        self.polls_per_article = scheduler_config.polls_per_article
+        self.bar_refresh_interval = scheduler_config.bar_refresh_interval
+        self.active_window = scheduler_config.active_ticker_window
+        self.stats_interval = scheduler_config.stats_interval
+        
+        now = self.clock()
+        self.initial_interval = min(scheduler_config.initial_feed_interval, self.max_interval)
+        self._feeds = [FeedSchedule(feed, self.initial_interval, now) for feed in self._unique_feeds()]
+        heapq.heapify(self._feeds)
+        self._active_tickers = {}  # ticker -> time of last news
+        self._next_bar_refresh = now + self.bar_refresh_interval
+        self._next_stats = now + self.stats_interval
+    
+    def _unique_feeds(self):
+        """Get configured feeds, one per URL."""
+        feeds = {}
+        for feed in self.data_collector.config_manager.get_rss_feeds_with_names():
+            feeds.setdefault(feed['url'], feed)
+        return list(feeds.values())
+    
+    def update_feeds(self):
+        """
+        Follow the configured feed list: new feeds are polled right away, removed ones dropped.
+        
+        Feeds that stay keep their learned polling intervals.
+        """
+        configured = {feed['url']: feed for feed in self._unique_feeds()}
+        now = self.clock()
+        kept = []
+        for schedule in self._feeds:
+            feed = configured.pop(schedule.feed['url'], None)
+            if feed is not None:
+                schedule.feed = feed  # The name may have changed
+                kept.append(schedule)
+        added = [FeedSchedule(feed, self.initial_interval, now) for feed in configured.values()]
+        removed = len(self._feeds) - len(kept)
+        self._feeds = kept + added
+        heapq.heapify(self._feeds)
+        self.logger.info(f"Feed list updated: {len(added)} added, {removed} removed, {len(self._feeds)} polled")
+    
+    def update_tickers(self, tickers):
+        """Switch to a new ticker universe, forgetting activity of tickers no longer traded."""
+        self.tickers = tickers
+        watched = set(tickers)
+        self._active_tickers = {ticker: seen for ticker, seen in self._active_tickers.items() if ticker in watched}
+    
+    def run(self, should_continue):
+        """Process events until should_continue() returns False."""
+        while should_continue():
+            self.run_pending()
+            
+            # Sleep until the next event, waking at least once a second to re-check should_continue
+            wake_at = min(self._feeds[0].next_poll if self._feeds else self._next_bar_refresh,
+                          self._next_bar_refresh, self._next_stats)
+            delay = wake_at - self.clock()
+            if delay > 0:
+                self.sleep(min(delay, 1.0))
+    
+    def run_pending(self):
+        """Run every event that is due now."""
+        now = self.clock()
+        
+        due = []
+        while self._feeds and self._feeds[0].next_poll <= now:
+            due.append(heapq.heappop(self._feeds))
+        if due:
+            self._poll_feeds(due)
+        if self.trading_pipeline.idle():
+            # Everything collected so far has been scored and traded, or failed and is retried
+            self.data_collector.confirm_processed(failed=self.trading_pipeline.take_failed_news())
+        
+        if self.clock() >= self._next_bar_refresh:
+            self._refresh_indicators()
+            self._next_bar_refresh = self.clock() + self.bar_refresh_interval
+        
+        if self.clock() >= self._next_stats:
+            self.trading_pipeline.log_stats()
+            self._next_stats = self.clock() + self.stats_interval
+    
+    def _poll_feeds(self, schedules):
+        """Fetch the due feeds together and push their new articles into the pipeline."""
+        start_cycle('poll')
+        articles = self.data_collector.collect_rss_data(feeds=[schedule.feed for schedule in schedules])
+        arrived = time.perf_counter()
+        now = self.clock()
+        
+        # Counted per URL at fetch time, so feeds sharing a name and copies of one story all count
+        new_counts = self.data_collector.last_new_counts
+        
+        for schedule in schedules:
+            self._reschedule(schedule, new_counts.get(schedule.feed['url'], 0), now)
+            heapq.heappush(self._feeds, schedule)
+        
+        if not articles:
+            return
+        
+        submitted = self.trading_pipeline.submit_news(articles, self.tickers, arrived, log_idle=False)
+        for ticker in submitted:
+            self._active_tickers[ticker] = now
+        self.logger.info(f"{len(articles)} new articles from {len(schedules)} feeds triggered {len(submitted)} tickers")
+    
+    def _reschedule(self, schedule, new_entries, now):
+        """Adapt a feed's polling interval to how often it publishes."""
+        if new_entries > 0:
+            if schedule.last_new_at is not None:
+                gap = (now - schedule.last_new_at) / new_entries
+                schedule.average_gap = gap if schedule.average_gap is None else 0.7 * schedule.average_gap + 0.3 * gap
+                # Poll several times per expected new article
+                schedule.interval = schedule.average_gap / self.polls_per_article
+            else:
+                schedule.interval = schedule.interval / self.backoff
+            schedule.last_new_at = now
+        elif schedule.average_gap is not None and now - schedule.last_new_at < 2 * schedule.average_gap:
+            # Quiet for less than two usual gaps: a Poisson feed is as likely to publish now as ever
+            schedule.interval = schedule.average_gap / self.polls_per_article
+        else:
+            schedule.interval = schedule.interval * self.backoff
+        
+        schedule.interval = min(self.max_interval, max(self.min_interval, schedule.interval))
+        schedule.next_poll = now + schedule.interval
+    
+    def _refresh_indicators(self):
+        """Queue a bar and indicator refresh in the pipeline for tickers that had news within the active window."""
+        now = self.clock()
+        for ticker in [ticker for ticker, seen in self._active_tickers.items() if now - seen > self.active_window]:
+            del self._active_tickers[ticker]
+        
+        if self._active_tickers:
+            self.trading_pipeline.submit_refresh(list(self._active_tickers))
+
+class _ReplayClock:
+    """Simulated time for replays: sleeping advances the clock at once."""
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+class _ReplayCollector:
+    def __init__(self, clock, arrivals, fetch_seconds, parallel):
+        """
+        Serve recorded publication times as if each feed were fetched at the replay clock's time.
+        
+        Args:
+            arrivals: Dict of feed URL -> sorted publication times in replay seconds
+            fetch_seconds: Simulated duration of one feed request
+            parallel: Feeds fetched at once (the collector's thread pool)
+        """
+        self.clock = clock
+        self.arrivals = arrivals
+        self.fetch_seconds = fetch_seconds
+        self.parallel = parallel
+        self.config_manager = self
+        self.cursor = {url: 0 for url in arrivals}
+        self.last_new_counts = {}
+        self.requests = 0
+    
+    def get_rss_feeds_with_names(self):
+        return [{'name': url, 'url': url} for url in self.arrivals]
+    
+    def collect_rss_data(self, feeds=None):
+        """Get (url, published) for every article published since each feed's previous fetch."""
+        import math
+        feeds = feeds if feeds is not None else self.get_rss_feeds_with_names()
+        self.clock.sleep(math.ceil(len(feeds) / self.parallel) * self.fetch_seconds)
+        now = self.clock()
+        
+        articles = []
+        counts = {}
+        for feed in feeds:
+            url = feed['url']
+            times = self.arrivals[url]
+            start = self.cursor[url]
+            end = bisect.bisect_right(times, now, lo=start)
+            articles.extend((url, published) for published in times[start:end])
+            counts[url] = end - start
+            self.cursor[url] = end
+        self.requests += len(feeds)
+        self.last_new_counts = counts
+        return articles
+    
+    def confirm_processed(self, failed=()):
+        pass
+
+class _ReplayPipeline:
+    """
+    Model the trading pipeline as one server and record when each article's decision is made.
+    
+    A submission waits for the work submitted before it, then takes
+    decision_seconds plus article_seconds per article (sentiment, bars and
+    the decision). Indicator refreshes occupy it for refresh_seconds.
+    """
+    def __init__(self, clock, decision_seconds, article_seconds, refresh_seconds):
+        self.clock = clock
+        self.decision_seconds = decision_seconds
+        self.article_seconds = article_seconds
+        self.refresh_seconds = refresh_seconds
+        self.busy_until = 0.0
+        self.latencies = []  # (feed URL, seconds from publication to decision)
+    
+    def _occupy(self, seconds):
+        """Queue work behind what is already submitted; returns when it is done."""
+        self.busy_until = max(self.clock(), self.busy_until) + seconds
+        return self.busy_until
+    
+    def submit_news(self, articles, tickers, arrived=None, log_idle=True):
+        if not articles:
+            return []
+        decided = self._occupy(self.decision_seconds + self.article_seconds * len(articles))
+        self.latencies.extend((url, decided - published) for url, published in articles)
+        return []
+    
+    def submit_refresh(self, tickers):
+        self._occupy(self.refresh_seconds)
+    
+    def join(self):
+        """Wait (in replay time) until every submission has been decided."""
+        self.clock.now = max(self.clock.now, self.busy_until)
+    
+    def idle(self):
+        return self.clock() >= self.busy_until
+    
+    def take_failed_news(self):
+        return []
+    
+    def log_stats(self):
+        pass
+
+def _synthetic_arrivals(feeds, busy_feeds, horizon, seed):
+    """Poisson publication times: busy feeds publish every 2-5 minutes, the others every 30-120 minutes."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    arrivals = {}
+    for index in range(feeds):
+        mean_gap = rng.uniform(120, 300) if index < busy_feeds else rng.uniform(1800, 7200)
+        gaps = rng.exponential(mean_gap, size=int(horizon / mean_gap * 2) + 10)
+        times = np.cumsum(gaps)
+        arrivals[f"https://feed{index}.example.com/rss"] = times[times < horizon].tolist()
+    return arrivals
+
+def _recorded_arrivals(path):
+    """Publication times per source from a recorded news archive, in seconds from the first article."""
+    from components.backtester import load_news_archive
+    news_df = load_news_archive(path)
+    seconds = (news_df['published_at'] - news_df['published_at'].iloc[0]).dt.total_seconds()
+    sources = news_df['source'] if 'source' in news_df.columns else ['recorded'] * len(news_df)
+    arrivals = {}
+    for source, published in zip(sources, seconds):
+        arrivals.setdefault(str(source), []).append(float(published))
+    return {source: sorted(times) for source, times in arrivals.items()}
+
+def _replay(mode, arrivals, horizon, fetch_seconds, parallel, check_interval, event_config, costs):
+    """
+    Replay arrivals through the fixed loop or the scheduler.
+    
+    Both run past the horizon until every article published before it has
+    been decided, so neither mode is credited for articles it never fetched.
+    
+    Returns:
+        (latencies, feed requests)
+    """
+    clock = _ReplayClock()
+    collector = _ReplayCollector(clock, arrivals, fetch_seconds, parallel)
+    pipeline = _ReplayPipeline(clock, *costs)
+    total = sum(len(times) for times in arrivals.values())
+    
+    def pending():
+        return len(pipeline.latencies) < total
+    
+    if mode == 'fixed':
+        # The interval loop in main.py: sweep every feed, wait for the cycle's decisions, then wait check_interval
+        while clock() < horizon or pending():
+            pipeline.submit_news(collector.collect_rss_data(), [])
+            pipeline.join()
+            clock.sleep(check_interval)
+    else:
+        scheduler = EventScheduler(collector, pipeline, None, [], [], event_config, check_interval=check_interval,
+                                   clock=clock, sleep=clock.sleep)
+        scheduler.run(lambda: clock() < horizon or pending())
+    return pipeline.latencies, collector.requests
+
+def main():
+    """Replay news arrivals through the fixed interval loop and the event scheduler and compare news-to-decision latency."""
+    import argparse
+    import numpy as np
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Compare news-to-decision latency of the fixed loop and the event scheduler")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--news', help="Recorded articles (.csv, .jsonl or .parquet); synthetic feeds by default")
+    parser.add_argument('--feeds', type=int, default=50, help="Synthetic feeds")
+    parser.add_argument('--busy-feeds', type=int, default=10, help="Synthetic feeds that publish every few minutes")
+    parser.add_argument('--hours', type=float, default=6.5, help="Synthetic replay length")
+    parser.add_argument('--fetch-seconds', type=float, default=0.8, help="Simulated duration of one feed request")
+    parser.add_argument('--parallel', type=int, default=5, help="Feeds fetched at once")
+    parser.add_argument('--decision-seconds', type=float, default=1.0,
+                        help="Simulated pipeline time per submission (sentiment, bars, decision)")
+    parser.add_argument('--article-seconds', type=float, default=0.02, help="Simulated pipeline time per article")
+    parser.add_argument('--refresh-seconds', type=float, default=0.5, help="Simulated time of one indicator refresh")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    config = ConfigManager(args.config)
+    event_config = config.get_event_config()
+    if args.news:
+        arrivals = _recorded_arrivals(args.news)
+        horizon = max(times[-1] for times in arrivals.values())
+    else:
+        horizon = args.hours * 3600
+        arrivals = _synthetic_arrivals(args.feeds, args.busy_feeds, horizon, args.seed)
+    total = sum(len(times) for times in arrivals.values())
+    print(f"{total} articles from {len(arrivals)} feeds over {horizon / 3600:.1f}h")
+    
+    # Feeds publishing more than every 10 minutes on average are busy, the rest quiet
+    busy = {url for url, times in arrivals.items() if len(times) > horizon / 600}
+    
+    print(f"{'mode':>6} {'feeds':>6} {'requests':>9} {'seen':>6} {'mean s':>8} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+    for mode in ('fixed', 'event'):
+        latencies, requests = _replay(mode, arrivals, horizon, args.fetch_seconds, args.parallel,
+                                      config.schedule.check_interval, event_config,
+                                      (args.decision_seconds, args.article_seconds, args.refresh_seconds))
+        groups = (('all', latencies), ('busy', [entry for entry in latencies if entry[0] in busy]),
+                  ('quiet', [entry for entry in latencies if entry[0] not in busy]))
+        for label, group in groups:
+            if not group:
+                continue
+            seconds = np.asarray([latency for _, latency in group])
+            print(f"{mode:>6} {label:>6} {requests if label == 'all' else '':>9} {len(seconds):>6} "
+                  f"{seconds.mean():>8.1f} {np.percentile(seconds, 50):>7.1f} {np.percentile(seconds, 95):>7.1f} "
+                  f"{seconds.max():>7.1f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
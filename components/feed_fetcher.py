@@ -0,0 +1,222 @@
+# components/feed_fetcher.py
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+class AsyncFeedFetcher:
+    def __init__(self, timeout=10, max_connections=20, per_host_limit=2, parse_workers=2):
+        """
+        Initialize the asyncio RSS fetcher.
+        
+        Requests run on a private event loop in a background thread with one
+        aiohttp session, so connections are pooled and kept alive across
+        cycles. Timed out requests are cancelled rather than left running, and
+        feedparser runs on a small thread pool so parsing does not block I/O.
+        
+        Args:
+            timeout: Seconds allowed for each feed download
+            max_connections: Size of the shared connection pool
+            per_host_limit: Maximum concurrent requests to one host
+            parse_workers: Threads used to parse downloaded feeds
+        
+        Raises:
+            ImportError: If aiohttp is not installed
+        """
+        import aiohttp  # Optional dependency, only needed for this engine
+        self._aiohttp = aiohttp
+        self.logger = logging.getLogger('AsyncFeedFetcher')
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self._session = None
+        self._host_limits = {}
+        self._parse_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=parse_workers, thread_name_prefix='FeedParser'
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='AsyncFeedFetcher', daemon=True)
+        self._thread.start()
+    
+    def fetch_all(self, requests):
+        """
+        Download and parse feeds concurrently.
+        
+        Args:
+            requests: List of (url, etag, modified) tuples; etag/modified may be None
+        
+        Returns:
+            List of result dicts in request order. Each has either 'feed'
+            (the parsed feed) with 'etag' and 'modified', 'not_modified',
+            or 'error' (with 'timed_out' set when the timeout was hit).
+        """
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(requests), self._loop)
+        return future.result()
+    
+    def close(self):
+        """Close the connection pool and stop the event loop."""
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._parse_pool.shutdown(wait=False)
+    
+    async def _fetch_all(self, requests):
+        """Fetch every request on the event loop."""
+        import feedparser
+        
+        if self._session is None or self._session.closed:
+            connector = self._aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = self._aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': feedparser.USER_AGENT}
+            )
+        return await asyncio.gather(*(self._fetch_one(url, etag, modified) for url, etag, modified in requests))
+    
+    async def _fetch_one(self, url, etag, modified):
+        """Fetch and parse a single feed, never raising; the outcome includes the seconds it took."""
+        started = time.perf_counter()
+        outcome = await self._fetch_and_parse(url, etag, modified)
+        outcome['elapsed'] = time.perf_counter() - started
+        return outcome
+    
+    async def _fetch_and_parse(self, url, etag, modified):
+        """Fetch and parse a single feed, returning an outcome dict."""
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        
+        try:
+            # The timeout starts once a per-host slot is free, so queued feeds are not penalised
+            async with self._host_limits[host]:
+                response = await asyncio.wait_for(self._download(url, etag, modified), self.timeout)
+        except asyncio.TimeoutError:
+            return {'error': f"timed out after {self.timeout} seconds", 'timed_out': True}
+        except Exception as e:
+            return {'error': str(e)}
+        
+        if response.get('body') is None:
+            return response
+        
+        try:
+            import feedparser
+            loop = asyncio.get_running_loop()
+            feed = await loop.run_in_executor(self._parse_pool, feedparser.parse, response.pop('body'))
+        except Exception as e:
+            return {'error': str(e)}
+        
+        response['feed'] = feed
+        return response
+    
+    async def _download(self, url, etag, modified):
+        """Issue a conditional GET for a feed."""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
+        
+        async with self._session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return {'not_modified': True}
+            if response.status != 200:
+                return {'error': f"Feed returned status code {response.status}"}
+            return {
+                'body': await response.read(),
+                'etag': response.headers.get('ETag'),
+                'modified': response.headers.get('Last-Modified')
+            }
+
+def main():
+    """Benchmark the threaded and asyncio feed engines against local mock feed servers with latency."""
+    import argparse
+    import os
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import yaml
+    from components.config_manager import ConfigManager
+    from components.data_collector import RSSDataCollector
+    
+    parser = argparse.ArgumentParser(description="Compare threaded and async RSS ingestion")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--feeds', type=int, nargs='+', default=[10, 40, 100])
+    parser.add_argument('--hosts', type=int, default=20, help="Mock servers the feeds are spread over")
+    parser.add_argument('--latency', type=float, default=0.3, help="Seconds each request waits before answering")
+    parser.add_argument('--items', type=int, default=20, help="Entries per feed")
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    
+    class MockFeed(BaseHTTPRequestHandler):
+        """Answer every path with its own RSS feed after a fixed delay."""
+        def do_GET(self):
+            time.sleep(args.latency)
+            items = ''.join(
+                f"<item><guid>{self.path}-{index}</guid><title>Feed {self.path} story {index}</title>"
+                f"<description>Body of story {index} from {self.path}.</description></item>"
+                for index in range(args.items)
+            )
+            body = f"<?xml version='1.0'?><rss version='2.0'><channel><title>{self.path}</title>{items}</channel></rss>"
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+        
+        def log_message(self, format, *args):
+            pass
+    
+    servers = []
+    for _ in range(args.hosts):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), MockFeed)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    
+    with open(args.config) as file:
+        settings = yaml.safe_load(file)
+    settings['data_sources']['incremental'] = {'enabled': False}
+    # Mock stories look alike; keep every entry so both engines store the same articles
+    settings['data_sources']['dedup'] = {'enabled': False}
+    
+    print(f"{args.latency * 1000:.0f}ms per request, {args.items} entries per feed, {args.hosts} hosts")
+    print(f"{'feeds':>6} {'engine':>8} {'s/round':>9} {'feeds/s':>9} {'articles':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yaml')
+            for feed_count in args.feeds:
+                settings['data_sources']['rss_feeds'] = [
+                    {'name': f"Mock {index}",
+                     'url': f"http://127.0.0.1:{servers[index % len(servers)].server_address[1]}/feed{index}.xml"}
+                    for index in range(feed_count)
+                ]
+                for engine in ('threads', 'async'):
+                    settings['data_sources']['ingestion'] = dict(
+                        settings['data_sources'].get('ingestion') or {}, engine=engine
+                    )
+                    with open(path, 'w') as file:
+                        yaml.safe_dump(settings, file)
+                    data_collector = RSSDataCollector(ConfigManager(path))
+                    if engine == 'async' and data_collector.async_fetcher is None:
+                        print(f"{feed_count:>6} {engine:>8}  aiohttp is not installed")
+                        continue
+                    
+                    timings = []
+                    for _ in range(args.rounds):
+                        started = time.perf_counter()
+                        articles = data_collector.collect_rss_data()
+                        timings.append(time.perf_counter() - started)
+                    if data_collector.async_fetcher is not None:
+                        data_collector.async_fetcher.close()
+                    
+                    seconds = min(timings)
+                    print(f"{feed_count:>6} {engine:>8} {seconds:>9.2f} {feed_count / seconds:>9.1f} {len(articles):>9}")
+    finally:
+        for server in servers:
+            server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,142 @@
+# components/feed_state.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+class FeedStateStore:
+    def __init__(self, path="./data/feed_state.db", seen_retention_days=7):
+        """
+        Initialize the persistent RSS feed state store.
+        
+        Holds the ETag / Last-Modified validators of every feed and the IDs of
+        entries that have already been returned, so conditional GETs and
+        cross-cycle (and cross-restart) deduplication survive a restart.
+        Claimed entries stay pending until confirm_entries() is called once
+        they have been processed; claims still pending at startup (the
+        process died in between) are released so their entries are fetched
+        again.
+        
+        Args:
+            path: SQLite file used for persistence, or None for memory only
+            seen_retention_days: How long to remember an entry ID
+        """
+        self.logger = logging.getLogger('FeedStateStore')
+        self.path = path or ":memory:"
+        self.seen_retention_seconds = seen_retention_days * 86400
+        self._lock = threading.Lock()
+        
+        if self.path != ":memory:":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "url TEXT PRIMARY KEY, etag TEXT, modified TEXT, updated_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS seen_entries ("
+            "entry_id TEXT PRIMARY KEY, feed_url TEXT NOT NULL, seen_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(seen_entries)")]
+        if 'processed' not in columns:
+            # Entries recorded before claims were confirmed count as processed
+            self._connection.execute(
+                "ALTER TABLE seen_entries ADD COLUMN processed INTEGER NOT NULL DEFAULT 1"
+            )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS seen_entries_seen_at ON seen_entries (seen_at)"
+        )
+        self._connection.commit()
+        self.prune()
+        self.release_unprocessed()
+    
+    def get_validators(self, url):
+        """Get the (etag, modified) pair last returned by a feed."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, modified FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        return row if row is not None else (None, None)
+    
+    def set_validators(self, url, etag, modified):
+        """Remember the validators returned by a feed."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, modified, updated_at) VALUES (?, ?, ?, ?)",
+                (url, etag, modified, time.time())
+            )
+            self._connection.commit()
+    
+    def claim_new_entries(self, url, entry_ids):
+        """
+        Mark entry IDs as seen and return the ones that were not seen before.
+        
+        The check and the insert happen under one lock, so the same story
+        arriving from two feeds at once is only claimed by one of them. The
+        claims stay pending until confirm_entries() is called for them.
+        """
+        now = time.time()
+        new_ids = set()
+        with self._lock:
+            for entry_id in entry_ids:
+                if entry_id in new_ids:
+                    continue
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO seen_entries (entry_id, feed_url, seen_at, processed) VALUES (?, ?, ?, 0)",
+                    (entry_id, url, now)
+                )
+                if cursor.rowcount > 0:
+                    new_ids.add(entry_id)
+            self._connection.commit()
+        return new_ids
+    
+    def confirm_entries(self, entry_ids):
+        """Mark claimed entries as processed, so they are not fetched again after a restart."""
+        with self._lock:
+            self._connection.executemany(
+                "UPDATE seen_entries SET processed = 1 WHERE entry_id = ?",
+                [(entry_id,) for entry_id in entry_ids]
+            )
+            self._connection.commit()
+    
+    def release_unprocessed(self):
+        """
+        Forget claims that were never confirmed, so the next fetch returns their entries again.
+        
+        The validators of their feeds are dropped as well, otherwise the feed
+        would answer 304 Not Modified and the entries would never come back.
+        
+        Returns:
+            Number of released entries
+        """
+        with self._lock:
+            feeds = [row[0] for row in self._connection.execute(
+                "SELECT DISTINCT feed_url FROM seen_entries WHERE processed = 0"
+            )]
+            cursor = self._connection.execute("DELETE FROM seen_entries WHERE processed = 0")
+            self._connection.executemany("DELETE FROM feeds WHERE url = ?", [(url,) for url in feeds])
+            self._connection.commit()
+        if cursor.rowcount > 0:
+            self.logger.warning(f"Released {cursor.rowcount} entries from {len(feeds)} feeds "
+                                f"that were claimed but never processed")
+        return cursor.rowcount
+    
+    def prune(self):
+        """Forget entry IDs older than the retention period."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM seen_entries WHERE seen_at < ?",
+                (time.time() - self.seen_retention_seconds,)
+            )
+            self._connection.commit()
+        if cursor.rowcount > 0:
+            self.logger.info(f"Pruned {cursor.rowcount} old entries from feed state")
+    
+    def close(self):
+        """Close the persistent store."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,388 @@
+# components/indicators.py
+import functools
+from collections import deque
+import numpy as np
+
+# Rows of an OHLCV block, in the order BarStore keeps them
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# RSI's Wilder smoothing and MACD's EMAs are linear filters, so the last value of
+# each is a dot product of the closes with a weight vector that depends only on
+# the parameters and the number of bars. The weights are computed once and
+# cached, which turns a whole (tickers x bars) batch into a single matmul.
+
+@functools.lru_cache(maxsize=128)
+def _ema_weights(length, span):
+    """Weights of the last value of an adjust=False EMA over `length` values."""
+    alpha = 2.0 / (span + 1)
+    weights = alpha * (1 - alpha) ** np.arange(length - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (length - 1)
+    weights.setflags(write=False)
+    return weights
+
+@functools.lru_cache(maxsize=128)
+def _macd_signal_weights(length, fast_period, slow_period, signal_period):
+    """Weights of the last MACD signal line value over `length` closes."""
+    fast_alpha = 2.0 / (fast_period + 1)
+    slow_alpha = 2.0 / (slow_period + 1)
+    signal_alpha = 2.0 / (signal_period + 1)
+    fast = np.zeros(length)
+    slow = np.zeros(length)
+    fast[0] = slow[0] = 1.0
+    signal = fast - slow
+    
+    # Run the EMA recursions on weight vectors instead of prices
+    for t in range(1, length):
+        fast *= 1 - fast_alpha
+        fast[t] += fast_alpha
+        slow *= 1 - slow_alpha
+        slow[t] += slow_alpha
+        signal = (1 - signal_alpha) * signal + signal_alpha * (fast - slow)
+    
+    signal.setflags(write=False)
+    return signal
+
+@functools.lru_cache(maxsize=128)
+def _rsi_weights(length, period):
+    """Weights over the `length - 1` price changes giving the final Wilder average gain/loss."""
+    decay = (period - 1) / period
+    updates = length - period
+    weights = np.zeros(length - 1)
+    
+    # Seed average over the first period + 1 changes (as in TechnicalAnalyzer.calculate_rsi)
+    weights[:period + 1] = decay ** updates / period
+    # One Wilder update per bar from index `period` onwards
+    weights[period - 1:] += decay ** np.arange(updates - 1, -1, -1, dtype=np.float64) / period
+    
+    weights.setflags(write=False)
+    return weights
+
+@functools.lru_cache(maxsize=128)
+def _wilder_weights(length, period):
+    """Weights of the last Wilder average over `length` values, seeded with the mean of the first `period`."""
+    decay = (period - 1) / period
+    updates = length - period
+    weights = np.empty(length)
+    weights[:period] = decay ** updates / period
+    weights[period:] = decay ** np.arange(updates - 1, -1, -1, dtype=np.float64) / period
+    weights.setflags(write=False)
+    return weights
+
+def _true_range(high, low, close):
+    """True range of every bar after the first, for (tickers x bars) arrays."""
+    previous = close[..., :-1]
+    return np.maximum(high[..., 1:] - low[..., 1:],
+                      np.maximum(np.abs(high[..., 1:] - previous), np.abs(low[..., 1:] - previous)))
+
+def _rsi_from_averages(up, down):
+    """Convert average gain/loss to RSI, treating zero average loss as RSI 100."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.where(down != 0, up / np.where(down != 0, down, 1), np.inf)
+    return 100. - 100. / (1. + rs)
+
+class Indicator:
+    """
+    Base class for indicators listed in `indicators_config`.
+    
+    `columns` names the OHLCV rows an indicator reads; `batch` and `stream`
+    get one array per column, in that order, and stream states get one value
+    per column on every update.
+    """
+    type = None
+    columns = ('close',)
+    
+    def __init__(self, spec):
+        self.spec = spec
+    
+    def min_bars(self):
+        """Minimum number of bars needed to compute the indicator."""
+        raise NotImplementedError
+    
+    def batch(self, *columns):
+        """Compute the latest value for every row of (tickers x bars) column arrays."""
+        raise NotImplementedError
+    
+    def stream(self, *columns):
+        """Create a streaming state seeded with historical 1D column arrays."""
+        raise NotImplementedError
+    
+    def format(self, values, row):
+        """Build the result dict for one ticker from `batch` output."""
+        return {name: column[row] for name, column in values.items()}
+
+class RSIIndicator(Indicator):
+    type = 'RSI'
+    
+    def min_bars(self):
+        return self.spec['period'] + 1
+    
+    def batch(self, closes):
+        deltas = np.diff(closes, axis=1)
+        weights = _rsi_weights(closes.shape[1], self.spec['period'])
+        up = np.where(deltas > 0, deltas, 0.) @ weights
+        down = np.where(deltas < 0, -deltas, 0.) @ weights
+        return {'value': _rsi_from_averages(up, down)}
+    
+    def stream(self, closes):
+        return RSIStream(self.spec, closes)
+    
+    def format(self, values, row):
+        return {
+            'value': values['value'][row],
+            'overbought': self.spec['overbought'],
+            'oversold': self.spec['oversold']
+        }
+
+class MACDIndicator(Indicator):
+    type = 'MACD'
+    
+    def min_bars(self):
+        return self.spec['slow_period'] + self.spec['signal_period']
+    
+    def batch(self, closes):
+        length = closes.shape[1]
+        fast, slow, signal = self.spec['fast_period'], self.spec['slow_period'], self.spec['signal_period']
+        macd_line = closes @ (_ema_weights(length, fast) - _ema_weights(length, slow))
+        signal_line = closes @ _macd_signal_weights(length, fast, slow, signal)
+        return {
+            'macd_line': macd_line,
+            'signal_line': signal_line,
+            'histogram': macd_line - signal_line
+        }
+    
+    def stream(self, closes):
+        return MACDStream(self.spec, closes)
+
+class BollingerIndicator(Indicator):
+    type = 'BOLLINGER'
+    
+    def min_bars(self):
+        return self.spec.get('period', 20)
+    
+    def batch(self, closes):
+        window = closes[:, -self.min_bars():]
+        middle = window.mean(axis=1)
+        width = self.spec.get('num_std', 2) * window.std(axis=1)
+        return {'middle': middle, 'upper': middle + width, 'lower': middle - width}
+    
+    def stream(self, closes):
+        return BollingerStream(self.spec, closes)
+
+class ATRIndicator(Indicator):
+    type = 'ATR'
+    columns = ('high', 'low', 'close')
+    
+    def min_bars(self):
+        return self.spec.get('period', 14) + 1
+    
+    def batch(self, high, low, close):
+        true_range = _true_range(high, low, close)
+        return {'value': true_range @ _wilder_weights(true_range.shape[1], self.spec.get('period', 14))}
+    
+    def stream(self, high, low, close):
+        return ATRStream(self.spec, high, low, close)
+
+INDICATORS = {}
+
+def register_indicator(indicator_class):
+    """Make an Indicator subclass available to `indicators_config` under its `type`."""
+    INDICATORS[indicator_class.type] = indicator_class
+    return indicator_class
+
+for _indicator_class in (RSIIndicator, MACDIndicator, BollingerIndicator, ATRIndicator):
+    register_indicator(_indicator_class)
+
+class RSIStream:
+    def __init__(self, spec, closes):
+        """Seed Wilder averages from history; later bars update them in O(1)."""
+        self.period = spec['period']
+        closes = np.asarray(closes, dtype=np.float64).ravel()
+        deltas = np.diff(closes)
+        weights = _rsi_weights(len(closes), self.period)
+        self.up = float(np.where(deltas > 0, deltas, 0.) @ weights)
+        self.down = float(np.where(deltas < 0, -deltas, 0.) @ weights)
+        self.last_close = float(closes[-1])
+        self._previous = None
+    
+    def update(self, close, new_bar=True):
+        """Apply a close; with new_bar=False it replaces the most recent bar instead."""
+        if not new_bar and self._previous is not None:
+            self.up, self.down, self.last_close = self._previous
+        self._previous = (self.up, self.down, self.last_close)
+        
+        delta = close - self.last_close
+        self.up = (self.up * (self.period - 1) + (delta if delta > 0 else 0.)) / self.period
+        self.down = (self.down * (self.period - 1) + (-delta if delta <= 0 else 0.)) / self.period
+        self.last_close = close
+        return self.value()
+    
+    def value(self):
+        return {'value': float(_rsi_from_averages(np.float64(self.up), np.float64(self.down)))}
+
+class MACDStream:
+    def __init__(self, spec, closes):
+        """Seed the three EMAs from history; later bars update them in O(1)."""
+        self.fast_alpha = 2.0 / (spec['fast_period'] + 1)
+        self.slow_alpha = 2.0 / (spec['slow_period'] + 1)
+        self.signal_alpha = 2.0 / (spec['signal_period'] + 1)
+        closes = np.asarray(closes, dtype=np.float64).ravel()
+        length = len(closes)
+        self.fast = float(closes @ _ema_weights(length, spec['fast_period']))
+        self.slow = float(closes @ _ema_weights(length, spec['slow_period']))
+        self.signal = float(closes @ _macd_signal_weights(
+            length, spec['fast_period'], spec['slow_period'], spec['signal_period']
+        ))
+        self._previous = None
+    
+    def update(self, close, new_bar=True):
+        """Apply a close; with new_bar=False it replaces the most recent bar instead."""
+        if not new_bar and self._previous is not None:
+            self.fast, self.slow, self.signal = self._previous
+        self._previous = (self.fast, self.slow, self.signal)
+        
+        self.fast += self.fast_alpha * (close - self.fast)
+        self.slow += self.slow_alpha * (close - self.slow)
+        self.signal += self.signal_alpha * ((self.fast - self.slow) - self.signal)
+        return self.value()
+    
+    def value(self):
+        macd_line = self.fast - self.slow
+        return {
+            'macd_line': macd_line,
+            'signal_line': self.signal,
+            'histogram': macd_line - self.signal
+        }
+
+class BollingerStream:
+    def __init__(self, spec, closes):
+        """Keep the last `period` closes; each update is O(period) with a small fixed period."""
+        self.num_std = spec.get('num_std', 2)
+        self.window = deque(np.asarray(closes, dtype=np.float64).ravel()[-spec.get('period', 20):],
+                            maxlen=spec.get('period', 20))
+    
+    def update(self, close, new_bar=True):
+        """Apply a close; with new_bar=False it replaces the most recent bar instead."""
+        if not new_bar and self.window:
+            self.window.pop()
+        self.window.append(close)
+        return self.value()
+    
+    def value(self):
+        window = np.fromiter(self.window, dtype=np.float64)
+        middle = window.mean()
+        width = self.num_std * window.std()
+        return {'middle': middle, 'upper': middle + width, 'lower': middle - width}
+
+class ATRStream:
+    def __init__(self, spec, high, low, close):
+        """Seed the Wilder average true range from history; later bars update it in O(1)."""
+        self.period = spec.get('period', 14)
+        close = np.asarray(close, dtype=np.float64).ravel()
+        true_range = _true_range(np.asarray(high, dtype=np.float64).ravel(),
+                                 np.asarray(low, dtype=np.float64).ravel(), close)
+        self.atr = float(true_range @ _wilder_weights(len(true_range), self.period))
+        self.last_close = float(close[-1])
+        self._previous = None
+    
+    def update(self, high, low, close, new_bar=True):
+        """Apply a bar; with new_bar=False it replaces the most recent bar instead."""
+        if not new_bar and self._previous is not None:
+            self.atr, self.last_close = self._previous
+        self._previous = (self.atr, self.last_close)
+        
+        true_range = max(high - low, abs(high - self.last_close), abs(low - self.last_close))
+        self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+        self.last_close = close
+        return self.value()
+    
+    def value(self):
+        return {'value': self.atr}
+
+class IndicatorEngine:
+    def __init__(self, indicators_config):
+        """
+        Initialize the indicator engine from the `indicators_config` list.
+        
+        Entries whose `type` is not registered are ignored, matching how
+        TechnicalAnalyzer skips unknown indicator types.
+        """
+        self.indicators = [INDICATORS[spec['type']](spec) for spec in indicators_config if spec['type'] in INDICATORS]
+    
+    def min_bars(self):
+        """Minimum number of bars needed for every configured indicator."""
+        return max([indicator.min_bars() for indicator in self.indicators], default=0)
+    
+    def compute_batch(self, ohlcv):
+        """
+        Compute every indicator for a batch of tickers in one call.
+        
+        Each indicator is given only the OHLCV rows it reads. Tickers must be
+        aligned to the same number of bars. Indicators needing more bars than
+        are available are left out of the results.
+        
+        Args:
+            ohlcv: (tickers x 5 x bars) array, or one ticker's (5 x bars)
+                block, with rows in COLUMNS order as BarStore.get_bars returns them
+        
+        Returns:
+            List with one results dict per ticker, in the TechnicalAnalyzer format
+        """
+        ohlcv = _as_ohlcv(ohlcv)
+        if ohlcv.ndim == 2:
+            ohlcv = ohlcv[np.newaxis]
+        
+        results = [{} for _ in range(ohlcv.shape[0])]
+        for indicator in self.indicators:
+            if ohlcv.shape[2] < indicator.min_bars():
+                continue
+            values = indicator.batch(*(ohlcv[:, COLUMNS.index(column)] for column in indicator.columns))
+            for row, result in enumerate(results):
+                result[indicator.type] = indicator.format(values, row)
+        return results
+    
+    def compute(self, ohlcv):
+        """Compute every indicator for one ticker's (5 x bars) OHLCV block."""
+        return self.compute_batch(_as_ohlcv(ohlcv)[np.newaxis])[0]
+    
+    def create_stream(self, ohlcv):
+        """Create a streaming state for one ticker seeded with its historical (5 x bars) OHLCV block."""
+        return IndicatorStream(self, _as_ohlcv(ohlcv))
+
+def _as_ohlcv(ohlcv):
+    """Get an OHLCV block (or a batch of them) as float64, checking it has one row per column."""
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    if ohlcv.ndim not in (2, 3) or ohlcv.shape[-2] != len(COLUMNS):
+        raise ValueError(f"Expected OHLCV rows {COLUMNS}, got an array of shape {ohlcv.shape}")
+    return ohlcv
+
+class IndicatorStream:
+    def __init__(self, engine, ohlcv):
+        """
+        Hold per-indicator streaming state for one ticker.
+        
+        Seeded values match `IndicatorEngine.compute` on the same OHLCV
+        block, and each update matches recomputing with the new bar appended
+        (or, with new_bar=False, with the last bar replaced).
+        """
+        self.indicators = [indicator for indicator in engine.indicators if ohlcv.shape[1] >= indicator.min_bars()]
+        self.rows = [tuple(COLUMNS.index(column) for column in indicator.columns) for indicator in self.indicators]
+        self.states = [indicator.stream(*(ohlcv[row] for row in rows))
+                       for indicator, rows in zip(self.indicators, self.rows)]
+    
+    def update(self, bar, new_bar=True):
+        """Apply a new bar (open, high, low, close, volume) and return the updated results dict."""
+        results = {}
+        for indicator, rows, state in zip(self.indicators, self.rows, self.states):
+            values = state.update(*(float(bar[row]) for row in rows), new_bar=new_bar)
+            results[indicator.type] = self._format(indicator, values)
+        return results
+    
+    def values(self):
+        """Get the current results dict without applying a close."""
+        return {indicator.type: self._format(indicator, state.value())
+                for indicator, state in zip(self.indicators, self.states)}
+    
+    @staticmethod
+    def _format(indicator, values):
+        """Shape scalar stream values like batch results."""
+        return indicator.format({name: [value] for name, value in values.items()}, 0)
@@ -0,0 +1,383 @@
+# components/inference_backends.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import torch
+
+BACKENDS = ('torch', 'torch-int8', 'onnxruntime')
+
+# Headlines scored by the fp32 model and a converted backend to check they agree
+PARITY_TEXTS = (
+    "Shares surge after record quarterly revenue", "Company cuts full-year guidance amid weak demand",
+    "Regulators open probe into accounting practices", "Board approves dividend increase and buyback",
+    "Stock little changed ahead of the earnings call", "Supplier warns of chip shortages into next year",
+    "Profit beats analyst estimates on strong cloud sales", "Retailer shuts 200 stores as sales slump",
+    "Bank raises price target citing margin expansion", "Chief executive resigns after internal investigation",
+    "Merger talks collapse over valuation dispute", "Company completes acquisition of rival on schedule",
+    "Quarterly results in line with expectations", "Credit rating cut to junk on rising debt",
+    "New product launch draws record preorders", "Factory fire halts production for several weeks",
+    "Shares slide as drug trial misses its main goal", "Firm wins multi-year government contract",
+    "Annual shareholder meeting set for May", "Lawsuit settlement removes overhang on the stock"
+)
+PARITY_FILE = 'parity.json'
+
+class BackendParityError(ValueError):
+    """A converted backend disagrees with the fp32 model by more than the configured tolerance."""
+
+class TorchBackend:
+    name = 'torch'
+    
+    def __init__(self, model, use_gpu=False):
+        """Run the fp32 PyTorch model as loaded."""
+        self.model = model
+        self.device = 'cuda' if use_gpu else 'cpu'
+    
+    def __call__(self, inputs):
+        """Get logits (a torch tensor) for a batch of tokenizer outputs."""
+        inputs = {key: value.to(self.device) for key, value in inputs.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+def check_parity(reference, candidate, tokenizer, texts=PARITY_TEXTS):
+    """
+    Score the same texts with the fp32 backend and a converted one.
+    
+    Returns:
+        (label agreement, largest absolute difference of any class probability)
+    """
+    inputs = tokenizer(list(texts), return_tensors="pt", padding=True, truncation=True)
+    expected = torch.softmax(reference(inputs).float(), dim=1)
+    actual = torch.softmax(candidate(inputs).float(), dim=1)
+    agreement = (expected.argmax(dim=1) == actual.argmax(dim=1)).float().mean().item()
+    drift = (expected - actual).abs().max().item()
+    return agreement, drift
+
+def require_parity(name, agreement, drift, parity_config):
+    """Raise BackendParityError unless a backend is within model.sentiment_analysis.parity of fp32 torch."""
+    min_agreement = parity_config.get('min_label_agreement', 0.95)
+    max_drift = parity_config.get('max_confidence_drift', 0.1)
+    if agreement < min_agreement or drift > max_drift:
+        raise BackendParityError(f"{name}: label agreement {agreement:.1%} (minimum {min_agreement:.1%}), "
+                                 f"confidence drift {drift:.4f} (maximum {max_drift})")
+
+def _read_parity(artifact_dir):
+    """Get the (agreement, drift) recorded with converted artifacts, or None if there is no valid record."""
+    try:
+        with open(os.path.join(artifact_dir, PARITY_FILE)) as handle:
+            report = json.load(handle)
+        return float(report['agreement']), float(report['drift'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _finish_artifacts(artifact_dir, agreement, drift):
+    """Record the parity of newly converted artifacts, then remove those converted from other model versions."""
+    temp_file = os.path.join(artifact_dir, f"{PARITY_FILE}.tmp")
+    with open(temp_file, 'w') as handle:
+        json.dump({'agreement': agreement, 'drift': drift}, handle)
+    os.replace(temp_file, os.path.join(artifact_dir, PARITY_FILE))
+    
+    parent, current = os.path.split(artifact_dir)
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if name != current and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+class TorchInt8Backend(TorchBackend):
+    name = 'torch-int8'
+    
+    def __init__(self, load_model, build_model, tokenizer, artifact_dir, parity_config):
+        """
+        Run the model with int8 dynamically quantized Linear layers on CPU.
+        
+        The quantized weights are saved as a state dict under artifact_dir
+        (None to not save them), with their parity against the fp32 model.
+        Later starts quantize the bare architecture from build_model and load
+        the saved weights into it, without loading the fp32 weights at all.
+        
+        Raises:
+            BackendParityError: If the quantized model strays too far from the fp32 one
+        """
+        logger = logging.getLogger('InferenceBackend')
+        weights_file = os.path.join(artifact_dir, 'model.int8.pt') if artifact_dir is not None else None
+        quantized = None
+        parity = _read_parity(artifact_dir) if weights_file and os.path.exists(weights_file) else None
+        
+        if parity is not None:
+            try:
+                quantized = self._quantize(build_model())
+                self._load_weights(quantized, torch.load(weights_file, weights_only=True))
+                logger.info(f"Loaded int8 weights from {weights_file}")
+            except Exception as e:
+                # Typically saved by another torch/transformers version
+                logger.warning(f"Could not load {weights_file}, quantizing again: {e}")
+                quantized = None
+        
+        converted = quantized is None
+        if converted:
+            model = load_model().cpu().eval()
+            quantized = self._quantize(model)
+            parity = check_parity(TorchBackend(model), TorchBackend(quantized.eval()), tokenizer)
+        require_parity(self.name, *parity, parity_config)
+        
+        if converted and weights_file is not None:
+            os.makedirs(artifact_dir, exist_ok=True)
+            temp_file = f"{weights_file}.tmp"
+            torch.save(self._plain_weights(quantized), temp_file)
+            os.replace(temp_file, weights_file)
+            _finish_artifacts(artifact_dir, *parity)
+            logger.info(f"Saved int8 weights to {weights_file}")
+        
+        super().__init__(quantized.eval())
+    
+    @staticmethod
+    def _quantize(model):
+        """Quantize a model's Linear layers to int8 (a copy; the model passed in is unchanged)."""
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    
+    @staticmethod
+    def _quantized_linears(model):
+        """Get the dynamically quantized Linear layers of a model by name."""
+        return {name: module for name, module in model.named_modules()
+                if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)}
+    
+    @classmethod
+    def _plain_weights(cls, quantized):
+        """
+        Get a quantized model's weights as plain tensors.
+        
+        Packed int8 weights are stored as their integer values, scale and
+        zero point, so the file holds nothing but tensors and loads with
+        weights_only (quantized tensors would pickle their qscheme as a global).
+        """
+        weights = {key: value for key, value in quantized.state_dict().items()
+                   if isinstance(value, torch.Tensor) and not value.is_quantized}
+        for name, module in cls._quantized_linears(quantized).items():
+            weight, bias = module._weight_bias()
+            weights[f"{name}.int8_weight"] = weight.int_repr()
+            weights[f"{name}.int8_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+            weights[f"{name}.int8_zero_point"] = torch.tensor(weight.q_zero_point(), dtype=torch.int64)
+            if bias is not None:
+                weights[f"{name}.int8_bias"] = bias.detach()
+        return weights
+    
+    @classmethod
+    def _load_weights(cls, quantized, weights):
+        """Load weights saved by _plain_weights into a freshly quantized model of the same architecture."""
+        weights = dict(weights)
+        for name, module in cls._quantized_linears(quantized).items():
+            weight = torch._make_per_tensor_quantized_tensor(
+                weights.pop(f"{name}.int8_weight"), weights.pop(f"{name}.int8_scale").item(),
+                weights.pop(f"{name}.int8_zero_point").item()
+            )
+            module.set_weight_bias(weight, weights.pop(f"{name}.int8_bias", None))
+        # The model's own state dict carries the packed weights just set and the
+        # module versions the quantized layers need to load it
+        state = quantized.state_dict()
+        unexpected = sorted(set(weights) - set(state))
+        if unexpected:
+            raise ValueError(f"Saved int8 weights do not fit the model: {unexpected[:5]}")
+        state.update(weights)
+        quantized.load_state_dict(state)
+
+class OnnxRuntimeBackend:
+    name = 'onnxruntime'
+    
+    def __init__(self, load_model, tokenizer, artifact_dir, parity_config, threads=0):
+        """
+        Run the model as a graph-optimized ONNX Runtime session on CPU.
+        
+        The exported graph and ONNX Runtime's optimized graph are written to
+        artifact_dir on first use (a temporary directory when it is None),
+        with their parity against the fp32 model; later starts load the
+        optimized graph directly, without loading the PyTorch model.
+        
+        Raises:
+            BackendParityError: If the optimized graph strays too far from the fp32 model
+        """
+        import onnxruntime
+        
+        logger = logging.getLogger('InferenceBackend')
+        if artifact_dir is None:
+            artifact_dir = tempfile.mkdtemp(prefix='onnx-')
+        exported_file = os.path.join(artifact_dir, 'model.onnx')
+        optimized_file = os.path.join(artifact_dir, 'model.optimized.onnx')
+        self.input_names = list(tokenizer.model_input_names)
+        self.optimized_file = optimized_file
+        self.threads = threads
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        parity = _read_parity(artifact_dir) if os.path.exists(optimized_file) else None
+        model = None
+        if parity is not None:
+            # Already optimized, so skip the optimization passes at load time
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+            model_file = optimized_file
+            logger.info(f"Loading optimized ONNX model from {optimized_file}")
+        else:
+            model = load_model().cpu().eval()
+            self._export(model, tokenizer, exported_file)
+            logger.info(f"Exported ONNX model to {exported_file}")
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.optimized_model_filepath = optimized_file
+            model_file = exported_file
+        
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=['CPUExecutionProvider'])
+        session_inputs = {node.name for node in self.session.get_inputs()}
+        self.input_names = [name for name in self.input_names if name in session_inputs]
+        
+        if model is not None:
+            parity = check_parity(TorchBackend(model), self, tokenizer)
+        try:
+            require_parity(self.name, *parity, parity_config)
+        except BackendParityError:
+            if model is not None:
+                shutil.rmtree(artifact_dir, ignore_errors=True)
+            raise
+        if model is not None:
+            _finish_artifacts(artifact_dir, *parity)
+    
+    def reopen(self, threads=None):
+        """Recreate the session from the optimized graph (e.g. in a forked worker)."""
+        import onnxruntime
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.threads if threads is None else threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        self.session = onnxruntime.InferenceSession(self.optimized_file, options, providers=['CPUExecutionProvider'])
+    
+    def _export(self, model, tokenizer, exported_file):
+        """Export the model with dynamic batch and sequence axes."""
+        os.makedirs(os.path.dirname(exported_file), exist_ok=True)
+        sample = tokenizer(["Shares rose after earnings", "Guidance was cut"], return_tensors="pt", padding=True)
+        input_names = [name for name in self.input_names if name in sample]
+        axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        axes['logits'] = {0: 'batch'}
+        
+        temp_file = f"{exported_file}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                model.cpu().eval(), (), temp_file, kwargs={name: sample[name] for name in input_names},
+                input_names=input_names, output_names=['logits'], dynamic_axes=axes,
+                opset_version=17, dynamo=False
+            )
+        os.replace(temp_file, exported_file)
+    
+    def __call__(self, inputs):
+        """Get logits (a torch tensor) for a batch of tokenizer outputs."""
+        feed = {name: inputs[name].cpu().numpy().astype(np.int64) for name in self.input_names}
+        return torch.from_numpy(self.session.run(['logits'], feed)[0])
+
+def create_backend(name, load_model, build_model, tokenizer, artifact_root, fingerprint=None, use_gpu=False,
+                   threads=0, parity_config=None):
+    """
+    Create the inference backend selected in model.sentiment_analysis.backend.
+    
+    Converted models are cached under artifact_root (the downloaded model
+    directory under ./models) with a -int8 or -onnx suffix, in a
+    subdirectory named after the fingerprint of the downloaded files, so an
+    updated model is converted again instead of running stale weights;
+    conversions of other versions are removed once a new one is saved.
+    Without a fingerprint nothing is cached. A converted backend whose
+    labels or probabilities stray from fp32 torch beyond
+    model.sentiment_analysis.parity is rejected, and like an unknown
+    backend or onnxruntime without the package installed, falls back to
+    plain torch.
+    
+    Args:
+        load_model: Callable returning the fp32 model; only called when a
+            backend has no cached artifact to start from
+        build_model: Callable returning the model architecture without its
+            trained weights, which cached int8 weights are loaded into
+        fingerprint: Identifies the downloaded model files (see model_fingerprint)
+    """
+    logger = logging.getLogger('InferenceBackend')
+    parity_config = parity_config or {}
+    
+    def artifact_dir(suffix):
+        return os.path.join(f"{artifact_root}-{suffix}", fingerprint) if fingerprint else None
+    
+    try:
+        if name == 'torch-int8':
+            return TorchInt8Backend(load_model, build_model, tokenizer, artifact_dir('int8'), parity_config)
+        if name == 'onnxruntime':
+            try:
+                return OnnxRuntimeBackend(load_model, tokenizer, artifact_dir('onnx'), parity_config, threads)
+            except ImportError:
+                logger.warning("onnxruntime is not installed, using the torch backend")
+        elif name != 'torch':
+            logger.warning(f"Unknown inference backend {name!r}, using torch")
+    except BackendParityError as e:
+        logger.error(f"Not using the {name} backend, it does not match fp32 torch: {e}")
+    return TorchBackend(load_model(), use_gpu)
+
+def main():
+    """Check label parity with fp32 torch and benchmark every backend."""
+    import argparse
+    import copy
+    import pandas as pd
+    from components.ai_model import SentimentAnalyzer
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Compare sentiment inference backends")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--news', help="CSV of recorded articles (title and summary columns) to score")
+    parser.add_argument('--texts', type=int, default=512, help="Number of texts to score")
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    model_config = ConfigManager(args.config).get_model_config()
+    
+    if args.news:
+        news_df = pd.read_csv(args.news).fillna('')
+        texts = [f"{title}: {summary}" for title, summary in zip(news_df['title'], news_df['summary'])]
+    else:
+        samples = ["Shares surge after record quarterly revenue", "Company cuts full-year guidance amid weak demand",
+                   "Regulators open probe into accounting practices", "Board approves dividend increase and buyback",
+                   "Stock little changed ahead of the earnings call", "Supplier warns of chip shortages into next year"]
+        texts = [samples[i % len(samples)] + f" (update {i})" for i in range(args.texts)]
+    texts = texts[:args.texts]
+    
+    parity_config = model_config['sentiment_analysis'].get('parity') or {}
+    reference = None
+    failures = 0
+    for name in args.backends.split(','):
+        config = copy.deepcopy(model_config)
+        config['sentiment_analysis']['backend'] = name
+        config['sentiment_analysis']['cache'] = {'enabled': False}
+        
+        started = time.perf_counter()
+        analyzer = SentimentAnalyzer(config)
+        load_time = time.perf_counter() - started
+        
+        analyzer.analyze_sentiment(texts[:analyzer.batch_size])  # Warm up
+        started = time.perf_counter()
+        results = analyzer.analyze_sentiment(texts)
+        elapsed = time.perf_counter() - started
+        
+        if reference is None and name == 'torch':
+            reference = results
+        parity = ''
+        if analyzer.backend.name != name:
+            parity = f" ({name} was rejected)"
+            failures += 1
+        elif reference is not None and name != 'torch':
+            agreement = float(np.mean([a['label'] == b['label'] for a, b in zip(results, reference)]))
+            drift = max(abs(a['confidence'] - b['confidence']) for a, b in zip(results, reference))
+            parity = f", label agreement with torch {agreement:.1%}, max confidence drift {drift:.4f}"
+            try:
+                require_parity(name, agreement, drift, parity_config)
+            except BackendParityError:
+                parity += " (below the parity threshold)"
+                failures += 1
+        print(f"{analyzer.backend.name}: load {load_time:.2f}s, {len(texts) / elapsed:.1f} texts/s, "
+              f"{elapsed * 1000 / len(texts):.2f}ms/text{parity}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
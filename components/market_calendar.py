@@ -0,0 +1,216 @@
+# components/market_calendar.py
+import bisect
+import logging
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import pytz
+
+def _parse_clock(value):
+    """Convert an "HH:MM" string to a datetime.time."""
+    return datetime.strptime(value, "%H:%M").time()
+
+def _parse_dates(values):
+    """Convert a list of "YYYY-MM-DD" strings to a frozenset of dates."""
+    return frozenset(date.fromisoformat(str(value)) for value in values or ())
+
+class ScheduleConfig(namedtuple('ScheduleConfig', [
+    'timezone', 'trading_days', 'market_open', 'market_close', 'check_interval', 'mode',
+    'holidays', 'extra_holidays', 'early_close', 'early_closes'
+])):
+    """
+    The trading schedule, parsed once from the trading.schedule section.
+    
+    Times are datetime.time, dates datetime.date and day sets frozensets, so
+    callers never parse or walk the config dict again. Instances are
+    immutable tuples; a changed config builds a new one.
+    """
+    __slots__ = ()
+    
+    @classmethod
+    def from_dict(cls, schedule):
+        """Build the schedule from the trading.schedule config section."""
+        return cls(
+            timezone=schedule.get('timezone', 'US/Eastern'),
+            trading_days=frozenset(schedule.get('trading_days', (0, 1, 2, 3, 4))),
+            market_open=_parse_clock(schedule.get('market_open', '09:30')),
+            market_close=_parse_clock(schedule.get('market_close', '16:00')),
+            check_interval=int(schedule.get('check_interval', 60)),
+            mode=schedule.get('mode', 'interval'),
+            holidays=schedule.get('holidays', 'nyse'),
+            extra_holidays=_parse_dates(schedule.get('extra_holidays')),
+            early_close=_parse_clock(schedule.get('early_close', '13:00')),
+            early_closes=_parse_dates(schedule.get('early_closes'))
+        )
+
+def _easter(year):
+    """Get Easter Sunday of a year (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _nth_weekday(year, month, weekday, n):
+    """Get the nth (1-based; -1 for the last) given weekday of a month."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(day):
+    """Move a Saturday holiday to Friday and a Sunday holiday to Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def nyse_holidays(year):
+    """
+    Get the NYSE full-day closures and 13:00 early closes of a year.
+    
+    Fixed-date holidays falling on a weekend are observed on the nearest
+    weekday, except New Year's Day on a Saturday, which the exchange does
+    not make up on the previous year's last Friday.
+    
+    Returns:
+        Tuple of (set of closed dates, set of early-close dates)
+    """
+    closed = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25))  # Christmas
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        closed.add(_observed(new_year))
+    if year >= 2022:
+        closed.add(_observed(date(year, 6, 19)))  # Juneteenth
+    
+    early = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}  # Day after Thanksgiving
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        # Eves close early when they are ordinary weekdays (July 3 before a weekday Independence Day)
+        if day.weekday() < 5 and day not in closed and (day.month == 12 or day.weekday() < 4):
+            early.add(day)
+    return closed, early
+
+class MarketCalendar:
+    def __init__(self, schedule, clock=time.time):
+        """
+        Initialize a compiled market calendar.
+        
+        Every session of the current and next year is computed once, with
+        holidays and early closes applied, and kept as one sorted list of
+        open and close times in epoch seconds. A session opens at an even
+        position and closes at the next odd one, so "is the market open" and
+        "when does it next open" are a binary search. The boundaries around
+        the last answer are cached, so the calls the main loop makes between
+        two boundaries are a pair of comparisons. No timezone conversion or
+        string parsing happens after construction.
+        
+        Args:
+            schedule: ScheduleConfig
+            clock: Returns the current time in epoch seconds
+        """
+        self.logger = logging.getLogger('MarketCalendar')
+        self.schedule = schedule
+        self.clock = clock
+        self.zone = pytz.timezone(schedule.timezone)
+        self._boundaries = []
+        self._first_year = None
+        self._cached = (0.0, 0.0, False, 0)  # (start, end, open, next boundary index)
+        self._compile(datetime.fromtimestamp(clock(), self.zone).year)
+    
+    def _compile(self, year):
+        """Compute the sessions of a year and the next one."""
+        schedule = self.schedule
+        closed, early = set(schedule.extra_holidays), set(schedule.early_closes)
+        if schedule.holidays == 'nyse':
+            for each in (year, year + 1):
+                year_closed, year_early = nyse_holidays(each)
+                closed |= year_closed
+                early |= year_early
+        
+        boundaries = []
+        day = date(year, 1, 1)
+        end = date(year + 2, 1, 1)
+        while day < end:
+            if day.weekday() in schedule.trading_days and day not in closed:
+                close_time = min(schedule.early_close, schedule.market_close) if day in early else schedule.market_close
+                opens = self.zone.localize(datetime.combine(day, schedule.market_open)).timestamp()
+                closes = self.zone.localize(datetime.combine(day, close_time)).timestamp()
+                if closes > opens:
+                    boundaries.extend((opens, closes))
+            day += timedelta(days=1)
+        
+        self._boundaries = boundaries
+        self._first_year = year
+        self._cached = (0.0, 0.0, False, 0)
+        self.logger.info(f"Compiled market calendar for {year}-{year + 1}: {len(boundaries) // 2} sessions, "
+                         f"{len(closed)} holidays, {len(early)} early closes")
+    
+    def _locate(self, now):
+        """Get (open, next boundary) for a time, recompiling when it leaves the compiled years."""
+        start, end, is_open, index = self._cached
+        if start <= now < end:
+            return is_open, index
+        
+        boundaries = self._boundaries
+        if not boundaries or now < boundaries[0] or now >= boundaries[-1]:
+            year = datetime.fromtimestamp(now, self.zone).year
+            if year != self._first_year:
+                self._compile(year)
+                boundaries = self._boundaries
+        
+        index = bisect.bisect_right(boundaries, now)
+        is_open = index % 2 == 1
+        start = boundaries[index - 1] if index > 0 else float('-inf')
+        end = boundaries[index] if index < len(boundaries) else float('inf')
+        self._cached = (start, end, is_open, index)
+        return is_open, index
+    
+    def is_open(self, now=None):
+        """Check whether the market is in session at a time (default: now)."""
+        return self._locate(self.clock() if now is None else now)[0]
+    
+    def seconds_until_open(self, now=None):
+        """
+        Get the seconds until the next session opens.
+        
+        Returns:
+            0 while the market is open, or None when no session is scheduled
+            in the compiled years (e.g. an empty trading_days list)
+        """
+        now = self.clock() if now is None else now
+        is_open, index = self._locate(now)
+        if is_open:
+            return 0.0
+        if index >= len(self._boundaries):
+            return None
+        return self._boundaries[index] - now
+    
+    def seconds_until_close(self, now=None):
+        """Get the seconds until the current session closes (0 when the market is closed)."""
+        now = self.clock() if now is None else now
+        is_open, index = self._locate(now)
+        return self._boundaries[index] - now if is_open else 0.0
+    
+    def next_open(self, now=None):
+        """Get the start of the next session as an aware datetime in the market timezone, or None."""
+        now = self.clock() if now is None else now
+        seconds = self.seconds_until_open(now)
+        if seconds is None:
+            return None
+        return datetime.fromtimestamp(now + seconds, self.zone)
@@ -0,0 +1,274 @@
+# components/metrics.py
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from components.pipeline import LatencyHistogram
+
+# Buckets for counts such as inference batch sizes
+SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, float('inf'))
+
+class MetricsRegistry:
+    def __init__(self, prefix='trading'):
+        """
+        Initialize a registry of counters, gauges and histograms.
+        
+        Series are keyed by name and labels. Recording is a dict lookup and
+        a short lock, so instrumentation can stay on in production.
+        Histograms are LatencyHistograms, and histograms that components
+        already keep (pipeline stages, order latency) can be attached as they
+        are. render() produces the Prometheus text format and summary() one
+        log line.
+        """
+        self.prefix = prefix
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}
+        self._histograms = {}  # (name, labels) -> LatencyHistogram
+        self._lock = threading.Lock()
+        self._last_summary = (time.monotonic(), {})
+    
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+    
+    def inc(self, name, value=1, **labels):
+        """Add to a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge."""
+        self._gauges[self._key(name, labels)] = value
+    
+    def histogram(self, name, bounds=None, **labels):
+        """Get (creating it on first use) the histogram for a name and labels."""
+        key = self._key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(bounds))
+        return histogram
+    
+    def observe(self, name, value, bounds=None, **labels):
+        """Record one histogram sample."""
+        self.histogram(name, bounds, **labels).record(value)
+    
+    def attach_histogram(self, name, histogram, **labels):
+        """Expose a histogram a component already keeps."""
+        with self._lock:
+            self._histograms[self._key(name, labels)] = histogram
+    
+    def drain(self):
+        """
+        Take the counters and histograms recorded so far and start them again from zero.
+        
+        Worker processes send the drained series to the parent, which adds
+        them to its own registry with merge(). Gauges are per process and
+        stay where they were set.
+        
+        Returns:
+            Picklable (counters, histograms) for merge()
+        """
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+        return counters, {
+            key: (histogram.BOUNDS,) + tuple(histogram.snapshot()) + (histogram.max,)
+            for key, histogram in histograms.items()
+        }
+    
+    def merge(self, drained):
+        """Add series drained from another process's registry."""
+        counters, histograms = drained
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+        for (name, labels), (bounds, counts, count, total, maximum) in histograms.items():
+            if count:
+                self.histogram(name, bounds, **dict(labels)).merge(counts, count, total, maximum)
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block into the histogram name_seconds; exceptions also count in name_errors_total."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+    
+    def timed(self, name):
+        """Decorator timing every call of a function with timer(name)."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def render(self):
+        """Render every series in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        
+        lines = []
+        declared = set()
+        
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+        
+        for kind, series in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in series:
+                full_name = f"{self.prefix}_{name}"
+                declare(full_name, kind)
+                lines.append(f"{full_name}{_format_labels(labels)} {value}")
+        
+        for (name, labels), histogram in histograms:
+            full_name = f"{self.prefix}_{name}"
+            declare(full_name, 'histogram')
+            counts, count, total = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.BOUNDS, counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+    
+    def summary(self):
+        """
+        Summarize activity since the previous summary in one line.
+        
+        Timers show calls, mean and p95 over the whole run, summed over
+        labels; counters show their rate since the previous summary, and
+        counters labelled result=hit/miss also their overall hit rate.
+        """
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = list(self._histograms.items())
+        last_time, last_counters = self._last_summary
+        self._last_summary = (now, counters)
+        elapsed = max(now - last_time, 1e-9)
+        
+        timers = {}
+        for (name, labels), histogram in histograms:
+            if name.endswith('_seconds') and histogram.count > 0:
+                timers.setdefault(name[:-len('_seconds')], []).append(histogram.summary())
+        parts = []
+        for name, summaries in sorted(timers.items()):
+            count = sum(summary['count'] for summary in summaries)
+            mean = sum(summary['mean'] * summary['count'] for summary in summaries) / count
+            p95 = max(summary['p95'] for summary in summaries)
+            parts.append(f"{name} n={count} mean={mean * 1000:.1f}ms p95<={p95 * 1000:.1f}ms")
+        
+        rates = {}
+        outcomes = {}  # Counters labelled result=hit/miss -> [hits, misses]
+        for (name, labels), value in counters.items():
+            delta = value - last_counters.get((name, labels), 0)
+            if delta:
+                rates[name] = rates.get(name, 0) + delta
+            result = dict(labels).get('result')
+            if result in ('hit', 'miss'):
+                outcomes.setdefault(name, [0, 0])[result == 'miss'] += value
+        parts.extend(f"{name}={value / elapsed:.2f}/s" for name, value in sorted(rates.items()))
+        parts.extend(f"{name} hit rate={hits / (hits + misses):.1%}"
+                     for name, (hits, misses) in sorted(outcomes.items()) if hits + misses)
+        return '; '.join(parts) if parts else 'no activity'
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+# Process-wide registry used by every component, like the logging module's loggers
+REGISTRY = MetricsRegistry()
+
+class InstrumentedAPI:
+    def __init__(self, api, registry=REGISTRY):
+        """
+        Wrap a broker API client to count and time every method call.
+        
+        Calls are recorded as broker_api_seconds and broker_api_errors_total,
+        labelled by method; attributes that are not methods pass through.
+        """
+        self._api = api
+        self._registry = registry
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if not callable(attribute):
+            return attribute
+        registry = self._registry
+        
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            with registry.timer('broker_api', method=name):
+                return attribute(*args, **kwargs)
+        return call
+
+class MetricsServer:
+    def __init__(self, registry=REGISTRY, host='127.0.0.1', port=9108, summary_interval=60):
+        """
+        Serve /metrics over HTTP and log a summary line periodically, both in daemon threads.
+        
+        Args:
+            summary_interval: Seconds between summary lines (0 disables them)
+        """
+        self.logger = logging.getLogger('Metrics')
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.summary_interval = summary_interval
+        self._server = None
+        self._stopped = threading.Event()
+    
+    def start(self):
+        """Start the endpoint and the summary thread."""
+        registry = self.registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # Scrapes would flood the log
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        if self.summary_interval > 0:
+            threading.Thread(target=self._log_summaries, name='metrics-summary', daemon=True).start()
+        self.logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+    
+    def _log_summaries(self):
+        while not self._stopped.wait(self.summary_interval):
+            self.logger.info(f"Metrics: {self.registry.summary()}")
+    
+    def stop(self):
+        """Stop the endpoint and the summary thread."""
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -1,22 +1,39 @@
 # components/model_downloader.py
-from huggingface_hub import snapshot_download
+import hashlib
+import json
 import os
 import logging
 
-def download_model(model_name, cache_dir="./models"):
+MANIFEST_FILE = ".model_manifest.json"
+
+def download_model(model_name, cache_dir="./models", manifest_check="size"):
     """
     Automatically download a model from Hugging Face Hub.
     
+    A model already downloaded by a previous run is used without contacting
+    the hub as long as it still matches the manifest written after that
+    download.
+    
     Args:
         model_name: Name of the model on Hugging Face (e.g., "finbert/finbert-sentiment")
         cache_dir: Directory to store the downloaded model
+        manifest_check: How to verify a local copy: "size" (file sizes), "hash"
+            (SHA-256 of every file) or "none" (always ask the hub)
     
     Returns:
         Path to the downloaded model
     """
     logger = logging.getLogger('ModelDownloader')
+    local_dir = os.path.join(cache_dir, model_name.split('/')[-1])
+    
+    if manifest_check != "none" and verify_manifest(local_dir, manifest_check == "hash"):
+        logger.info(f"Using local model at {local_dir} (manifest check passed)")
+        return local_dir
     
     try:
+        # Imported here so starts with a verified local copy never load the hub client
+        from huggingface_hub import snapshot_download
+        
         logger.info(f"Downloading model: {model_name}")
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
@@ -25,12 +42,77 @@ def download_model(model_name, cache_dir="./models"):
         model_path = snapshot_download(
             repo_id=model_name,
             cache_dir=cache_dir,
-            local_dir=os.path.join(cache_dir, model_name.split('/')[-1])
+            local_dir=local_dir
         )
         
+        write_manifest(model_path)
         logger.info(f"Model downloaded successfully to: {model_path}")
         return model_path
     
     except Exception as e:
         logger.error(f"Error downloading model {model_name}: {e}")
         raise
+
+def _model_files(model_dir):
+    """List model files relative to model_dir, skipping hub bookkeeping and the manifest."""
+    files = []
+    for root, dirs, names in os.walk(model_dir):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in names:
+            if name == MANIFEST_FILE or name.startswith('.'):
+                continue
+            files.append(os.path.relpath(os.path.join(root, name), model_dir))
+    return sorted(files)
+
+def _file_hash(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_manifest(model_dir):
+    """Record the size and hash of every file in a downloaded model."""
+    manifest = {
+        name: {'size': os.path.getsize(os.path.join(model_dir, name)),
+               'sha256': _file_hash(os.path.join(model_dir, name))}
+        for name in _model_files(model_dir)
+    }
+    temp_file = os.path.join(model_dir, f"{MANIFEST_FILE}.tmp")
+    with open(temp_file, 'w') as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    os.replace(temp_file, os.path.join(model_dir, MANIFEST_FILE))
+
+def model_fingerprint(model_dir):
+    """
+    Identify the files of a downloaded model, for caching what is derived from them.
+    
+    The manifest records the SHA-256 of every file, so its own hash changes
+    whenever any model file does.
+    
+    Returns:
+        The first 16 hex digits of the manifest's SHA-256, or None if there is no manifest
+    """
+    try:
+        return _file_hash(os.path.join(model_dir, MANIFEST_FILE))[:16]
+    except OSError:
+        return None
+
+def verify_manifest(model_dir, check_hashes=False):
+    """Check that every file listed in a model's manifest is present and unchanged."""
+    try:
+        with open(os.path.join(model_dir, MANIFEST_FILE)) as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return False
+    
+    if not manifest:
+        return False
+    for name, expected in manifest.items():
+        path = os.path.join(model_dir, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != expected['size']:
+            return False
+        if check_hashes and _file_hash(path) != expected['sha256']:
+            return False
+    return True
@@ -0,0 +1,94 @@
+# components/news_matcher.py
+import re
+import logging
+
+# Word tokens; dots and dashes are kept only between characters so "BRK.B" stays whole
+# while a trailing period ("... for AMD.") does not end up in the token
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:[.\-&'][A-Za-z0-9]+)*")
+
+class NewsMatcher:
+    def __init__(self, tickers, aliases=None):
+        """
+        Initialize a single-pass ticker matcher.
+        
+        Ticker symbols are matched on whole words as written (so "AMD" matches
+        "AMD's outlook" but not "Amdocs", and a symbol like "ON" does not match
+        the English word "on"). Aliases are matched case-insensitively, and
+        multi-word aliases such as "Advanced Micro Devices" are matched as
+        token sequences.
+        
+        Args:
+            tickers: List of ticker symbols
+            aliases: Optional dict mapping a ticker to a list of company names
+        """
+        self.logger = logging.getLogger('NewsMatcher')
+        self.tickers = list(tickers)
+        self._symbols = {}
+        self._phrases = {}
+        self.max_phrase_length = 1
+        
+        for ticker in self.tickers:
+            self._symbols.setdefault(ticker, set()).add(ticker)
+        
+        for ticker, names in (aliases or {}).items():
+            if ticker not in self.tickers:
+                continue
+            for name in names:
+                self._add_phrase(name, ticker)
+    
+    def _add_phrase(self, text, ticker):
+        """Register a case-insensitive alias phrase that should map to a ticker."""
+        tokens = tuple(TOKEN_PATTERN.findall(text.lower()))
+        if len(tokens) == 0:
+            self.logger.warning(f"Ignoring empty alias {text!r} for {ticker}")
+            return
+        self._phrases.setdefault(tokens, set()).add(ticker)
+        self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+    
+    def match_text(self, text):
+        """Get the set of tickers mentioned in a text."""
+        matches = set()
+        if not text:
+            return matches
+        
+        tokens = TOKEN_PATTERN.findall(text)
+        symbols = self._symbols
+        for token in tokens:
+            found = symbols.get(token)
+            if found:
+                matches.update(found)
+        
+        if self._phrases:
+            tokens = [token.lower() for token in tokens]
+            phrases = self._phrases
+            for length in range(1, self.max_phrase_length + 1):
+                for start in range(len(tokens) - length + 1):
+                    found = phrases.get(tuple(tokens[start:start + length]))
+                    if found:
+                        matches.update(found)
+        
+        return matches
+    
+    def build_index(self, news_df):
+        """
+        Map each ticker to the positions of the articles that mention it.
+        
+        Every title and summary is tokenized exactly once, however many
+        tickers are being watched.
+        
+        Returns:
+            Dict of ticker -> list of row positions (for use with iloc)
+        """
+        index = {}
+        if news_df.empty:
+            return index
+        
+        titles = news_df['title'].tolist() if 'title' in news_df.columns else [''] * len(news_df)
+        summaries = news_df['summary'].tolist() if 'summary' in news_df.columns else [''] * len(news_df)
+        
+        for position, (title, summary) in enumerate(zip(titles, summaries)):
+            text = f"{title if isinstance(title, str) else ''} {summary if isinstance(summary, str) else ''}"
+            for ticker in self.match_text(text):
+                index.setdefault(ticker, []).append(position)
+        
+        return index
@@ -1,36 +1,282 @@
-# components/model_downloader.py
-from huggingface_hub import snapshot_download
-import os
+# components/order_executor.py
 import logging
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from components.metrics import REGISTRY
+from components.pipeline import LatencyHistogram
 
-def download_model(model_name, cache_dir="./models"):
-    """
-    Automatically download a model from Hugging Face Hub.
+# HTTP statuses worth retrying; anything else (rejected order, insufficient buying power...) is final
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+def _transient_errors():
+    """Get the exception types of network failures and timeouts from the HTTP stack that is installed."""
+    errors = [ConnectionError, TimeoutError]  # socket.timeout is TimeoutError
+    try:
+        import requests
+        errors += [requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                   requests.exceptions.ChunkedEncodingError]
+    except ImportError:
+        pass
+    try:
+        import urllib3
+        errors += [urllib3.exceptions.ProtocolError, urllib3.exceptions.TimeoutError,
+                   urllib3.exceptions.NewConnectionError, urllib3.exceptions.MaxRetryError]
+    except ImportError:
+        pass
+    try:
+        from alpaca_trade_api.rest import RetryException  # Raised once the client's own 429 retries run out
+        errors.append(RetryException)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+# Exceptions without an HTTP status that are worth retrying; any other error (a bug, bad data...) is final
+TRANSIENT_ERRORS = _transient_errors()
+
+def is_retryable(error):
+    """Tell whether a failed API call may succeed if repeated: a retryable status, network failure or timeout."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+class OrderExecutor:
+    def __init__(self, api, config_manager, portfolio_state=None):
+        """
+        Initialize the order executor.
+        
+        Orders are submitted from a thread pool sharing one pooled HTTP
+        session, so orders for several tickers are in flight at once and
+        callers can submit without blocking. Each order gets a client_order_id
+        before its first attempt and keeps it across retries; after an
+        ambiguous failure the broker is asked for that id before resubmitting,
+        so a retry never opens a second position.
+        
+        Args:
+            portfolio_state: Optional PortfolioState used for sizing instead of
+                account and position REST calls
+        """
+        self.logger = logging.getLogger('OrderExecutor')
+        self.api = api
+        self.portfolio_state = portfolio_state
+        self.risk_params = config_manager.get_risk_parameters()
+        execution_config = config_manager.get_execution_config()
+        
+        self.max_workers = execution_config.max_workers
+        self.max_retries = execution_config.max_retries
+        self.backoff_base = execution_config.backoff_base
+        self.backoff_max = execution_config.backoff_max
+        self.client_order_prefix = execution_config.client_order_prefix
+        
+        self.latency = LatencyHistogram()
+        REGISTRY.attach_histogram('order_submit_seconds', self.latency)
+        self.retries = 0
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='order')
+        self._configure_session()
     
-    Args:
-        model_name: Name of the model on Hugging Face (e.g., "finbert/finbert-sentiment")
-        cache_dir: Directory to store the downloaded model
+    def _configure_session(self):
+        """Size the REST client's connection pool to the number of submission threads."""
+        session = getattr(self.api, '_session', None)
+        if session is None:
+            return
+        try:
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            return
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
     
-    Returns:
-        Path to the downloaded model
-    """
-    logger = logging.getLogger('ModelDownloader')
+    def submit_trade(self, ticker, decision):
+        """
+        Submit a trade without waiting for it.
+        
+        Returns:
+            Future resolving to the execute_trade_with_retry result
+        """
+        return self._pool.submit(self.execute_trade_with_retry, ticker, decision)
     
-    try:
-        logger.info(f"Downloading model: {model_name}")
-        # Create cache directory if it doesn't exist
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # Download the model
-        model_path = snapshot_download(
-            repo_id=model_name,
-            cache_dir=cache_dir,
-            local_dir=os.path.join(cache_dir, model_name.split('/')[-1])
-        )
-        
-        logger.info(f"Model downloaded successfully to: {model_path}")
-        return model_path
-    
-    except Exception as e:
-        logger.error(f"Error downloading model {model_name}: {e}")
-        raise
+    @REGISTRY.timed('execute_trades')
+    def execute_trades(self, decisions):
+        """
+        Execute several trades concurrently.
+        
+        Args:
+            decisions: Dict of ticker -> decision dict
+        
+        Returns:
+            Dict of ticker -> trade result (None for failed or skipped trades)
+        """
+        futures = {ticker: self.submit_trade(ticker, decision) for ticker, decision in decisions.items()}
+        return {ticker: future.result() for ticker, future in futures.items()}
+    
+    @REGISTRY.timed('execute_trade')
+    def execute_trade_with_retry(self, ticker, decision):
+        """
+        Execute a trading decision, retrying transient failures with backoff.
+        
+        Args:
+            ticker: Stock symbol
+            decision: Dict with 'action' (BUY, SELL or HOLD), 'confidence' and
+                optionally 'max_value', a cap on the value of a BUY
+        
+        Returns:
+            Dict describing the submitted order, or None if nothing was submitted
+        """
+        action = decision.get('action', 'HOLD')
+        if action not in ('BUY', 'SELL'):
+            return None
+        
+        try:
+            qty, price = self._order_quantity(ticker, action, decision.get('max_value'))
+        except Exception as e:
+            self.logger.error(f"Could not size {action} order for {ticker}: {e}")
+            return None
+        if not qty:
+            return None
+        
+        side = action.lower()
+        client_order_id = f"{self.client_order_prefix}-{ticker}-{side}-{uuid.uuid4().hex[:16]}"
+        if self.portfolio_state is not None:
+            self.portfolio_state.record_order(client_order_id, ticker, side, qty, price)
+        
+        result = self._submit_with_retry(ticker, action, side, qty, client_order_id)
+        if result is None and self.portfolio_state is not None:
+            self.portfolio_state.release_order(client_order_id)
+        return result
+    
+    def _submit_with_retry(self, ticker, action, side, qty, client_order_id):
+        """Submit a market order, retrying transient failures under the same client_order_id."""
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                # After a failed attempt the order may still have reached the broker
+                order = self._find_order(client_order_id) if attempt > 0 else None
+                if order is None:
+                    order = self.api.submit_order(
+                        symbol=ticker,
+                        qty=qty,
+                        side=side,
+                        type='market',
+                        time_in_force='day',
+                        client_order_id=client_order_id
+                    )
+                return self._order_result(ticker, order, client_order_id, attempt + 1, started)
+            
+            except Exception as e:
+                status = getattr(e, 'status_code', None)
+                if status == 422 and attempt > 0:
+                    # Duplicate client_order_id: an earlier attempt got through after all
+                    order = self._find_order(client_order_id)
+                    if order is not None:
+                        return self._order_result(ticker, order, client_order_id, attempt + 1, started)
+                if status is not None and status not in RETRYABLE_STATUSES:
+                    self.logger.error(f"{action} order for {ticker} rejected ({status}): {e}")
+                    return None
+                if not is_retryable(e):
+                    self.logger.error(f"{action} order for {ticker} failed with a non-retryable "
+                                      f"{type(e).__name__}: {e}")
+                    return None
+                if attempt == self.max_retries:
+                    self.logger.error(f"{action} order for {ticker} failed after {attempt + 1} attempts: {e}")
+                    return None
+                
+                delay = self._backoff(attempt)
+                with self._stats_lock:
+                    self.retries += 1
+                REGISTRY.inc('order_retries_total')
+                self.logger.warning(f"{action} order for {ticker} failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+    
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter, so concurrent retries spread out."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    def _find_order(self, client_order_id):
+        """Get an order already accepted under client_order_id, or None."""
+        try:
+            return self.api.get_order_by_client_order_id(client_order_id)
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 404:
+                return None
+            raise
+    
+    def _order_quantity(self, ticker, action, max_value=None):
+        """
+        Get the number of shares to trade and the price used to size them.
+        
+        BUY risks max_risk_per_trade of equity down to the stop loss, capped by
+        max_portfolio_allocation including any shares already held, and by
+        max_value when the caller sets one. SELL
+        closes the whole long position. Account and position figures come
+        from the portfolio state cache when one is attached.
+        """
+        state = self.portfolio_state
+        if state is not None:
+            state.maybe_resync()
+            held_qty = state.position_qty(ticker)
+        else:
+            position = self._get_position(ticker)
+            held_qty = float(position.qty) if position is not None else 0.0
+        
+        if action == 'SELL':
+            if held_qty <= 0:
+                self.logger.info(f"No {ticker} position to sell")
+                return 0, None
+            return held_qty, None
+        
+        price = float(self.api.get_latest_trade(ticker).price)
+        if state is not None:
+            value = state.max_trade_value(ticker)
+        else:
+            account = self.api.get_account()
+            equity = float(account.equity)
+            held_value = float(position.market_value) if position is not None else 0.0
+            risk_value = equity * self.risk_params['max_risk_per_trade'] / self.risk_params['stop_loss_percentage']
+            room = equity * self.risk_params['max_portfolio_allocation'] - held_value
+            value = min(risk_value, room, float(account.buying_power))
+        if max_value is not None:
+            value = min(value, max_value)
+        
+        qty = math.floor(value / price) if price > 0 else 0
+        if qty <= 0:
+            self.logger.info(f"No room to buy {ticker}: allocation or buying power exhausted")
+        return qty, price
+    
+    def _get_position(self, ticker):
+        """Get the open position for a ticker, or None."""
+        try:
+            return self.api.get_position(ticker)
+        except Exception as e:
+            if getattr(e, 'status_code', None) == 404:
+                return None
+            raise
+    
+    def _order_result(self, ticker, order, client_order_id, attempts, started):
+        """Record latency and summarize a submitted order."""
+        elapsed = time.perf_counter() - started
+        self.latency.record(elapsed)
+        self.logger.info(f"Submitted {order.side} order for {order.qty} {ticker} "
+                         f"(id {order.id}, {attempts} attempt(s), {elapsed * 1000:.0f}ms)")
+        return {
+            'ticker': ticker,
+            'order_id': order.id,
+            'client_order_id': client_order_id,
+            'side': order.side,
+            'qty': order.qty,
+            'status': order.status,
+            'attempts': attempts
+        }
+    
+    def get_stats(self):
+        """Get order latency summary and retry count."""
+        return dict(self.latency.summary(), retries=self.retries)
+    
+    def close(self):
+        """Wait for in-flight orders and stop the submission threads."""
+        self._pool.shutdown(wait=True)
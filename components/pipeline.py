@@ -0,0 +1,216 @@
+# components/pipeline.py
+import bisect
+import logging
+import queue
+import threading
+import time
+
+class LatencyHistogram:
+    # Bucket upper bounds in seconds (the last bucket catches everything above)
+    BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, float('inf'))
+    
+    def __init__(self, bounds=None):
+        """
+        Initialize a fixed-bucket latency histogram.
+        
+        Args:
+            bounds: Optional ascending bucket upper bounds ending in inf, for
+                histograms of something other than seconds (e.g. batch sizes)
+        """
+        if bounds is not None:
+            self.BOUNDS = tuple(bounds)
+        self.counts = [0] * len(self.BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        """Record one latency sample."""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+    
+    def merge(self, counts, count, total, maximum):
+        """Add the samples of another histogram with the same bounds (e.g. one kept in another process)."""
+        with self._lock:
+            self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+            self.count += count
+            self.total += total
+            if maximum > self.max:
+                self.max = maximum
+    
+    def percentile(self, fraction):
+        """Estimate a percentile as the upper bound of the bucket that contains it."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = fraction * self.count
+            seen = 0
+            for bound, count in zip(self.BOUNDS, self.counts):
+                seen += count
+                if seen >= target:
+                    return min(bound, self.max)
+            return self.max
+    
+    def snapshot(self):
+        """Get (bucket counts, count, total) read together."""
+        with self._lock:
+            return list(self.counts), self.count, self.total
+    
+    def summary(self):
+        """Get count, mean, p50, p95 and max in seconds."""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'max': self.max
+        }
+
+class PipelineItem:
+    __slots__ = ('key', 'data', 'created_at')
+    
+    def __init__(self, key, data=None, created_at=None):
+        """A unit of work flowing through the pipeline (one ticker per cycle)."""
+        self.key = key
+        self.data = data if data is not None else {}
+        self.created_at = created_at if created_at is not None else time.perf_counter()
+
+class Stage:
+    def __init__(self, name, handler, workers=1, batch_size=1):
+        """
+        Define a pipeline stage.
+        
+        Args:
+            name: Stage name used for metrics and thread names
+            handler: With batch_size 1, called with one item and returns the item
+                to pass on (or None to drop it). With batch_size > 1, called with a
+                list of up to batch_size queued items and returns the list to pass on.
+            workers: Number of threads running the stage (use > 1 for I/O stages)
+            batch_size: Maximum number of queued items handed to the handler at once
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.latency = LatencyHistogram()
+        self.errors = 0
+
+class Pipeline:
+    def __init__(self, stages, queue_size=100):
+        """
+        Initialize a staged pipeline connected by bounded queues.
+        
+        Each stage reads from its own queue of at most queue_size items, so a
+        slow stage blocks the stages feeding it (backpressure) instead of
+        letting work pile up in memory.
+        """
+        self.logger = logging.getLogger('Pipeline')
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.end_to_end = LatencyHistogram()
+        self._failed = []  # Items dropped by a stage error, until take_failed()
+        self._failed_lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+    
+    def start(self):
+        """Start the worker threads of every stage."""
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._run_stage, args=(index,),
+                    name=f"{stage.name}-{worker}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+    
+    def submit(self, item, stage=None):
+        """
+        Submit an item, blocking while its stage is full.
+        
+        Args:
+            stage: Name of the stage to enter at (default: the first)
+        """
+        index = 0 if stage is None else [each.name for each in self.stages].index(stage)
+        self.queues[index].put(item)
+    
+    def join(self):
+        """Wait until every submitted item has left the pipeline."""
+        for stage_queue in self.queues:
+            stage_queue.join()
+    
+    def take_failed(self):
+        """Get the items a stage error dropped since the last call, and forget them."""
+        with self._failed_lock:
+            failed, self._failed = self._failed, []
+        return failed
+    
+    def idle(self):
+        """Check whether every submitted item has left the pipeline, without waiting."""
+        return all(stage_queue.unfinished_tasks == 0 for stage_queue in self.queues)
+    
+    def stop(self):
+        """Stop the worker threads once the queues are drained."""
+        self.join()
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+    
+    def get_stats(self):
+        """Get latency summaries per stage, queue depths and end-to-end latency."""
+        stats = {stage.name: dict(stage.latency.summary(), errors=stage.errors, queued=stage_queue.qsize())
+                 for stage, stage_queue in zip(self.stages, self.queues)}
+        stats['end_to_end'] = self.end_to_end.summary()
+        return stats
+    
+    def _run_stage(self, index):
+        """Worker loop for one stage."""
+        stage = self.stages[index]
+        in_queue = self.queues[index]
+        out_queue = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        
+        while not self._stopping.is_set():
+            try:
+                items = [in_queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            
+            # Drain whatever is already queued, up to the batch size
+            while len(items) < stage.batch_size:
+                try:
+                    items.append(in_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            started = time.perf_counter()
+            try:
+                if stage.batch_size > 1:
+                    outputs = stage.handler(items) or []
+                else:
+                    output = stage.handler(items[0])
+                    outputs = [output] if output is not None else []
+            except Exception as e:
+                stage.errors += 1
+                self.logger.error(f"Error in pipeline stage {stage.name}: {e}")
+                with self._failed_lock:
+                    self._failed.extend(items)
+                outputs = []
+            
+            finished = time.perf_counter()
+            for _ in items:
+                stage.latency.record(finished - started)
+            
+            for output in outputs:
+                if out_queue is not None:
+                    out_queue.put(output)
+                else:
+                    self.end_to_end.record(finished - output.created_at)
+            
+            for _ in items:
+                in_queue.task_done()
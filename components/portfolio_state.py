@@ -0,0 +1,313 @@
+# components/portfolio_state.py
+import logging
+import threading
+import time
+from components.config_records import PortfolioConfig
+
+# Trade update events after which an order no longer reserves buying power
+FINAL_EVENTS = {'fill', 'canceled', 'expired', 'rejected', 'done_for_day', 'replaced'}
+
+class PortfolioState:
+    def __init__(self, api, risk_params, portfolio_config=None, clock=time.monotonic):
+        """
+        Initialize the in-memory account and position cache.
+        
+        The cache is seeded from one get_account/list_positions round trip and
+        then kept current from trade update events (the Alpaca trade_updates
+        stream, or AlpacaStub's fake stream), so sizing a trade reads a few
+        dict entries instead of calling the REST API. Orders that have been
+        submitted but not filled reserve their value, so concurrent
+        submissions cannot spend the same buying power twice, and open sells
+        hold back their shares so a position is not sold twice. A full resync
+        every resync_interval seconds corrects drift from price moves and
+        rebuilds the reservations from the broker's open orders, so orders
+        whose final update was missed stop reserving buying power and orders
+        placed before a restart start reserving it.
+        """
+        portfolio_config = portfolio_config or PortfolioConfig.from_dict(None)
+        self.logger = logging.getLogger('PortfolioState')
+        self.api = api
+        self.risk_params = risk_params
+        self.resync_interval = portfolio_config.resync_interval
+        # Orders recorded this recently are kept on resync even if the broker does not list them yet
+        self.pending_grace = portfolio_config.pending_grace
+        self.clock = clock
+        
+        self.cash = 0.0
+        self.equity = 0.0
+        self.buying_power = 0.0
+        self.exposure = 0.0  # Market value of all positions
+        self.positions = {}  # symbol -> {'qty', 'avg_entry_price', 'last_price'}
+        self.pending = {}  # client_order_id -> (symbol, side, reserved value, unfilled qty)
+        self.reserved = 0.0
+        self._recorded_at = {}  # client_order_id -> clock time record_order was called
+        self.last_sync = None
+        self._updates = 0  # Trade updates applied, so a seed can tell its snapshot went stale
+        self._lock = threading.RLock()
+        self._stream_thread = None
+    
+    def seed(self, account=None, attempts=3):
+        """
+        Load account, positions and open orders from the API (reusing an account already fetched).
+        
+        A trade update applied while the snapshot is being fetched may or may
+        not be reflected in it, so applying it could count a fill twice or
+        let a reservation the fill released be spent again. Such a snapshot
+        is discarded and fetched again, up to attempts times; after that the
+        current state is kept and the next maybe_resync tries again. An
+        account passed in is only used for the first attempt.
+        
+        Returns:
+            True if a snapshot was applied
+        """
+        for attempt in range(attempts):
+            with self._lock:
+                updates = self._updates
+            started = self.clock()
+            snapshot = account if account is not None and attempt == 0 else self.api.get_account()
+            positions = self.api.list_positions()
+            try:
+                open_orders = self.api.list_orders(status='open', limit=500)
+                untracked = self._open_order_entries(open_orders, positions)
+            except Exception as e:
+                self.logger.warning(f"Could not list open orders, keeping current reservations: {e}")
+                open_orders = untracked = None
+            
+            with self._lock:
+                if self._updates == updates:
+                    self._apply_snapshot(snapshot, positions, open_orders, untracked, started)
+                    break
+            self.logger.info("Trade update arrived while fetching the portfolio, fetching it again")
+        else:
+            self.logger.warning(f"Trade updates kept arriving during {attempts} portfolio fetches, "
+                                f"keeping the current state")
+            return False
+        
+        self.logger.info(f"Portfolio seeded: equity ${self.equity:.2f}, buying power ${self.buying_power:.2f}, "
+                         f"{len(self.positions)} open positions, {len(self.pending)} pending orders "
+                         f"reserving ${self.reserved:.2f}")
+        return True
+    
+    def _apply_snapshot(self, account, positions, open_orders, untracked, synced_from):
+        """Replace the cached account, positions and reservations (call with the lock held)."""
+        self.cash = float(account.cash)
+        self.equity = float(account.equity)
+        self.buying_power = float(account.buying_power)
+        self.positions = {}
+        self.exposure = 0.0
+        for position in positions:
+            qty = float(position.qty)
+            market_value = float(position.market_value)
+            self.positions[position.symbol] = {
+                'qty': qty,
+                'avg_entry_price': float(getattr(position, 'avg_entry_price', 0) or 0),
+                'last_price': market_value / qty if qty else 0.0
+            }
+            self.exposure += market_value
+        if open_orders is not None:
+            open_ids = [getattr(order, 'client_order_id', None) or order.id for order in open_orders]
+            self._reserve_open_orders(open_ids, untracked, synced_from)
+        self.last_sync = self.clock()
+    
+    def _open_order_entries(self, orders, positions):
+        """
+        Get pending entries (symbol, side, reserved value, unfilled qty) for open orders this cache does not track yet.
+        
+        Open buys reserve their unfilled quantity at the limit price, or the
+        price of a held position, or the latest trade.
+        """
+        prices = {position.symbol: float(position.market_value) / float(position.qty)
+                  for position in positions if float(position.qty)}
+        entries = {}
+        for order in orders:
+            client_order_id = getattr(order, 'client_order_id', None) or order.id
+            if client_order_id in self.pending:
+                continue
+            value = 0.0
+            remaining = max(0.0, float(order.qty or 0) - float(getattr(order, 'filled_qty', None) or 0))
+            if order.side == 'buy':
+                price = float(getattr(order, 'limit_price', None) or 0) or prices.get(order.symbol)
+                if not price:
+                    try:
+                        price = float(self.api.get_latest_trade(order.symbol).price)
+                    except Exception as e:
+                        self.logger.warning(f"No price for open {order.symbol} order, not reserving it: {e}")
+                        price = 0.0
+                value = remaining * price
+            entries[client_order_id] = (order.symbol, order.side, value, remaining)
+        return entries
+    
+    def _reserve_open_orders(self, open_ids, untracked, synced_from):
+        """
+        Rebuild pending orders and the reserved total from the broker's open orders.
+        
+        Orders already tracked keep their reservation, which fills have been
+        reducing. Tracked orders the broker no longer lists are dropped,
+        unless they were recorded within pending_grace seconds of the sync
+        and may still be on their way.
+        """
+        pending = {}
+        for client_order_id in open_ids:
+            entry = self.pending.get(client_order_id) or untracked.get(client_order_id)
+            if entry is not None:
+                pending[client_order_id] = entry
+        
+        for client_order_id, entry in self.pending.items():
+            if client_order_id not in pending and \
+                    self._recorded_at.get(client_order_id, float('-inf')) >= synced_from - self.pending_grace:
+                pending[client_order_id] = entry
+        
+        self.pending = pending
+        self._recorded_at = {client_order_id: recorded_at for client_order_id, recorded_at in self._recorded_at.items()
+                             if client_order_id in pending}
+        self.reserved = sum(entry[2] for entry in pending.values())
+    
+    def maybe_resync(self):
+        """Reseed from the API if the last sync is older than resync_interval."""
+        if self.last_sync is None or self.clock() - self.last_sync >= self.resync_interval:
+            try:
+                self.seed()
+            except Exception as e:
+                self.logger.error(f"Portfolio resync failed: {e}")
+    
+    def position_qty(self, symbol):
+        """Get the number of shares held and not already being sold by open orders (0 when flat)."""
+        with self._lock:
+            position = self.positions.get(symbol)
+            held = position['qty'] if position is not None else 0.0
+            if held <= 0:
+                return held
+            selling = sum(entry[3] for entry in self.pending.values() if entry[0] == symbol and entry[1] == 'sell')
+            return max(0.0, held - selling)
+    
+    def position_value(self, symbol):
+        """Get the market value of a position at its last known price."""
+        position = self.positions.get(symbol)
+        return position['qty'] * position['last_price'] if position is not None else 0.0
+    
+    def open_positions(self):
+        """Get a snapshot of the open positions."""
+        with self._lock:
+            return {symbol: dict(position) for symbol, position in self.positions.items()}
+    
+    def available_buying_power(self):
+        """Get buying power not already reserved by pending orders."""
+        return self.buying_power - self.reserved
+    
+    def max_trade_value(self, symbol):
+        """
+        Get the largest purchase allowed for a symbol.
+        
+        Risks max_risk_per_trade of equity down to the stop loss, capped by
+        the room left under max_portfolio_allocation and by unreserved
+        buying power.
+        """
+        with self._lock:
+            risk_value = self.equity * self.risk_params['max_risk_per_trade'] / self.risk_params['stop_loss_percentage']
+            room = self.equity * self.risk_params['max_portfolio_allocation'] - self.position_value(symbol)
+            return max(0.0, min(risk_value, room, self.available_buying_power()))
+    
+    def record_order(self, client_order_id, symbol, side, qty, price):
+        """Reserve the value of an order about to be submitted until it fills or is closed."""
+        with self._lock:
+            value = float(qty) * price if side == 'buy' else 0.0
+            self.pending[client_order_id] = (symbol, side, value, float(qty))
+            self._recorded_at[client_order_id] = self.clock()
+            self.reserved += value
+    
+    def release_order(self, client_order_id):
+        """Drop the reservation of an order that was never accepted."""
+        with self._lock:
+            pending = self.pending.pop(client_order_id, None)
+            self._recorded_at.pop(client_order_id, None)
+            if pending is not None:
+                self.reserved -= pending[2]
+    
+    def update_price(self, symbol, price):
+        """Revalue a held position at a new price."""
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                return
+            change = position['qty'] * (price - position['last_price'])
+            position['last_price'] = price
+            self.exposure += change
+            self.equity += change
+    
+    def apply_trade_update(self, update):
+        """
+        Apply one trade update event.
+        
+        Accepts Alpaca stream TradeUpdate objects or anything with the same
+        attributes: event, order (dict), and for fills price, qty and position_qty.
+        """
+        event = getattr(update, 'event', None)
+        order = getattr(update, 'order', None) or {}
+        symbol = order.get('symbol')
+        client_order_id = order.get('client_order_id')
+        
+        with self._lock:
+            self._updates += 1
+            if event in ('fill', 'partial_fill') and symbol:
+                fill_qty = float(update.qty)
+                price = float(update.price)
+                signed_qty = fill_qty if order.get('side') == 'buy' else -fill_qty
+                position = self.positions.get(symbol)
+                old_qty = position['qty'] if position is not None else 0.0
+                new_qty = float(update.position_qty) if getattr(update, 'position_qty', None) is not None \
+                    else old_qty + signed_qty
+                
+                if position is not None:
+                    self.update_price(symbol, price)
+                self.cash -= signed_qty * price
+                self.buying_power -= signed_qty * price
+                self.exposure += (new_qty - old_qty) * price
+                
+                if new_qty == 0:
+                    self.positions.pop(symbol, None)
+                elif position is None or (signed_qty > 0 and old_qty >= 0):
+                    # Buys move the average entry price; sells leave it as is
+                    average = position['avg_entry_price'] if position is not None else 0.0
+                    self.positions[symbol] = {
+                        'qty': new_qty,
+                        'avg_entry_price': (average * old_qty + price * signed_qty) / new_qty,
+                        'last_price': price
+                    }
+                else:
+                    position['qty'] = new_qty
+                
+                # Release the reservation and the open quantity for the part that filled
+                pending = self.pending.get(client_order_id)
+                if pending is not None:
+                    released = min(pending[2], fill_qty * price) if pending[1] == 'buy' else 0.0
+                    self.pending[client_order_id] = (pending[0], pending[1], pending[2] - released,
+                                                     max(0.0, pending[3] - fill_qty))
+                    self.reserved -= released
+            
+            if event in FINAL_EVENTS:
+                self.release_order(client_order_id)
+    
+    def start_stream(self, credentials):
+        """Follow the Alpaca trade_updates stream in a background thread."""
+        try:
+            from alpaca_trade_api.stream import Stream
+        except ImportError:
+            self.logger.warning("alpaca_trade_api streaming is unavailable, relying on periodic resyncs")
+            return
+        
+        stream = Stream(credentials['api_key'], credentials['api_secret'], base_url=credentials['base_url'])
+        
+        async def on_trade_update(update):
+            try:
+                self.apply_trade_update(update)
+            except Exception as e:
+                self.logger.error(f"Could not apply trade update: {e}")
+        
+        stream.subscribe_trade_updates(on_trade_update)
+        self._stream_thread = threading.Thread(target=stream.run, name='trade-updates', daemon=True)
+        self._stream_thread.start()
+        self.logger.info("Following trade updates stream")
+    
+    def attach_stub(self, stub):
+        """Follow the fake trade updates emitted by an AlpacaStub."""
+        stub.subscribe_trade_updates(self.apply_trade_update)
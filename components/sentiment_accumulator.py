@@ -0,0 +1,209 @@
+# components/sentiment_accumulator.py
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+LABEL_DIRECTIONS = {'positive': 1.0, 'negative': -1.0}
+
+class SentimentAccumulator:
+    def __init__(self, aggregation_config=None, confidence_threshold=0.0, clock=time.time):
+        """
+        Initialize the per-ticker streaming sentiment store.
+        
+        Each ticker keeps an exponentially time-decayed sum of signed,
+        source-weighted confidences and the matching decayed sum of weights,
+        in parallel NumPy arrays. Adding an article decays the ticker's sums
+        to the current time and adds the article in O(1). The score is their
+        ratio, a weighted average in -1..1 where recent articles and trusted
+        sources count more. The decayed weight tells how much recent evidence
+        there is, so tickers whose news has gone stale drop below min_weight
+        and read as having no sentiment.
+        
+        Args:
+            aggregation_config: half_life_minutes, min_weight, source_weights
+                (source name -> weight, with 'default' for unlisted sources),
+                cluster_weight and max_seen_articles
+            confidence_threshold: Results below this confidence are ignored
+            clock: Returns the current time in epoch seconds
+        """
+        self.logger = logging.getLogger('SentimentAccumulator')
+        self.configure(aggregation_config, confidence_threshold)
+        self.clock = clock
+        
+        self._index = {}  # ticker -> row
+        self._score_sum = np.zeros(64)
+        self._weight_sum = np.zeros(64)
+        self._updated_at = np.zeros(64)
+        self._seen = OrderedDict()  # (ticker, article id) pairs already added
+        self._lock = threading.Lock()
+    
+    def configure(self, aggregation_config=None, confidence_threshold=0.0):
+        """
+        Set the weighting parameters; accumulated sums are kept.
+        
+        A new half-life applies from the next decay onward, so scores change
+        smoothly rather than being recomputed from history.
+        """
+        aggregation_config = aggregation_config or {}
+        self.half_life = aggregation_config.get('half_life_minutes', 120) * 60.0
+        self.min_weight = aggregation_config.get('min_weight', 0.25)
+        self.source_weights = dict(aggregation_config.get('source_weights') or {})
+        self.default_source_weight = self.source_weights.pop('default', 1.0)
+        # Stories carried by several outlets count 1 + cluster_weight * log2(outlets) times
+        self.cluster_weight = aggregation_config.get('cluster_weight', 0.0)
+        self.max_seen = aggregation_config.get('max_seen_articles', 100000)
+        self.confidence_threshold = confidence_threshold
+    
+    def _row(self, ticker):
+        """Get a ticker's row, growing the arrays when they are full."""
+        row = self._index.get(ticker)
+        if row is None:
+            row = len(self._index)
+            if row == len(self._score_sum):
+                self._score_sum = np.concatenate([self._score_sum, np.zeros(row)])
+                self._weight_sum = np.concatenate([self._weight_sum, np.zeros(row)])
+                self._updated_at = np.concatenate([self._updated_at, np.zeros(row)])
+            self._index[ticker] = row
+        return row
+    
+    def add(self, ticker, result, source=None, published=None, article_id=None, cluster_size=1):
+        """
+        Add one scored article to a ticker's running score.
+        
+        Args:
+            result: Sentiment result dict with 'label' and 'confidence'
+            source: RSS source name used to look up the article's weight
+            published: Publication time in epoch seconds (defaults to now)
+            article_id: Optional id; an article already added for the ticker is ignored
+            cluster_size: Number of outlets that carried the story
+        
+        Returns:
+            True if the article was added
+        """
+        if result['confidence'] < self.confidence_threshold:
+            return False
+        
+        now = self.clock()
+        published = now if published is None or math.isnan(published) else min(published, now)
+        weight = self.source_weights.get(source, self.default_source_weight)
+        if cluster_size > 1:
+            weight *= 1.0 + self.cluster_weight * math.log2(cluster_size)
+        
+        with self._lock:
+            if article_id is not None:
+                key = (ticker, article_id)
+                if key in self._seen:
+                    return False
+                self._seen[key] = None
+                if len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+            
+            row = self._row(ticker)
+            # Bring the sums to now, then add the article decayed by its age
+            decay = 0.5 ** ((now - self._updated_at[row]) / self.half_life)
+            age_decay = 0.5 ** ((now - published) / self.half_life)
+            self._score_sum[row] = self._score_sum[row] * decay + \
+                weight * age_decay * result['confidence'] * LABEL_DIRECTIONS.get(result['label'], 0.0)
+            self._weight_sum[row] = self._weight_sum[row] * decay + weight * age_decay
+            self._updated_at[row] = now
+        return True
+    
+    def add_articles(self, ticker, results, sources=None, published=None, article_ids=None, cluster_sizes=None):
+        """Add several scored articles for one ticker; the metadata lists are aligned with results."""
+        added = 0
+        for position, result in enumerate(results):
+            added += self.add(
+                ticker, result,
+                source=sources[position] if sources is not None else None,
+                published=published[position] if published is not None else None,
+                article_id=article_ids[position] if article_ids is not None else None,
+                cluster_size=cluster_sizes[position] if cluster_sizes is not None else 1
+            )
+        return added
+    
+    def add_news(self, ticker, articles, results):
+        """Add scored Articles from collect_rss_data, using their source, publication time, ID and cluster size."""
+        return self.add_articles(
+            ticker, results,
+            sources=[article.source for article in articles],
+            published=[article.published for article in articles],
+            article_ids=[article.article_id for article in articles],
+            cluster_sizes=[article.cluster_size for article in articles]
+        )
+    
+    def export(self, tickers, remove=True):
+        """
+        Get the accumulated state of some tickers, so another accumulator can continue them.
+        
+        Args:
+            tickers: Tickers to export; tickers without state are left out
+            remove: Also clear the tickers here
+        
+        Returns:
+            Dict of ticker -> (score sum, weight sum, updated at, list of article ids already added)
+        """
+        tickers = set(tickers)
+        with self._lock:
+            seen = {}
+            for ticker, article_id in self._seen:
+                if ticker in tickers:
+                    seen.setdefault(ticker, []).append(article_id)
+            
+            rows = {}
+            for ticker in tickers:
+                row = self._index.get(ticker)
+                if row is None:
+                    continue
+                rows[ticker] = (float(self._score_sum[row]), float(self._weight_sum[row]),
+                                float(self._updated_at[row]), seen.get(ticker, []))
+                if remove:
+                    self._score_sum[row] = self._weight_sum[row] = self._updated_at[row] = 0.0
+            if remove:
+                for ticker, article_ids in seen.items():
+                    for article_id in article_ids:
+                        del self._seen[(ticker, article_id)]
+        return rows
+    
+    def restore(self, rows):
+        """Continue tickers from the output of another accumulator's export(), replacing their state here."""
+        with self._lock:
+            for ticker, (score_sum, weight_sum, updated_at, article_ids) in rows.items():
+                row = self._row(ticker)
+                self._score_sum[row] = score_sum
+                self._weight_sum[row] = weight_sum
+                self._updated_at[row] = updated_at
+                for article_id in article_ids:
+                    self._seen[(ticker, article_id)] = None
+            while len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+    
+    def scores(self, tickers):
+        """
+        Get current scores for several tickers.
+        
+        Returns:
+            (scores, weights): arrays aligned with tickers; tickers without
+            enough recent evidence have score 0 and weight 0
+        """
+        now = self.clock()
+        with self._lock:
+            rows = np.fromiter((self._index.get(ticker, -1) for ticker in tickers), dtype=np.int64, count=len(tickers))
+            known = rows >= 0
+            safe_rows = np.where(known, rows, 0)
+            weights = np.where(known, self._weight_sum[safe_rows], 0.0)
+            sums = np.where(known, self._score_sum[safe_rows], 0.0)
+            decay = 0.5 ** ((now - self._updated_at[safe_rows]) / self.half_life)
+        
+        # Decay cancels out of the score but not out of the evidence weight
+        evidence = weights * decay
+        active = evidence >= self.min_weight
+        scores = np.divide(sums, weights, out=np.zeros(len(tickers)), where=active)
+        return scores, np.where(active, evidence, 0.0)
+    
+    def score(self, ticker):
+        """Get (score, weight) for one ticker."""
+        scores, weights = self.scores([ticker])
+        return float(scores[0]), float(weights[0])
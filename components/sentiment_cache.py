@@ -0,0 +1,167 @@
+# components/sentiment_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class SentimentCache:
+    def __init__(self, model_name, path="./models/sentiment_cache.db", max_entries=50000, ttl_seconds=604800):
+        """
+        Initialize a content-hash sentiment cache.
+        
+        Results live in an in-memory LRU bounded by max_entries and expire after
+        ttl_seconds. Every insert is also written to a SQLite file so a restart
+        can reload the cache instead of re-scoring the whole news backlog.
+        
+        Args:
+            model_name: Name of the sentiment model (part of every cache key)
+            path: SQLite file used for persistence, or None for memory only
+            max_entries: Maximum number of cached results
+            ttl_seconds: Age after which a cached result is discarded
+        """
+        self.logger = logging.getLogger('SentimentCache')
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._writes_since_prune = 0
+        
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._connection = sqlite3.connect(self.path, check_same_thread=False)
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS sentiment ("
+                    "key TEXT PRIMARY KEY, label TEXT NOT NULL, "
+                    "confidence REAL NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._connection.commit()
+                self._load()
+            except sqlite3.Error as e:
+                self.logger.error(f"Could not open sentiment cache at {self.path}, using memory only: {e}")
+                self._connection = None
+    
+    @staticmethod
+    def normalize_text(text):
+        """Collapse whitespace so trivially different copies of a text share a key."""
+        return " ".join(text.split())
+    
+    def make_key(self, text):
+        """Build the cache key for a text: a hash of the model name and normalized text."""
+        payload = f"{self.model_name}\n{self.normalize_text(text)}".encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()
+    
+    def lookup(self, texts):
+        """
+        Look up cached results for a list of texts.
+        
+        Returns:
+            Tuple of (keys, results) where results[i] is None on a miss
+        """
+        keys = [self.make_key(text) for text in texts]
+        results = []
+        expires_before = time.time() - self.ttl_seconds
+        
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[2] < expires_before:
+                    del self._entries[key]
+                    entry = None
+                
+                if entry is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    results.append({'label': entry[0], 'confidence': entry[1]})
+        
+        return keys, results
+    
+    def store(self, keys, results):
+        """Insert results for the given keys and persist them."""
+        now = time.time()
+        rows = [(key, result['label'], float(result['confidence']), now) for key, result in zip(keys, results)]
+        if len(rows) == 0:
+            return
+        
+        with self._lock:
+            for key, label, confidence, created_at in rows:
+                self._entries[key] = (label, confidence, created_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            
+            if self._connection is not None:
+                try:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO sentiment (key, label, confidence, created_at) VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+                    self._writes_since_prune += len(rows)
+                    if self._writes_since_prune >= max(1000, self.max_entries // 10):
+                        self._prune()
+                    self._connection.commit()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error persisting sentiment cache: {e}")
+    
+    def get_stats(self):
+        """Get hit/miss counters for the cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total > 0 else 0.0,
+                'entries': len(self._entries)
+            }
+    
+    def close(self):
+        """Prune and close the persistent store."""
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._prune()
+                    self._connection.commit()
+                    self._connection.close()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error closing sentiment cache: {e}")
+                self._connection = None
+    
+    def _load(self):
+        """Load the newest unexpired results from disk into memory."""
+        rows = self._connection.execute(
+            "SELECT key, label, confidence, created_at FROM sentiment "
+            "WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?",
+            (time.time() - self.ttl_seconds, self.max_entries)
+        ).fetchall()
+        
+        # Insert oldest first so the newest entries end up most recently used
+        for key, label, confidence, created_at in reversed(rows):
+            self._entries[key] = (label, confidence, created_at)
+        
+        self.logger.info(f"Loaded {len(rows)} cached sentiment results from {self.path}")
+    
+    def _prune(self):
+        """Drop expired rows and keep the on-disk table within max_entries (caller holds the lock)."""
+        self._connection.execute(
+            "DELETE FROM sentiment WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        self._connection.execute(
+            "DELETE FROM sentiment WHERE key NOT IN "
+            "(SELECT key FROM sentiment ORDER BY created_at DESC LIMIT ?)",
+            (self.max_entries,)
+        )
+        self._writes_since_prune = 0
@@ -0,0 +1,266 @@
+# components/sentiment_workers.py
+import itertools
+import logging
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from components.metrics import REGISTRY
+
+class SentimentWorkerPool:
+    def __init__(self, analyzer, model_config, workers, threads_per_worker=1):
+        """
+        Initialize a pool of sentiment inference processes.
+        
+        When this process has a single thread and the platform has fork, the
+        workers are forked from the process that already loaded the model,
+        so they share its weights copy-on-write instead of each loading a
+        copy (inference never writes to them). Once other threads run
+        (logging, metrics server, feed event loop, or a background model
+        load), forking could copy a lock another thread holds and deadlock
+        the child, so workers are started from a forkserver (or spawned).
+        The fp32 torch model is then moved to shared memory and the analyzer
+        is sent to the workers, which map the same weights rather than
+        loading FinBERT again; the torch-int8 and onnxruntime backends (and
+        GPU models) are instead built in each worker from model_config,
+        loading their cached artifacts. Requests are split into one chunk per worker, sent over a
+        queue and resolved as futures by a collector thread, so the caller is
+        never blocked by inference and is not limited by the GIL. Requests
+        with a chunk in a worker that dies fail at once, and the metrics
+        workers record are sent back with their results and added to this
+        process's registry.
+        
+        Args:
+            analyzer: The SentimentAnalyzer whose model the workers use
+            model_config: The model configuration (used when workers cannot fork)
+            workers: Number of worker processes
+            threads_per_worker: torch intra-op threads in each worker
+        """
+        self.logger = logging.getLogger('SentimentWorkerPool')
+        self.workers = workers
+        self.chunk_size = analyzer.batch_size
+        
+        methods = multiprocessing.get_all_start_methods()
+        if 'fork' in methods and threading.active_count() == 1:
+            method = 'fork'
+        else:
+            method = 'forkserver' if 'forkserver' in methods else 'spawn'
+        context = multiprocessing.get_context(method)
+        source = analyzer if method == 'fork' else model_config
+        if method != 'fork' and analyzer.backend.name == 'torch' and not analyzer.use_gpu:
+            # Shared-memory tensors are pickled as handles to the same pages
+            analyzer.model.share_memory()
+            source = analyzer
+        
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._pending = {}  # chunk id -> (request state, offset)
+        # Chunk each worker is scoring (-1 when idle), in shared memory so it survives the worker dying
+        self._current = context.Array('q', [-1] * workers, lock=False)
+        self._dead = set()  # Indices of workers that died
+        self._closing = False
+        self._chunk_ids = itertools.count()
+        self._lock = threading.Lock()
+        
+        self._processes = []
+        for index in range(workers):
+            process = context.Process(
+                target=_worker_main,
+                args=(source, self._requests, self._results, threads_per_worker, self._current, index),
+                name=f"sentiment-{index}", daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        
+        self._collector = threading.Thread(target=self._collect, name='sentiment-results', daemon=True)
+        self._collector.start()
+        self.logger.info(f"Started {workers} sentiment workers ({method}, {threads_per_worker} torch threads each)")
+    
+    def submit(self, texts):
+        """
+        Score texts in the workers without waiting.
+        
+        Returns:
+            Future resolving to (results, indices of texts that failed)
+        """
+        future = Future()
+        if not texts:
+            future.set_result(([], []))
+            return future
+        if len(self._dead) == len(self._processes):
+            future.set_exception(RuntimeError("No sentiment workers are running"))
+            return future
+        
+        # Spread the texts over the workers, but keep every chunk at least a full batch
+        chunk_size = max(self.chunk_size, math.ceil(len(texts) / self.workers))
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        state = {'future': future, 'results': [None] * len(texts), 'failed': [], 'remaining': len(chunks)}
+        
+        with self._lock:
+            chunk_ids = [next(self._chunk_ids) for _ in chunks]
+            for chunk_id, start in zip(chunk_ids, range(0, len(texts), chunk_size)):
+                self._pending[chunk_id] = (state, start)
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            self._requests.put((chunk_id, chunk))
+        return future
+    
+    def discard(self, future):
+        """Forget a request the caller stopped waiting for; results of its chunks are dropped."""
+        with self._lock:
+            states = {id(state): state for state, _ in self._pending.values() if state['future'] is future}
+            for state in states.values():
+                self._fail(state)
+    
+    def _collect(self):
+        """Match worker results to their requests, and notice workers that died."""
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._results.get(timeout=1.0)
+            except queue.Empty:
+                message = ()
+            if time.monotonic() - last_check >= 1.0:
+                last_check = time.monotonic()
+                self._check_workers()
+            if message is None:
+                return
+            if not message:
+                continue
+            chunk_id, results, failed, error, metrics = message
+            REGISTRY.merge(metrics)
+            
+            with self._lock:
+                state, offset = self._pending.pop(chunk_id, (None, 0))
+                if state is None:
+                    continue
+                if error is not None:
+                    self._fail(state)
+                    if not state['future'].done():
+                        state['future'].set_exception(RuntimeError(f"Sentiment worker failed: {error}"))
+                    continue
+                
+                state['results'][offset:offset + len(results)] = results
+                state['failed'].extend(offset + index for index in failed)
+                state['remaining'] -= 1
+                done = state['remaining'] == 0
+            
+            if done:
+                state['future'].set_result((state['results'], sorted(state['failed'])))
+    
+    def _fail(self, state):
+        """Forget every chunk of a request (call with the lock held)."""
+        chunk_ids = [chunk_id for chunk_id, value in self._pending.items() if value[0] is state]
+        for chunk_id in chunk_ids:
+            del self._pending[chunk_id]
+    
+    def _check_workers(self):
+        """Fail the requests that had a chunk in a worker that died (every pending request once none are left)."""
+        if self._closing:
+            return
+        dead = {index for index, process in enumerate(self._processes) if not process.is_alive()} - self._dead
+        if not dead:
+            return
+        self._dead |= dead
+        for index in dead:
+            process = self._processes[index]
+            self.logger.error(f"Sentiment worker {process.name} (process {process.pid}) died "
+                              f"with exit code {process.exitcode}")
+        REGISTRY.inc('sentiment_worker_deaths_total', len(dead))
+        
+        none_left = len(self._dead) == len(self._processes)
+        lost = {self._current[index] for index in dead}
+        with self._lock:
+            states = {id(state): state for chunk_id, (state, _) in self._pending.items()
+                      if none_left or chunk_id in lost}
+            for state in states.values():
+                self._fail(state)
+        for state in states.values():
+            if not state['future'].done():
+                state['future'].set_exception(RuntimeError("Sentiment worker died while scoring"))
+    
+    def close(self):
+        """Stop the worker processes."""
+        self._closing = True
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._processes = []
+
+def _worker_main(source, requests, results, threads, current, index):
+    """Worker process loop: score chunks of texts until told to stop."""
+    import torch
+    torch.set_num_threads(threads)
+    
+    if isinstance(source, dict):
+        from components.ai_model import SentimentAnalyzer
+        config = dict(source, sentiment_analysis=dict(source['sentiment_analysis'], workers=0, cache={'enabled': False}))
+        analyzer = SentimentAnalyzer(config)
+    else:
+        analyzer = source
+        # Runtime sessions hold threads that do not survive a fork
+        reopen = getattr(analyzer.backend, 'reopen', None)
+        if reopen is not None:
+            reopen(threads)
+    
+    # A forked worker starts with a copy of the parent's series; only what it records itself is sent back
+    REGISTRY.drain()
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        chunk_id, texts = request
+        current[index] = chunk_id
+        try:
+            scored, failed = analyzer._score_local(texts)
+            results.put((chunk_id, scored, failed, None, REGISTRY.drain()))
+        except Exception as e:
+            results.put((chunk_id, None, None, str(e), REGISTRY.drain()))
+
+def main():
+    """Benchmark sentiment throughput in process and with 1 to N worker processes."""
+    import argparse
+    import copy
+    import os
+    import time
+    from components.ai_model import SentimentAnalyzer
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Benchmark sentiment worker scaling")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--texts', type=int, default=2048)
+    parser.add_argument('--threads', type=int, default=1, help="torch threads per worker")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    model_config = ConfigManager(args.config).get_model_config()
+    samples = ["Shares surge after record quarterly revenue", "Company cuts full-year guidance amid weak demand",
+               "Regulators open probe into accounting practices", "Board approves dividend increase and buyback"]
+    texts = [samples[i % len(samples)] + f" (update {i})" for i in range(args.texts)]
+    
+    baseline = None
+    for workers in range(0, args.max_workers + 1):
+        config = copy.deepcopy(model_config)
+        config['sentiment_analysis'].update(workers=workers, torch_threads_per_worker=args.threads,
+                                            cache={'enabled': False})
+        analyzer = SentimentAnalyzer(config)
+        analyzer.analyze_sentiment(texts[:64])  # Warm up
+        
+        started = time.perf_counter()
+        analyzer.analyze_sentiment(texts)
+        rate = len(texts) / (time.perf_counter() - started)
+        analyzer.close()
+        
+        baseline = baseline or rate
+        label = 'in process' if workers == 0 else f"{workers} workers"
+        print(f"{label}: {rate:.1f} texts/s ({rate / baseline:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
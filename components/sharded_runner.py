@@ -0,0 +1,836 @@
+# components/sharded_runner.py
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+from collections import namedtuple
+from multiprocessing.connection import Client, Listener, wait
+from components.config_records import GatewayConfig, RateLimitConfig, ShardingConfig
+from components.config_reload import ConfigReloader
+from components.metrics import REGISTRY
+
+# What a shard needs of an article to accumulate its sentiment, without the article text
+ArticleRef = namedtuple('ArticleRef', ['article_id', 'source', 'published', 'cluster_size'])
+
+def shard_for(ticker, shard_ids):
+    """
+    Pick a ticker's shard by rendezvous hashing.
+    
+    Every ticker goes to the shard with the highest hash of (shard, ticker),
+    so adding or removing a shard only moves the tickers that shard gains or
+    loses.
+    """
+    return max(shard_ids, key=lambda shard: hashlib.blake2b(f"{shard}:{ticker}".encode('utf-8'), digest_size=8).digest())
+
+class ShardMap:
+    def __init__(self, shard_ids):
+        """
+        Track which shard owns each ticker.
+        
+        New tickers are placed by rendezvous hashing. rebalance() then moves
+        tickers off shards that take longer than the others, and the moves
+        stick until the ticker leaves the universe.
+        """
+        self.shard_ids = list(shard_ids)
+        self.owner = {}  # ticker -> shard
+    
+    def assign(self, tickers):
+        """
+        Bring the map in line with a ticker universe.
+        
+        Returns:
+            Set of shards whose tickers changed
+        """
+        universe = set(tickers)
+        changed = set()
+        for ticker in [ticker for ticker in self.owner if ticker not in universe]:
+            changed.add(self.owner.pop(ticker))
+        for ticker in tickers:
+            if ticker not in self.owner:
+                self.owner[ticker] = shard_for(ticker, self.shard_ids)
+                changed.add(self.owner[ticker])
+        return changed
+    
+    def remove(self, shard):
+        """
+        Drop a shard and place its tickers on the remaining shards by rendezvous hashing.
+        
+        Returns:
+            List of the tickers that moved
+        """
+        self.shard_ids.remove(shard)
+        moved = [ticker for ticker, owner in self.owner.items() if owner == shard]
+        for ticker in moved:
+            self.owner[ticker] = shard_for(ticker, self.shard_ids)
+        return moved
+    
+    def shards(self):
+        """Get shard -> list of tickers, with an entry for every shard."""
+        assignment = {shard: [] for shard in self.shard_ids}
+        for ticker, shard in self.owner.items():
+            assignment[shard].append(ticker)
+        return assignment
+    
+    def rebalance(self, costs, tolerance=0.2):
+        """
+        Move tickers from the most to the least loaded shard until loads are within tolerance of the mean.
+        
+        Args:
+            costs: Dict of ticker -> recent processing cost (tickers without one count as the mean cost)
+            tolerance: Allowed excess over the mean shard load, as a fraction
+        
+        Returns:
+            List of (ticker, old shard, new shard) moves
+        """
+        if len(self.shard_ids) < 2 or not self.owner:
+            return []
+        known = [costs[ticker] for ticker in self.owner if ticker in costs]
+        default = sum(known) / len(known) if known else 1.0
+        cost = {ticker: costs.get(ticker, default) for ticker in self.owner}
+        loads = {shard: 0.0 for shard in self.shard_ids}
+        for ticker, shard in self.owner.items():
+            loads[shard] += cost[ticker]
+        limit = sum(loads.values()) / len(loads) * (1 + tolerance)
+        
+        moves = []
+        for _ in range(len(self.owner)):
+            heaviest = max(loads, key=loads.get)
+            lightest = min(loads, key=loads.get)
+            gap = loads[heaviest] - loads[lightest]
+            if loads[heaviest] <= limit:
+                break
+            # The largest ticker that still narrows the gap
+            candidates = [ticker for ticker, shard in self.owner.items() if shard == heaviest and cost[ticker] < gap]
+            if not candidates:
+                break
+            ticker = max(candidates, key=lambda candidate: min(cost[candidate], gap - cost[candidate]))
+            self.owner[ticker] = lightest
+            loads[heaviest] -= cost[ticker]
+            loads[lightest] += cost[ticker]
+            moves.append((ticker, heaviest, lightest))
+        return moves
+
+class ShardWorker:
+    def __init__(self, config_manager, technical_analyzer, trading_strategy, sentiment_accumulator=None,
+                 indicator_max_age=None):
+        """
+        Process the tickers of one shard: indicators and decisions.
+        
+        The worker owns its bar cache, indicator cache and accumulated
+        sentiment for the tickers it is assigned. It gets scored news from
+        the coordinator and returns the decisions to trade. Orders are left to
+        the coordinator's gateway.
+        """
+        self.logger = logging.getLogger('ShardWorker')
+        self.config_manager = config_manager
+        self.technical_analyzer = technical_analyzer
+        self.trading_strategy = trading_strategy
+        self.sentiment_accumulator = sentiment_accumulator
+        self.indicator_max_age = indicator_max_age
+        self.tickers = set()
+        # Thresholds and indicator specs follow config.yaml; the ticker universe follows assign()
+        config_manager.add_listener(ConfigReloader(None, technical_analyzer, trading_strategy, sentiment_accumulator))
+    
+    def release(self, tickers):
+        """
+        Hand tickers over to another shard.
+        
+        Returns:
+            Accumulated sentiment of the tickers (SentimentAccumulator.export),
+            to pass on to the assign() of the shard taking them over
+        """
+        tickers = set(tickers) & self.tickers
+        self.technical_analyzer.invalidate_indicators(tickers)
+        self.tickers -= tickers
+        if self.sentiment_accumulator is None or not tickers:
+            return {}
+        return self.sentiment_accumulator.export(tickers)
+    
+    def assign(self, tickers, sentiment=None):
+        """
+        Take over a new set of tickers.
+        
+        Cached indicators and accumulated sentiment of the tickers handed
+        elsewhere are dropped, and tickers moved from another shard continue
+        from the sentiment released there.
+        
+        Args:
+            tickers: Every ticker the shard owns from now on
+            sentiment: Optional dict from another shard's release()
+        """
+        tickers = set(tickers)
+        released = self.tickers - tickers
+        self.technical_analyzer.invalidate_indicators(released)
+        if self.sentiment_accumulator is not None:
+            if released:
+                self.sentiment_accumulator.export(released)
+            if sentiment:
+                self.sentiment_accumulator.restore(sentiment)
+        self.tickers = tickers
+        self.logger.info(f"Assigned {len(tickers)} tickers ({len(released)} released, "
+                         f"{len(sentiment or ())} with sentiment history)")
+    
+    def process(self, items):
+        """
+        Decide for the tickers of one cycle.
+        
+        Args:
+            items: Dict of ticker -> (list of ArticleRef, list of sentiment results)
+        
+        Returns:
+            Dict of ticker -> decision, for decisions other than HOLD
+        """
+        self.config_manager.check_for_changes()
+        sentiment_by_ticker = {}
+        for ticker, (refs, results) in items.items():
+            if self.sentiment_accumulator is not None:
+                self.sentiment_accumulator.add_news(ticker, refs, results)
+            sentiment_by_ticker[ticker] = results
+        
+        indicators = self.technical_analyzer.calculate_indicators_for(
+            list(items), self.config_manager.get_indicators_config(), max_age=self.indicator_max_age
+        )
+        ready = {ticker: value for ticker, value in indicators.items() if value and len(value) > 0}
+        skipped = len(items) - len(ready)
+        if skipped:
+            self.logger.warning(f"Skipping trading decisions for {skipped} tickers due to missing technical indicators")
+        decisions = self.trading_strategy.make_trading_decisions(
+            {ticker: sentiment_by_ticker[ticker] for ticker in ready}, ready
+        )
+        return {ticker: decision for ticker, decision in decisions.items() if decision['action'] != 'HOLD'}
+
+def build_shard_worker(config_manager, shard_id):
+    """Build a shard worker with its own broker connection for bars and its own bar store directory."""
+    import alpaca_trade_api as tradeapi
+    from components.bar_store import BarStore
+    from components.sentiment_accumulator import SentimentAccumulator
+    from components.technical_analysis import TechnicalAnalyzer
+    from components.trading_strategy import TradingStrategy
+    
+    credentials = config_manager.get_alpaca_credentials()
+    api = tradeapi.REST(
+        key_id=credentials['api_key'],
+        secret_key=credentials['api_secret'],
+        base_url=credentials['base_url'],
+        api_version='v2'
+    )
+    market_data_config = config_manager.get_market_data_config()
+    bar_store = None
+    if market_data_config.bar_store_enabled:
+        bar_store = BarStore(os.path.join(market_data_config.bar_store_path, f"shard-{shard_id}"))
+    technical_analyzer = TechnicalAnalyzer(api, bar_store, bulk_chunk_size=market_data_config.bulk_chunk_size)
+    
+    sentiment_accumulator = None
+    model_config = config_manager.get_model_config()
+    aggregation_config = model_config['sentiment_analysis'].get('aggregation') or {}
+    if aggregation_config.get('enabled', False):
+        sentiment_accumulator = SentimentAccumulator(
+            aggregation_config, model_config['sentiment_analysis']['confidence_threshold']
+        )
+    return ShardWorker(
+        config_manager, technical_analyzer, TradingStrategy(config_manager, sentiment_accumulator),
+        sentiment_accumulator, config_manager.get_pipeline_config().indicator_max_age
+    )
+
+def run_worker(address, authkey, config_path, factory=build_shard_worker, log_level=None):
+    """
+    Serve one shard: connect to the coordinator, get a shard ID and process its cycles until told to stop.
+    
+    Used both for local worker processes and for workers on other nodes
+    (python -m components.sharded_runner worker --connect HOST:PORT).
+    """
+    from components.config_manager import ConfigManager
+    from components.structured_logging import configure_logging
+    
+    connection = Client(address, authkey=authkey)
+    connection.send(('hello', socket.gethostname(), os.getpid()))
+    _, shard_id = connection.recv()
+    
+    config = ConfigManager(config_path)
+    # Workers log to the console only; one rotating file shared by several processes would corrupt rotation
+    log_config = config.get_logging_config()._replace(log_to_file=False, rate_limit=RateLimitConfig.from_dict(None))
+    if log_level:
+        log_config = log_config._replace(level=log_level)
+    configure_logging(log_config)
+    logger = logging.getLogger('ShardWorker')
+    worker = factory(config, shard_id)
+    logger.info(f"Shard {shard_id} ready in process {os.getpid()}")
+    
+    try:
+        while True:
+            message = connection.recv()
+            if message[0] == 'assign':
+                worker.assign(message[1], message[2])
+            elif message[0] == 'release':
+                connection.send(('released', worker.release(message[1])))
+            elif message[0] == 'cycle':
+                _, cycle, items = message
+                started = time.perf_counter()
+                try:
+                    decisions = worker.process(items)
+                except Exception as e:
+                    logger.error(f"Shard {shard_id} failed cycle {cycle}: {e}")
+                    connection.send(('error', cycle, shard_id, str(e)))
+                    continue
+                connection.send(('decisions', cycle, shard_id, decisions, time.perf_counter() - started))
+            elif message[0] == 'stop':
+                break
+    except EOFError:
+        logger.warning(f"Shard {shard_id} lost its coordinator")
+    finally:
+        connection.close()
+
+class OrderGateway:
+    def __init__(self, order_executor, portfolio_state=None, gateway_config=None):
+        """
+        Submit the orders of every shard through one place that enforces portfolio-wide limits.
+        
+        Shards decide independently, so limits that depend on the whole
+        portfolio are applied here. Decisions are taken strongest first, so
+        when a limit binds, the most confident buys go through. Sells always
+        pass because they only reduce risk. Each accepted buy's value is
+        estimated with the same sizing the executor uses and counted against
+        buying power and gross exposure for the buys after it, and the buy
+        that reaches the exposure limit is capped to the room left.
+        
+        Args:
+            gateway_config: GatewayConfig with max_orders_per_cycle,
+                max_open_positions and max_gross_exposure (fraction of equity
+                in positions and pending orders); unset limits are not enforced
+        """
+        gateway_config = gateway_config or GatewayConfig.from_dict(None)
+        self.logger = logging.getLogger('OrderGateway')
+        self.order_executor = order_executor
+        self.portfolio_state = portfolio_state
+        self.max_orders_per_cycle = gateway_config.max_orders_per_cycle
+        self.max_open_positions = gateway_config.max_open_positions
+        self.max_gross_exposure = gateway_config.max_gross_exposure
+    
+    def _rejection(self, ticker, accepted, opened, committed, state):
+        """Get the reason a BUY would break a global limit, or None."""
+        if self.max_orders_per_cycle is not None and accepted >= self.max_orders_per_cycle:
+            return 'orders_per_cycle'
+        if state is None:
+            return None
+        if self.max_open_positions is not None and state.position_qty(ticker) <= 0:
+            held = sum(1 for position in state.positions.values() if position['qty'] > 0)
+            if held + opened >= self.max_open_positions:
+                return 'open_positions'
+        if self.max_gross_exposure is not None and self._exposure_room(committed, state) <= 0:
+            return 'gross_exposure'
+        return None
+    
+    def _exposure_room(self, committed, state):
+        """Get the value that can still be bought under max_gross_exposure."""
+        return state.equity * self.max_gross_exposure - state.exposure - state.reserved - committed
+    
+    def execute(self, decisions):
+        """
+        Apply the global limits and submit the remaining orders concurrently.
+        
+        Args:
+            decisions: Dict of ticker -> decision from every shard
+        
+        Returns:
+            Dict of ticker -> trade result (None for failed, skipped or rejected trades)
+        """
+        state = self.portfolio_state
+        ordered = sorted(decisions.items(), key=lambda item: -item[1].get('confidence', 0.0))
+        accepted = {}
+        rejected = {}
+        opened = 0
+        committed = 0.0  # Estimated value of the buys accepted so far
+        for ticker, decision in ordered:
+            if decision['action'] == 'BUY':
+                reason = self._rejection(ticker, len(accepted), opened, committed, state)
+                if reason is not None:
+                    rejected[ticker] = reason
+                    REGISTRY.inc('gateway_rejected_total', reason=reason)
+                    continue
+                if state is not None:
+                    if state.position_qty(ticker) <= 0:
+                        opened += 1
+                    # Buying power already promised to earlier buys is not available to this one
+                    value = max(0.0, min(state.max_trade_value(ticker), state.available_buying_power() - committed))
+                    if self.max_gross_exposure is not None:
+                        room = self._exposure_room(committed, state)
+                        if value > room:
+                            value = room
+                            decision = dict(decision, max_value=room)
+                    committed += value
+            accepted[ticker] = decision
+        
+        if rejected:
+            self.logger.info(f"Held back {len(rejected)} buys at global limits: "
+                             f"{', '.join(f'{ticker} ({reason})' for ticker, reason in rejected.items())}")
+        results = self.order_executor.execute_trades(accepted) if accepted else {}
+        results.update((ticker, None) for ticker in rejected)
+        return results
+
+class ShardCoordinator:
+    def __init__(self, config_manager, data_collector, sentiment_analyzer, order_gateway, sharding_config=None,
+                 worker_factory=build_shard_worker, worker_log_level=None):
+        """
+        Run trading cycles over a ticker universe split across worker processes.
+        
+        Each cycle the coordinator collects feeds and matches articles to
+        tickers once. It then scores every article once, however many tickers
+        it mentions, and sends each shard the scored news for its tickers.
+        Shards fetch bars, compute indicators and decide in parallel, and
+        their decisions go through one OrderGateway. Workers are local
+        processes, or processes on other nodes that connect to host:port with
+        the shared authkey; both use the same multiprocessing.connection
+        protocol. With workers 0 and no remote workers, one shard runs inside
+        the coordinator. Shards are rebalanced every rebalance_interval
+        cycles from how long each one took. A shard whose worker disconnects
+        is dropped and its tickers are spread over the remaining shards from
+        the next cycle on.
+        
+        Args:
+            sharding_config: ShardingConfig (workers, remote_workers, host,
+                port, authkey, rebalance_interval, rebalance_tolerance,
+                cycle_timeout and connect_timeout)
+            worker_factory: Picklable function (config_manager, shard_id) -> ShardWorker
+        """
+        sharding_config = sharding_config or ShardingConfig.from_dict(None)
+        self.logger = logging.getLogger('ShardCoordinator')
+        self.config_manager = config_manager
+        self.data_collector = data_collector
+        self.sentiment_analyzer = sentiment_analyzer
+        self.order_gateway = order_gateway
+        self.worker_factory = worker_factory
+        self.worker_log_level = worker_log_level
+        
+        self.workers = sharding_config.workers
+        self.remote_workers = sharding_config.remote_workers
+        self.host = sharding_config.host
+        self.port = sharding_config.port
+        authkey = os.environ.get('TRADING_SHARD_AUTHKEY') or sharding_config.authkey
+        if not authkey and self.remote_workers:
+            raise ValueError("Remote shard workers need trading.sharding.authkey or TRADING_SHARD_AUTHKEY")
+        self.authkey = authkey.encode('utf-8') if authkey else secrets.token_bytes(16)
+        self.rebalance_interval = sharding_config.rebalance_interval
+        self.rebalance_tolerance = sharding_config.rebalance_tolerance
+        self.cycle_timeout = sharding_config.cycle_timeout
+        self.connect_timeout = sharding_config.connect_timeout
+        
+        self.shard_map = None
+        self.cycle = 0
+        self.costs = {}  # ticker -> smoothed seconds per cycle
+        self._connections = {}  # shard -> Connection
+        self._assigned = {}  # shard -> set of tickers last sent to it
+        self._processes = []
+        self._local = None  # In-process shard when there are no workers
+        self._listener = None
+    
+    def start(self):
+        """Start the local worker processes and wait until every expected worker has connected."""
+        expected = self.workers + self.remote_workers
+        if expected == 0:
+            self._local = self.worker_factory(self.config_manager, 0)
+            self.shard_map = ShardMap([0])
+            return
+        
+        self._listener = Listener((self.host, self.port), authkey=self.authkey)
+        address = self._listener.address
+        # Spawned, not forked: the coordinator may hold model threads and open sockets
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.workers):
+            process = context.Process(
+                target=run_worker, daemon=True,
+                args=(address, self.authkey, self.config_manager.config_path, self.worker_factory, self.worker_log_level)
+            )
+            process.start()
+            self._processes.append(process)
+        if self.remote_workers:
+            self.logger.info(f"Waiting for {self.remote_workers} remote shard workers on {address[0]}:{address[1]}")
+        
+        # Accept in a helper thread, so a worker that dies before connecting cannot hang startup
+        accepted = queue.SimpleQueue()
+        
+        def accept():
+            for _ in range(expected):
+                try:
+                    accepted.put(self._listener.accept())
+                except OSError:
+                    return  # Listener closed by stop()
+        
+        threading.Thread(target=accept, name='shard-accept', daemon=True).start()
+        deadline = time.monotonic() + self.connect_timeout
+        for shard in range(expected):
+            while True:
+                try:
+                    connection = accepted.get(timeout=1.0)
+                    break
+                except queue.Empty:
+                    if all(not process.is_alive() for process in self._processes) and not self.remote_workers:
+                        self.stop()
+                        raise RuntimeError("Shard worker processes exited before connecting")
+                    if time.monotonic() > deadline:
+                        self.stop()
+                        raise TimeoutError(f"Only {shard} of {expected} shard workers connected "
+                                           f"within {self.connect_timeout}s")
+            _, host, pid = connection.recv()
+            connection.send(('shard', shard))
+            self._connections[shard] = connection
+            self.logger.info(f"Shard {shard} connected from {host} (process {pid})")
+        self.shard_map = ShardMap(range(expected))
+    
+    def _send_assignments(self, shards):
+        """
+        Tell shards which tickers they own.
+        
+        Shards losing tickers release them first and return their accumulated
+        sentiment, which goes along to the shards taking the tickers over, so
+        a moved ticker keeps its score. A shard whose worker is gone is
+        dropped and its tickers go to the others.
+        """
+        assignment = self.shard_map.shards()
+        carried = {}
+        lost_shards = {}
+        for shard in shards:
+            lost = self._assigned.get(shard, set()) - set(assignment[shard])
+            if lost:
+                try:
+                    carried.update(self._release(shard, sorted(lost)))
+                except (EOFError, OSError) as e:
+                    lost_shards[shard] = e
+        for shard in shards:
+            if shard in lost_shards:
+                continue
+            tickers = assignment[shard]
+            sentiment = {ticker: carried[ticker] for ticker in tickers if ticker in carried}
+            if self._local is not None:
+                self._local.assign(tickers, sentiment)
+            else:
+                try:
+                    self._connections[shard].send(('assign', tickers, sentiment))
+                except OSError as e:
+                    lost_shards[shard] = e
+                    continue
+            self._assigned[shard] = set(tickers)
+        for shard, error in lost_shards.items():
+            self._drop_shard(shard, error)
+    
+    def _release(self, shard, tickers):
+        """Take tickers from a shard and get their accumulated sentiment."""
+        if self._local is not None:
+            return self._local.release(tickers)
+        connection = self._connections[shard]
+        connection.send(('release', tickers))
+        while True:
+            message = connection.recv()
+            if message[0] == 'released':
+                return message[1]
+            # Anything else is a late answer to a cycle that timed out
+    
+    def _drop_shard(self, shard, error):
+        """Stop using a shard whose worker is gone and hand its tickers to the remaining shards."""
+        if shard not in self._connections:
+            return
+        connection = self._connections.pop(shard)
+        try:
+            connection.close()
+        except OSError:
+            pass
+        self._assigned.pop(shard, None)
+        REGISTRY.inc('shard_lost_total')
+        if len(self.shard_map.shard_ids) == 1:
+            raise RuntimeError(f"Lost the last shard worker ({error!r})")
+        
+        moved = self.shard_map.remove(shard)
+        self.logger.error(f"Lost shard {shard} ({error!r}); moving its {len(moved)} tickers "
+                          f"to shards {self.shard_map.shard_ids}")
+        # Their accumulated sentiment went with the worker; the new owners start them fresh
+        self._send_assignments({self.shard_map.owner[ticker] for ticker in moved})
+    
+    def _score(self, articles, news_index, tickers):
+        """Score each article mentioned by any ticker once, and build every ticker's shard input."""
+        positions = sorted({position for ticker in tickers for position in news_index[ticker]})
+        results = self.sentiment_analyzer.analyze_sentiment([articles[position].text for position in positions])
+        by_position = dict(zip(positions, results))
+        
+        items = {}
+        for ticker in tickers:
+            refs = []
+            scored = []
+            for position in news_index[ticker]:
+                article = articles[position]
+                refs.append(ArticleRef(article.article_id, article.source, article.published, article.cluster_size))
+                scored.append(by_position[position])
+            items[ticker] = (refs, scored)
+        return items
+    
+    @REGISTRY.timed('sharded_cycle')
+    def run_cycle(self, tickers):
+        """
+        Run one cycle over every ticker with news.
+        
+        Returns:
+            Number of tickers processed
+        """
+        started = time.perf_counter()
+        self.cycle += 1
+        changed = self.shard_map.assign(tickers)
+        if changed:
+            self._send_assignments(changed)
+            self.costs = {ticker: cost for ticker, cost in self.costs.items() if ticker in self.shard_map.owner}
+        
+        articles = self.data_collector.collect_rss_data()
+        news_index = self.data_collector.index_news_by_ticker(articles)
+        with_news = [ticker for ticker in tickers if ticker in news_index]
+        if not with_news:
+            self.data_collector.confirm_processed()
+            self.logger.info("No news for any ticker this cycle")
+            return 0
+        try:
+            items = self._score(articles, news_index, with_news)
+            prepared = time.perf_counter()
+            
+            payloads = {}
+            for ticker, item in items.items():
+                payloads.setdefault(self.shard_map.owner[ticker], {})[ticker] = item
+            decisions, elapsed = self._dispatch(payloads)
+            decided = time.perf_counter()
+            
+            results = self.order_gateway.execute(decisions)
+        except Exception:
+            # Not known to have been acted on: collect the articles again next cycle
+            self.data_collector.confirm_processed(failed=articles)
+            raise
+        submitted = sum(1 for result in results.values() if result)
+        
+        # Shards that failed, timed out or were lost decided nothing; their tickers' articles are retried
+        unanswered = [ticker for shard, payload in payloads.items() if shard not in elapsed for ticker in payload]
+        failed = {position for ticker in unanswered for position in news_index[ticker]}
+        if unanswered:
+            self.logger.warning(f"No decisions for {len(unanswered)} tickers this cycle, retrying their "
+                                f"{len(failed)} articles next cycle")
+        self.data_collector.confirm_processed(failed=[articles[position] for position in failed])
+        
+        # Per-ticker cost is the shard's time spread over the tickers it processed
+        for shard, seconds in elapsed.items():
+            cost = seconds / len(payloads[shard])
+            for ticker in payloads[shard]:
+                previous = self.costs.get(ticker)
+                self.costs[ticker] = cost if previous is None else 0.7 * previous + 0.3 * cost
+        if self.rebalance_interval and self.cycle % self.rebalance_interval == 0:
+            self.rebalance()
+        
+        if elapsed:
+            REGISTRY.set_gauge('shard_imbalance', max(elapsed.values()) / max(min(elapsed.values()), 1e-9))
+        self.logger.info(f"Sharded cycle {self.cycle}: {len(with_news)} tickers over {len(payloads)} shards, "
+                         f"{len(decisions)} decisions, {submitted} orders; prepare {prepared - started:.2f}s, "
+                         f"shards {decided - prepared:.2f}s, orders {time.perf_counter() - decided:.2f}s")
+        return len(with_news)
+    
+    def _dispatch(self, payloads):
+        """
+        Send each shard its tickers and collect the decisions.
+        
+        Returns:
+            Tuple of (dict of ticker -> decision, dict of shard -> seconds spent)
+        """
+        if self._local is not None:
+            started = time.perf_counter()
+            decisions = self._local.process(payloads.get(0, {}))
+            return decisions, {0: time.perf_counter() - started}
+        
+        # Shards found dead are dropped after every answer is in, so reassignment cannot take a live shard's answer
+        lost_shards = {}
+        waiting = {}
+        for shard, payload in payloads.items():
+            connection = self._connections[shard]
+            try:
+                connection.send(('cycle', self.cycle, payload))
+            except OSError as e:
+                lost_shards[shard] = e
+                continue
+            waiting[connection] = shard
+        
+        decisions = {}
+        elapsed = {}
+        deadline = time.monotonic() + self.cycle_timeout
+        while waiting:
+            ready = wait(list(waiting), timeout=max(deadline - time.monotonic(), 0))
+            if not ready:
+                self.logger.error(f"Shards {sorted(waiting.values())} did not answer cycle {self.cycle} "
+                                  f"within {self.cycle_timeout}s")
+                break
+            for connection in ready:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError) as e:
+                    lost_shards[waiting.pop(connection)] = e
+                    continue
+                if message[1] != self.cycle:
+                    continue  # A late answer to a cycle that timed out
+                shard = waiting.pop(connection)
+                if message[0] == 'decisions':
+                    decisions.update(message[3])
+                    elapsed[shard] = message[4]
+                else:
+                    self.logger.error(f"Shard {shard} failed cycle {self.cycle}: {message[3]}")
+        
+        for shard, error in lost_shards.items():
+            self._drop_shard(shard, error)
+        return decisions, elapsed
+    
+    def rebalance(self):
+        """Move tickers off slow shards, based on the smoothed per-ticker costs."""
+        moves = self.shard_map.rebalance(self.costs, self.rebalance_tolerance)
+        if moves:
+            self._send_assignments({shard for _, old, new in moves for shard in (old, new)})
+            self.logger.info(f"Rebalanced shards: moved {len(moves)} tickers")
+        return moves
+    
+    def stop(self):
+        """Stop the workers and close the connections."""
+        for connection in self._connections.values():
+            try:
+                connection.send(('stop',))
+                connection.close()
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=10)
+        if self._listener is not None:
+            self._listener.close()
+        self._connections = {}
+        self._processes = []
+
+def _stub_worker(config_manager, shard_id, latency=0.1):
+    """Build a shard worker whose bars come from a local stub with simulated request latency."""
+    from components.technical_analysis import TechnicalAnalyzer
+    from components.trading_strategy import TradingStrategy
+    
+    class StubBarsAnalyzer(TechnicalAnalyzer):
+        def fetch_bars_bulk(self, tickers, start_date_str, end_date_str):
+            import numpy as np
+            import pandas as pd
+            
+            bars_by_ticker = {}
+            for start in range(0, len(tickers), self.bulk_chunk_size):
+                time.sleep(latency)  # One multi-symbol request per chunk
+                for ticker in tickers[start:start + self.bulk_chunk_size]:
+                    rng = np.random.default_rng(int.from_bytes(ticker.encode('utf-8'), 'little') % (2 ** 32))
+                    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 250)))
+                    bars_by_ticker[ticker] = pd.DataFrame({
+                        'open': close, 'high': close * 1.005, 'low': close * 0.995, 'close': close, 'volume': 1e6
+                    }, index=pd.bdate_range(end=end_date_str, periods=len(close)))
+            return bars_by_ticker
+    
+    technical_analyzer = StubBarsAnalyzer(None)
+    return ShardWorker(config_manager, technical_analyzer, TradingStrategy(config_manager))
+
+def _benchmark(config, ticker_count, workers, cycles, latency, order_latency):
+    """Time sharded cycles over synthetic tickers and news; returns mean seconds per cycle."""
+    import functools
+    from components.article_store import Article
+    from components.broker_stub import AlpacaStub
+    from components.order_executor import OrderExecutor
+    from components.portfolio_state import PortfolioState
+    
+    tickers = [f"T{index:04d}" for index in range(ticker_count)]
+    
+    class StubCollector:
+        """Two articles per ticker per cycle, one of them also naming the next ticker."""
+        def __init__(self):
+            self.cycle = 0
+        
+        def collect_rss_data(self):
+            self.cycle += 1
+            now = time.time()
+            articles = []
+            for index, ticker in enumerate(tickers):
+                other = tickers[(index + 1) % len(tickers)]
+                for number, mentioned in enumerate((frozenset([ticker]), frozenset([ticker, other]))):
+                    article = Article(f"{self.cycle}-{ticker}-{number}", f"{ticker} update {number}",
+                                      f"News about {' and '.join(sorted(mentioned))}.", '', 'Stub', now, now, mentioned)
+                    articles.append(article)
+            return articles
+        
+        def confirm_processed(self, failed=()):
+            pass
+        
+        def index_news_by_ticker(self, articles):
+            index = {}
+            for position, article in enumerate(articles):
+                for ticker in article.tickers:
+                    index.setdefault(ticker, []).append(position)
+            return index
+    
+    class StubSentiment:
+        """Deterministic labels from a hash of the text."""
+        def analyze_sentiment(self, texts):
+            labels = ('positive', 'negative', 'neutral')
+            return [{'label': labels[hash(text) % 3], 'confidence': 0.6 + (hash(text) % 40) / 100} for text in texts]
+    
+    api = AlpacaStub(latency=order_latency, equity=10_000_000.0, seed=1)
+    portfolio_state = PortfolioState(api, config.get_risk_parameters())
+    portfolio_state.seed()
+    portfolio_state.attach_stub(api)
+    gateway = OrderGateway(OrderExecutor(api, config, portfolio_state), portfolio_state,
+                           GatewayConfig.from_dict({'max_orders_per_cycle': 50, 'max_open_positions': 100}))
+    coordinator = ShardCoordinator(
+        config, StubCollector(), StubSentiment(), gateway,
+        ShardingConfig.from_dict({'workers': workers, 'rebalance_interval': 0}),
+        worker_factory=functools.partial(_stub_worker, latency=latency), worker_log_level='WARNING'
+    )
+    coordinator.start()
+    try:
+        coordinator.run_cycle(tickers)  # Warm-up: worker imports and first allocations are not throughput
+        times = []
+        for _ in range(cycles):
+            started = time.perf_counter()
+            coordinator.run_cycle(tickers)
+            times.append(time.perf_counter() - started)
+    finally:
+        coordinator.stop()
+        gateway.order_executor.close()
+    return sum(times) / len(times)
+
+def main():
+    """Run a remote shard worker, or benchmark sharded cycles against local stubs."""
+    import argparse
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Sharded trading cycles across processes and nodes")
+    commands = parser.add_subparsers(dest='command', required=True)
+    worker_parser = commands.add_parser('worker', help="Serve a shard for a coordinator on another node")
+    worker_parser.add_argument('--connect', required=True, help="Coordinator HOST:PORT")
+    worker_parser.add_argument('--config', default='config.yaml')
+    bench_parser = commands.add_parser('bench', help="Throughput with stub news, bars and broker")
+    bench_parser.add_argument('--config', default='config.yaml')
+    bench_parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 1000])
+    bench_parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4],
+                              help="Worker process counts to compare (0 = everything in one process)")
+    bench_parser.add_argument('--cycles', type=int, default=3)
+    bench_parser.add_argument('--latency', type=float, default=0.1, help="Seconds per stub bar request")
+    bench_parser.add_argument('--order-latency', type=float, default=0.005, help="Seconds per stub broker call")
+    args = parser.parse_args()
+    
+    config = ConfigManager(args.config)
+    if args.command == 'worker':
+        host, port = args.connect.rsplit(':', 1)
+        authkey = os.environ.get('TRADING_SHARD_AUTHKEY') or config.get_sharding_config().authkey
+        if not authkey:
+            parser.error("set trading.sharding.authkey or TRADING_SHARD_AUTHKEY")
+        run_worker((host, int(port)), authkey.encode('utf-8'), args.config)
+        return 0
+    
+    logging.basicConfig(level=logging.WARNING)
+    print(f"{'tickers':>8} {'workers':>8} {'s/cycle':>9} {'tickers/s':>10}")
+    for ticker_count in args.tickers:
+        for workers in args.workers:
+            seconds = _benchmark(config, ticker_count, workers, args.cycles, args.latency, args.order_latency)
+            print(f"{ticker_count:>8} {workers:>8} {seconds:>9.3f} {ticker_count / seconds:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
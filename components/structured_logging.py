@@ -0,0 +1,272 @@
+# components/structured_logging.py
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Trade decisions and executions are an audit trail; their lines are never rate limited
+AUDIT_MESSAGE_PREFIXES = ("MAIN: Decision made to", "MAIN: Trade executed")
+
+_cycle_counter = itertools.count(1)
+_current_cycle = None
+
+def start_cycle(prefix='cycle'):
+    """
+    Start a new correlation ID, stamped on every log record until the next one.
+    
+    Trading cycles (and event scheduler polls) run one at a time, so one
+    process-wide ID covers the records of every thread working on the cycle.
+    
+    Returns:
+        The new ID
+    """
+    global _current_cycle
+    _current_cycle = f"{prefix}-{os.getpid()}-{next(_cycle_counter)}"
+    return _current_cycle
+
+def current_cycle():
+    """Get the current correlation ID (None before the first cycle)."""
+    return _current_cycle
+
+class CycleFilter(logging.Filter):
+    """Stamp records with the current cycle's correlation ID."""
+    
+    def filter(self, record):
+        record.cycle = _current_cycle
+        return True
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=60, max_per_interval=5, max_level=logging.INFO, exclude_loggers=(),
+                 exclude_messages=()):
+        """
+        Limit how often one logging call site can emit records.
+        
+        Messages are formatted before logging sees them, so repeats of a
+        message like "No relevant news found for X" are recognised by the
+        line that logged them. Each call site may log max_per_interval
+        records per interval seconds; further records are dropped and
+        counted, and the next record that gets through says how many were
+        suppressed. Warnings and errors (above max_level), records from the
+        loggers in exclude_loggers and messages starting with one of
+        exclude_messages are never limited.
+        """
+        super().__init__()
+        self.interval = interval
+        self.max_per_interval = max_per_interval
+        self.max_level = max_level
+        self.exclude_loggers = frozenset(exclude_loggers)
+        self.exclude_messages = tuple(exclude_messages)
+        self._sites = {}  # (pathname, lineno) -> [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if record.levelno > self.max_level or record.name in self.exclude_loggers:
+            return True
+        # With synchronous logging every handler asks; decide once per record
+        decided = getattr(record, 'rate_limit_passed', None)
+        if decided is not None:
+            return decided
+        if self.exclude_messages and record.getMessage().startswith(self.exclude_messages):
+            record.rate_limit_passed = True
+            return True
+        record.rate_limit_passed = self._allow(record)
+        return record.rate_limit_passed
+    
+    def _allow(self, record):
+        """Count a record against its call site's budget."""
+        now = record.created
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.max_per_interval:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                return False
+        
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one compact JSON object per line."""
+    
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        cycle = getattr(record, 'cycle', None)
+        if cycle is not None:
+            entry['cycle'] = cycle
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """The plain text format, with the correlation ID and suppressed counts when present."""
+    
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    def format(self, record):
+        text = super().format(record)
+        cycle = getattr(record, 'cycle', None)
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return f"[{cycle}] {text}" if cycle is not None else text
+
+def build_handlers(log_config):
+    """Create the console and (optional) rotating file handlers described by a LoggingConfig."""
+    formatter = JsonFormatter() if log_config.format == 'json' else TextFormatter()
+    handlers = [logging.StreamHandler()]
+    if log_config.log_to_file:
+        handlers.append(RotatingFileHandler(
+            log_config.log_file,
+            maxBytes=log_config.max_log_size,
+            backupCount=log_config.backup_count
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+class _PreparedQueueHandler(QueueHandler):
+    def prepare(self, record):
+        """
+        Resolve the message in the calling thread but leave formatting to the listener.
+        
+        The stock prepare() formats the whole record here, which would put
+        the formatting cost back on the logging thread.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot cross threads as objects, so render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.msg = f"{record.msg}\n{record.exc_text}"
+            record.exc_info = None
+        return record
+
+def configure_logging(log_config, root=None, handlers=None):
+    """
+    Attach the configured handlers to the root logger.
+    
+    With log_config.queued (the logging.async option) the root logger only
+    gets a QueueHandler, and a QueueListener thread does the formatting and
+    the console and file I/O, including rotation. Correlation IDs and rate limiting are applied
+    in the calling thread, so suppressed records never reach the queue.
+    
+    Args:
+        log_config: LoggingConfig
+        handlers: Output handlers to use instead of those built from log_config
+    
+    Returns:
+        The QueueListener (stopped at exit), or None when logging synchronously
+    """
+    root = root or logging.getLogger()
+    level = getattr(logging, log_config.level)
+    root.setLevel(level)
+    
+    filters = [CycleFilter()]
+    rate_limit = log_config.rate_limit
+    if rate_limit.enabled:
+        filters.append(RateLimitFilter(
+            rate_limit.interval, rate_limit.max_per_interval,
+            exclude_loggers=rate_limit.exclude_loggers, exclude_messages=rate_limit.exclude_messages
+        ))
+    
+    handlers = handlers if handlers is not None else build_handlers(log_config)
+    for handler in handlers:
+        handler.setLevel(level)
+    
+    if not log_config.queued:
+        for handler in handlers:
+            for log_filter in filters:
+                handler.addFilter(log_filter)
+            root.addHandler(handler)
+        return None
+    
+    queue_handler = _PreparedQueueHandler(queue.SimpleQueue())
+    queue_handler.setLevel(level)
+    for log_filter in filters:
+        queue_handler.addFilter(log_filter)
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    root.addHandler(queue_handler)
+    atexit.register(stop_listener, listener)
+    return listener
+
+def stop_listener(listener):
+    """Flush what is still queued and stop a listener (safe to call twice)."""
+    if listener._thread is not None:
+        listener.stop()
+
+def main():
+    """Measure the cost of logging calls in a trading-style loop with sync and async handlers."""
+    import argparse
+    import tempfile
+    from components.config_records import LoggingConfig
+    
+    parser = argparse.ArgumentParser(description="Benchmark synchronous and queue-based logging")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=20)
+    args = parser.parse_args()
+    
+    modes = [
+        ('sync text', {'async': False, 'format': 'text'}),
+        ('sync json', {'async': False, 'format': 'json'}),
+        ('sync json, rate limited', {'async': False, 'format': 'json',
+                                     'rate_limit': {'enabled': True, 'interval': 60, 'max_per_interval': 5}}),
+        ('async json', {'async': True, 'format': 'json'}),
+        ('async json, rate limited', {'async': True, 'format': 'json',
+                                      'rate_limit': {'enabled': True, 'interval': 60, 'max_per_interval': 5}})
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        for label, options in modes:
+            log_config = LoggingConfig.from_dict(dict(
+                options, level='INFO', log_to_file=True, log_file=os.path.join(directory, 'bench.log'),
+                max_log_size=1 << 20, backup_count=2
+            ))
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            # Console output goes to /dev/null so the terminal does not dominate the measurement
+            handlers = build_handlers(log_config)
+            handlers[0].setStream(open(os.devnull, 'w'))
+            logger = logging.getLogger('Benchmark')
+            listener = configure_logging(log_config, root, handlers)
+            
+            started = time.perf_counter()
+            for _ in range(args.cycles):
+                start_cycle()
+                for index in range(args.tickers):
+                    logger.info(f"No relevant news found for T{index}")
+            elapsed = time.perf_counter() - started
+            if listener is not None:
+                stop_listener(listener)
+            written = time.perf_counter() - started
+            calls = args.cycles * args.tickers
+            print(f"{label}: {elapsed * 1e6 / calls:.2f}us per logging call in the loop, "
+                  f"{written:.2f}s until everything was written ({calls} calls)")
+            for handler in handlers:
+                handler.close()
+            root.handlers.clear()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
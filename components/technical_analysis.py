@@ -2,34 +2,63 @@
 import pandas as pd
 import numpy as np
 import logging
-from alpaca_trade_api.rest import TimeFrame
+import time
 from datetime import datetime, timedelta
-import yfinance as yf  # Import yfinance for backup data source
+from components.bar_store import BarStore
+from components.indicators import IndicatorEngine
+from components.metrics import REGISTRY
 
 class TechnicalAnalyzer:
-    def __init__(self, api):
+    def __init__(self, api, bar_store=None, bulk_chunk_size=100):
         """Initialize the technical analyzer."""
         self.api = api
+        self.bulk_chunk_size = bulk_chunk_size  # Symbols per multi-symbol bar request
+        self.bar_store = bar_store  # Optional local cache; only the missing tail is fetched when set
         self.logger = logging.getLogger('TechnicalAnalyzer')
+        self._engine = None
+        self._engine_config = None
+        self._indicator_cache = {}  # ticker -> (computed_at, results) from the last bulk calculation
+    
+    def get_indicator_engine(self, indicators_config):
+        """Get the vectorized indicator engine for a configuration, reusing it while the config is unchanged."""
+        if self._engine is None or self._engine_config != indicators_config:
+            self._engine = IndicatorEngine(indicators_config)
+            self._engine_config = [dict(spec) for spec in indicators_config]
+        return self._engine
+    
+    def invalidate_indicators(self, tickers=None):
+        """
+        Drop cached indicator results, for some tickers or (by default) all of them.
+        
+        Stored bars are kept, so the next calculation recomputes from local
+        data instead of refetching history.
+        """
+        if tickers is None:
+            self._indicator_cache.clear()
+            self._engine = None
+            self._engine_config = None
+            return
+        for ticker in tickers:
+            self._indicator_cache.pop(ticker, None)
     
     def calculate_rsi(self, prices, period=14):
         """Calculate Relative Strength Index."""
         if len(prices) < period + 1:
             self.logger.warning(f"Not enough data to calculate RSI. Need at least {period + 1} data points.")
             return None  # Return None instead of a default value
-            
+        
         # Ensure prices is 1D
         if len(prices.shape) > 1:
             self.logger.info(f"Flattening prices array from shape {prices.shape}")
             prices = prices.ravel()
-            
+        
         deltas = np.diff(prices)
         
         # Check if deltas array is empty
         if deltas.size == 0:
             self.logger.warning("No price changes detected for RSI calculation")
             return None
-            
+        
         seed = deltas[:period+1]
         up = seed[seed >= 0].sum()/period
         down = -seed[seed < 0].sum()/period
@@ -58,12 +87,12 @@ class TechnicalAnalyzer:
         if len(prices) < slow_period + signal_period:
             self.logger.warning(f"Not enough data to calculate MACD. Need at least {slow_period + signal_period} data points.")
             return None  # Return None instead of default values
-            
+        
         # Ensure prices is 1D
         if len(prices.shape) > 1:
             self.logger.info(f"Flattening prices array from shape {prices.shape}")
             prices = prices.ravel()
-            
+        
         # Calculate EMAs
         ema_fast = pd.Series(prices).ewm(span=fast_period, adjust=False).mean()
         ema_slow = pd.Series(prices).ewm(span=slow_period, adjust=False).mean()
@@ -87,6 +116,7 @@ class TechnicalAnalyzer:
         """Get historical data using yfinance as a fallback."""
         try:
             self.logger.info(f"Attempting to fetch data for {ticker} from yfinance")
+            import yfinance as yf  # Backup data source, only imported when Alpaca fails
             data = yf.download(ticker, start=start_date, end=end_date, interval="1d", progress=False)
             if data.size > 0:  # Using size instead of direct boolean evaluation
                 self.logger.info(f"Successfully retrieved {len(data)} bars from yfinance for {ticker}")
@@ -98,6 +128,230 @@ class TechnicalAnalyzer:
             self.logger.error(f"Error fetching data from yfinance for {ticker}: {e}")
             return pd.DataFrame()
     
+    def fetch_bars(self, ticker, start_date_str, end_date_str):
+        """Fetch daily bars from Alpaca, falling back to yfinance."""
+        self.logger.info(f"Fetching historical data for {ticker} from {start_date_str} to {end_date_str}")
+        
+        # Try to get data from Alpaca first
+        bars = pd.DataFrame()
+        try:
+            from alpaca_trade_api.rest import TimeFrame
+            bars = self.api.get_bars(
+                ticker, 
+                TimeFrame.Day,
+                start=start_date_str,
+                end=end_date_str,
+                adjustment='raw'  # Get raw (unadjusted) data
+            ).df
+            
+            if bars.size == 0:  # Using size instead of empty
+                self.logger.warning(f"No historical data available from Alpaca for {ticker}, trying yfinance")
+                bars = self.get_historical_data_yfinance(ticker, start_date_str, end_date_str)
+            else:
+                self.logger.info(f"Retrieved {len(bars)} historical bars from Alpaca for {ticker}")
+        
+        except Exception as e:
+            self.logger.warning(f"Error fetching data from Alpaca for {ticker}: {e}. Trying yfinance instead.")
+            bars = self.get_historical_data_yfinance(ticker, start_date_str, end_date_str)
+        
+        return bars
+    
+    def get_historical_data_yfinance_bulk(self, tickers, start_date, end_date):
+        """Get historical data for several tickers from yfinance, one download per chunk."""
+        results = {}
+        for start in range(0, len(tickers), self.bulk_chunk_size):
+            chunk = tickers[start:start + self.bulk_chunk_size]
+            try:
+                self.logger.info(f"Attempting to fetch data for {len(chunk)} tickers from yfinance")
+                import yfinance as yf  # Backup data source, only imported when Alpaca fails
+                data = yf.download(chunk, start=start_date, end=end_date, interval="1d",
+                                   progress=False, group_by='ticker')
+                if data.size == 0:
+                    self.logger.warning(f"yfinance returned empty data for {', '.join(chunk)}")
+                    continue
+                
+                if isinstance(data.columns, pd.MultiIndex):
+                    symbols = set(data.columns.get_level_values(0))
+                    for ticker in chunk:
+                        if ticker in symbols:
+                            frame = data[ticker].dropna(how='all')
+                            if frame.size > 0:
+                                results[ticker] = frame
+                elif len(chunk) == 1:
+                    results[chunk[0]] = data
+                
+                self.logger.info(f"Successfully retrieved bars from yfinance for {sum(t in results for t in chunk)}/{len(chunk)} tickers")
+            except Exception as e:
+                self.logger.error(f"Error fetching data from yfinance for {', '.join(chunk)}: {e}")
+        
+        return results
+    
+    def fetch_bars_bulk(self, tickers, start_date_str, end_date_str):
+        """Fetch daily bars for many tickers with one Alpaca request per chunk, falling back to yfinance."""
+        bars_by_ticker = {}
+        
+        for start in range(0, len(tickers), self.bulk_chunk_size):
+            chunk = tickers[start:start + self.bulk_chunk_size]
+            self.logger.info(f"Fetching historical data for {len(chunk)} tickers from {start_date_str} to {end_date_str}")
+            try:
+                from alpaca_trade_api.rest import TimeFrame
+                bars = self.api.get_bars(
+                    chunk,
+                    TimeFrame.Day,
+                    start=start_date_str,
+                    end=end_date_str,
+                    adjustment='raw'  # Get raw (unadjusted) data
+                ).df
+                
+                # Multi-symbol responses carry a symbol column; split them per ticker
+                if bars.size > 0 and 'symbol' in bars.columns:
+                    for symbol, frame in bars.groupby('symbol', sort=False):
+                        bars_by_ticker[symbol] = frame.drop(columns='symbol')
+                elif bars.size > 0 and len(chunk) == 1:
+                    bars_by_ticker[chunk[0]] = bars
+                
+                self.logger.info(f"Retrieved historical bars from Alpaca for {sum(t in bars_by_ticker for t in chunk)}/{len(chunk)} tickers")
+            except Exception as e:
+                self.logger.warning(f"Error fetching data from Alpaca for {len(chunk)} tickers: {e}. Trying yfinance instead.")
+        
+        missing = [ticker for ticker in tickers if ticker not in bars_by_ticker]
+        if missing:
+            self.logger.warning(f"No historical data available from Alpaca for {', '.join(missing)}, trying yfinance")
+            bars_by_ticker.update(self.get_historical_data_yfinance_bulk(missing, start_date_str, end_date_str))
+        
+        return bars_by_ticker
+    
+    def get_fetch_start(self, ticker, start_date):
+        """Get the first date that has to be fetched for a ticker."""
+        if self.bar_store is None:
+            return start_date
+        
+        # Only fetch from the newest stored bar onwards; it is refetched because today's bar changes
+        last_date = self.bar_store.last_date(ticker)
+        return start_date if last_date is None or last_date < start_date else last_date
+    
+    def get_ohlcv(self, ticker, start_date, end_date):
+        """Get a ticker's daily bars as a (5 x bars) OHLCV block, or None if unavailable."""
+        fetch_start = self.get_fetch_start(ticker, start_date)
+        bars = self.fetch_bars(ticker, fetch_start.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        return self._ohlcv_from_bars(ticker, bars, start_date)
+    
+    def _ohlcv_from_bars(self, ticker, bars, start_date):
+        """Turn freshly fetched bars into an OHLCV block, going through the bar store when there is one."""
+        if self.bar_store is None:
+            if bars.size == 0:
+                return None
+            
+            # Handles the different column names of Alpaca and yfinance
+            try:
+                return BarStore.normalize_bars(bars)[1]
+            except ValueError as e:
+                self.logger.error(f"Could not read the bars for {ticker}: {e}")
+                return None
+        
+        if bars.size > 0:
+            try:
+                self.bar_store.append(ticker, bars)
+            except Exception as e:
+                self.logger.error(f"Error storing bars for {ticker}: {e}")
+        else:
+            last_date = self.bar_store.last_date(ticker)
+            if last_date is not None:
+                self.logger.warning(f"Could not refresh bars for {ticker}, using stored bars up to {last_date:%Y-%m-%d}")
+        
+        stored = self.bar_store.get_bars(ticker, since=start_date)
+        return None if stored is None else stored[1]
+    
+    @REGISTRY.timed('calculate_indicators_for')
+    def calculate_indicators_for(self, tickers, indicators_config, max_age=None):
+        """
+        Calculate technical indicators for many tickers at once.
+        
+        Bars are fetched with one multi-symbol request per chunk of tickers
+        (grouped by the first date each ticker still needs), and indicators
+        are computed in one vectorized pass per group of equal-length series.
+        
+        Args:
+            tickers: List of ticker symbols
+            indicators_config: Indicator specs from the model configuration
+            max_age: If set, results computed within this many seconds are
+                reused instead of refetching bars for those tickers
+        
+        Returns:
+            Dict of ticker -> indicator results (empty dict when unavailable)
+        """
+        cached = {}
+        if max_age is not None and self._engine_config == indicators_config:
+            now = time.monotonic()
+            for ticker in tickers:
+                entry = self._indicator_cache.get(ticker)
+                if entry is not None and now - entry[0] <= max_age:
+                    cached[ticker] = entry[1]
+            tickers = [ticker for ticker in tickers if ticker not in cached]
+            if len(tickers) == 0:
+                return cached
+        
+        ohlcv_by_ticker = {}
+        
+        try:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=365)
+            end_date_str = end_date.strftime("%Y-%m-%d")
+            
+            # Tickers sharing a fetch start can share requests
+            groups = {}
+            for ticker in tickers:
+                fetch_start = self.get_fetch_start(ticker, start_date)
+                groups.setdefault(fetch_start.strftime("%Y-%m-%d"), []).append(ticker)
+            
+            for fetch_start_str, group in groups.items():
+                bars_by_ticker = self.fetch_bars_bulk(group, fetch_start_str, end_date_str)
+                for ticker in group:
+                    bars = bars_by_ticker.get(ticker, pd.DataFrame())
+                    ohlcv_by_ticker[ticker] = self._ohlcv_from_bars(ticker, bars, start_date)
+        except Exception as e:
+            self.logger.error(f"Error fetching historical data for {len(tickers)} tickers: {e}")
+        
+        results = self.calculate_indicators_from_bars(ohlcv_by_ticker, indicators_config, tickers)
+        
+        computed_at = time.monotonic()
+        for ticker, indicators in results.items():
+            if len(indicators) > 0:
+                self._indicator_cache[ticker] = (computed_at, indicators)
+        
+        results.update(cached)
+        return results
+    
+    def calculate_indicators_from_bars(self, ohlcv_by_ticker, indicators_config, tickers=None):
+        """Calculate indicators for a dict of ticker -> (5 x bars) OHLCV block, batching series of equal length."""
+        results = {ticker: {} for ticker in (tickers if tickers is not None else ohlcv_by_ticker)}
+        
+        try:
+            engine = self.get_indicator_engine(indicators_config)
+            min_required = engine.min_bars()
+            
+            by_length = {}
+            for ticker, ohlcv in ohlcv_by_ticker.items():
+                if ohlcv is None or ohlcv.size == 0:
+                    self.logger.warning(f"Could not retrieve any historical data for {ticker} from either source")
+                elif ohlcv.shape[1] < min_required:
+                    self.logger.warning(f"Insufficient data for {ticker}. Got {ohlcv.shape[1]} bars, need at least {min_required}.")
+                else:
+                    by_length.setdefault(ohlcv.shape[1], []).append(ticker)
+            
+            for group in by_length.values():
+                batch = engine.compute_batch(np.stack([ohlcv_by_ticker[ticker] for ticker in group]))
+                for ticker, indicators in zip(group, batch):
+                    results[ticker] = indicators
+            
+            calculated = sum(1 for indicators in results.values() if len(indicators) > 0)
+            self.logger.info(f"Successfully calculated technical indicators for {calculated}/{len(results)} tickers")
+        except Exception as e:
+            self.logger.error(f"Error calculating technical indicators for {len(results)} tickers: {e}")
+        
+        return results
+    
+    @REGISTRY.timed('calculate_technical_indicators')
     def calculate_technical_indicators(self, ticker, indicators_config):
         """Calculate technical indicators for a ticker."""
         results = {}
@@ -119,95 +373,29 @@ class TechnicalAnalyzer:
             # Go back 365 days to ensure we have enough historical data
             start_date = end_date - timedelta(days=365)
             
-            # Format dates as simple YYYY-MM-DD strings
-            start_date_str = start_date.strftime("%Y-%m-%d")
-            end_date_str = end_date.strftime("%Y-%m-%d")
-            
-            self.logger.info(f"Fetching historical data for {ticker} from {start_date_str} to {end_date_str}")
-            
-            # Try to get data from Alpaca first
-            bars = pd.DataFrame()
-            try:
-                bars = self.api.get_bars(
-                    ticker, 
-                    TimeFrame.Day,
-                    start=start_date_str,
-                    end=end_date_str,
-                    adjustment='raw'  # Get raw (unadjusted) data
-                ).df
-                
-                if bars.size == 0:  # Using size instead of empty
-                    self.logger.warning(f"No historical data available from Alpaca for {ticker}, trying yfinance")
-                    bars = self.get_historical_data_yfinance(ticker, start_date_str, end_date_str)
-                else:
-                    self.logger.info(f"Retrieved {len(bars)} historical bars from Alpaca for {ticker}")
-            
-            except Exception as e:
-                self.logger.warning(f"Error fetching data from Alpaca for {ticker}: {e}. Trying yfinance instead.")
-                bars = self.get_historical_data_yfinance(ticker, start_date_str, end_date_str)
+            ohlcv = self.get_ohlcv(ticker, start_date, end_date)
             
             # If we still don't have data, return empty results
-            if bars.size == 0:  # Using size instead of empty
+            if ohlcv is None or ohlcv.size == 0:
                 self.logger.warning(f"Could not retrieve any historical data for {ticker} from either source")
                 return results
             
             # Check if we have enough data
-            min_required = 0
-            for indicator in indicators_config:
-                if indicator['type'] == 'RSI':
-                    min_required = max(min_required, indicator['period'] + 1)
-                elif indicator['type'] == 'MACD':
-                    min_required = max(min_required, indicator['slow_period'] + indicator['signal_period'])
+            engine = self.get_indicator_engine(indicators_config)
+            min_required = engine.min_bars()
             
-            if len(bars) < min_required:
-                self.logger.warning(f"Insufficient data for {ticker}. Got {len(bars)} bars, need at least {min_required}.")
-                return results
-            
-            # Extract closing prices - handle different column names between Alpaca and yfinance
-            closes = None
-            if 'close' in bars.columns:
-                closes = bars['close'].values
-            elif 'Close' in bars.columns:  # yfinance uses capitalized column names
-                closes = bars['Close'].values
-            else:
-                self.logger.error(f"Could not find closing price column in data for {ticker}")
-                return results
-                
-            # Check if closes array is empty
-            if closes is None or closes.size == 0:
-                self.logger.warning(f"No closing prices found for {ticker}")
+            if ohlcv.shape[1] < min_required:
+                self.logger.warning(f"Insufficient data for {ticker}. Got {ohlcv.shape[1]} bars, need at least {min_required}.")
                 return results
-                
-            # Ensure closes is 1D
-            if len(closes.shape) > 1:
-                self.logger.info(f"Flattening closes array from shape {closes.shape}")
-                closes = closes.ravel()
             
-            # Calculate indicators
-            for indicator in indicators_config:
-                if indicator['type'] == 'RSI':
-                    rsi = self.calculate_rsi(closes, period=indicator['period'])
-                    if rsi is not None:
-                        results['RSI'] = {
-                            'value': rsi,
-                            'overbought': indicator['overbought'],
-                            'oversold': indicator['oversold']
-                        }
-                elif indicator['type'] == 'MACD':
-                    macd = self.calculate_macd(
-                        closes, 
-                        fast_period=indicator['fast_period'],
-                        slow_period=indicator['slow_period'],
-                        signal_period=indicator['signal_period']
-                    )
-                    if macd is not None:
-                        results['MACD'] = macd
+            # Calculate indicators (vectorized; equivalent to calculate_rsi / calculate_macd)
+            results = engine.compute(ohlcv)
             
             if len(results) > 0:
                 self.logger.info(f"Successfully calculated technical indicators for {ticker}")
             else:
                 self.logger.warning(f"Failed to calculate any technical indicators for {ticker}")
-            
+        
         except Exception as e:
             self.logger.error(f"Error calculating technical indicators for {ticker}: {e}")
         
@@ -0,0 +1,197 @@
+# components/trading_pipeline.py
+import logging
+import time
+from components.config_records import PipelineConfig
+from components.metrics import REGISTRY
+from components.pipeline import LatencyHistogram, Pipeline, PipelineItem, Stage
+
+class TradingPipeline:
+    def __init__(self, data_collector, sentiment_analyzer, technical_analyzer, trading_strategy,
+                 order_executor, indicators_config, pipeline_config=None, sentiment_accumulator=None):
+        """
+        Initialize the staged trading pipeline.
+        
+        Ingestion and matching run once per cycle in the calling thread and
+        feed one item per ticker with news into bounded queues for the batched
+        sentiment, indicator, decision and execution stages. Indicator fetches
+        and order submission use several worker threads, so network waits
+        overlap with inference. Scored articles are added to the optional
+        sentiment accumulator before decisions are made.
+        """
+        pipeline_config = pipeline_config or PipelineConfig.from_dict(None)
+        self.logger = logging.getLogger('TradingPipeline')
+        self.data_collector = data_collector
+        self.sentiment_analyzer = sentiment_analyzer
+        self.technical_analyzer = technical_analyzer
+        self.trading_strategy = trading_strategy
+        self.order_executor = order_executor
+        self.indicators_config = indicators_config
+        self.sentiment_accumulator = sentiment_accumulator
+        # Reuse indicators refreshed this recently (e.g. by the event scheduler) instead of refetching
+        self.indicator_max_age = pipeline_config.indicator_max_age
+        
+        self.ingestion_latency = LatencyHistogram()
+        self.matching_latency = LatencyHistogram()
+        self.news_to_decision = LatencyHistogram()
+        
+        self.pipeline = Pipeline([
+            Stage('sentiment', self._analyze_sentiment,
+                  workers=pipeline_config.sentiment_workers, batch_size=pipeline_config.sentiment_batch_size),
+            Stage('indicators', self._calculate_indicators,
+                  workers=pipeline_config.indicator_workers, batch_size=pipeline_config.indicator_batch_size),
+            Stage('decision', self._make_decisions, batch_size=pipeline_config.decision_batch_size),
+            Stage('execution', self._execute_trade, workers=pipeline_config.execution_workers)
+        ], queue_size=pipeline_config.queue_size)
+        self.pipeline.start()
+        
+        # Expose the latencies this pipeline already keeps
+        REGISTRY.attach_histogram('pipeline_ingestion_seconds', self.ingestion_latency)
+        REGISTRY.attach_histogram('pipeline_matching_seconds', self.matching_latency)
+        REGISTRY.attach_histogram('pipeline_news_to_decision_seconds', self.news_to_decision)
+        REGISTRY.attach_histogram('pipeline_news_to_order_seconds', self.pipeline.end_to_end)
+        for stage in self.pipeline.stages:
+            REGISTRY.attach_histogram('pipeline_stage_seconds', stage.latency, stage=stage.name)
+    
+    def run_cycle(self, tickers):
+        """Collect news once, push every ticker with news through the pipeline and wait for it to drain."""
+        started = time.perf_counter()
+        articles = self.data_collector.collect_rss_data()
+        arrived = time.perf_counter()
+        self.ingestion_latency.record(arrived - started)
+        
+        submitted = len(self.submit_news(articles, tickers, arrived))
+        
+        self.pipeline.join()
+        self.data_collector.confirm_processed(failed=self.take_failed_news())
+        self.logger.info(f"Pipeline cycle processed {submitted} tickers in {time.perf_counter() - started:.2f}s")
+        return submitted
+    
+    def submit_news(self, articles, tickers, arrived=None, log_idle=True):
+        """
+        Match news to tickers and submit one item per ticker with news, without waiting for results.
+        
+        Returns:
+            List of tickers that were submitted
+        """
+        arrived = arrived if arrived is not None else time.perf_counter()
+        news_index = self.data_collector.index_news_by_ticker(articles)
+        submitted = []
+        for ticker in tickers:
+            # Tickers without news cost a dict lookup
+            if ticker not in news_index:
+                if log_idle:
+                    self.logger.info(f"No relevant news found for {ticker}")
+                continue
+            
+            ticker_news = self.data_collector.filter_news_by_ticker(articles, ticker)
+            
+            self.logger.info(f"Found {len(ticker_news)} news items for {ticker}")
+            texts = [article.text for article in ticker_news]
+            self.pipeline.submit(PipelineItem(ticker, {'texts': texts, 'news': ticker_news}, created_at=arrived))
+            submitted.append(ticker)
+        self.matching_latency.record(time.perf_counter() - arrived)
+        return submitted
+    
+    def submit_refresh(self, tickers):
+        """
+        Refresh bars and indicators of tickers in the indicator stage, without deciding.
+        
+        Refreshes share the stage's workers and backpressure with news
+        items, so they never call the technical analyzer alongside them from
+        another thread.
+        """
+        for ticker in tickers:
+            self.pipeline.submit(PipelineItem(ticker, {'refresh': True}), stage='indicators')
+    
+    def idle(self):
+        """Check whether every submitted ticker has been processed."""
+        return self.pipeline.idle()
+    
+    def take_failed_news(self):
+        """Get the articles of tickers a stage error dropped since the last call."""
+        return [article for item in self.pipeline.take_failed() for article in item.data.get('news', ())]
+    
+    def get_stats(self):
+        """Get latency summaries for every stage and end to end."""
+        stats = {
+            'ingestion': self.ingestion_latency.summary(),
+            'matching': self.matching_latency.summary()
+        }
+        stats.update(self.pipeline.get_stats())
+        stats['news_to_decision'] = self.news_to_decision.summary()
+        stats['news_to_order'] = stats.pop('end_to_end')
+        return stats
+    
+    def log_stats(self):
+        """Log a one-line latency summary per stage."""
+        for name, summary in self.get_stats().items():
+            if summary['count'] > 0:
+                self.logger.info(f"Latency {name}: n={summary['count']} mean={summary['mean'] * 1000:.1f}ms "
+                                 f"p50<={summary['p50'] * 1000:.1f}ms p95<={summary['p95'] * 1000:.1f}ms "
+                                 f"max={summary['max'] * 1000:.1f}ms")
+    
+    def stop(self):
+        """Drain and stop the pipeline workers."""
+        self.pipeline.stop()
+    
+    def _analyze_sentiment(self, items):
+        """Score the news of several tickers with one sentiment call."""
+        texts = [text for item in items for text in item.data['texts']]
+        results = self.sentiment_analyzer.analyze_sentiment(texts)
+        
+        offset = 0
+        for item in items:
+            count = len(item.data['texts'])
+            item.data['sentiment'] = results[offset:offset + count]
+            offset += count
+            if self.sentiment_accumulator is not None:
+                self.sentiment_accumulator.add_news(item.key, item.data['news'], item.data['sentiment'])
+        return items
+    
+    def _calculate_indicators(self, items):
+        """Fetch bars and compute indicators for several tickers at once."""
+        indicators = self.technical_analyzer.calculate_indicators_for(
+            [item.key for item in items], self.indicators_config, max_age=self.indicator_max_age
+        )
+        
+        ready = []
+        for item in items:
+            if item.data.get('refresh'):
+                continue  # Only keeping the indicator cache warm
+            technical_indicators = indicators.get(item.key, {})
+            if technical_indicators and len(technical_indicators) > 0:
+                item.data['indicators'] = technical_indicators
+                ready.append(item)
+            else:
+                self.logger.warning(f"Skipping trading decision for {item.key} due to missing technical indicators")
+        return ready
+    
+    def _make_decisions(self, items):
+        """Decide for several tickers in one batch; only non-HOLD decisions continue to execution."""
+        decisions = self.trading_strategy.make_trading_decisions(
+            {item.key: item.data['sentiment'] for item in items},
+            {item.key: item.data['indicators'] for item in items}
+        )
+        decided = time.perf_counter()
+        
+        ready = []
+        for item in items:
+            decision = decisions[item.key]
+            self.news_to_decision.record(decided - item.created_at)
+            if decision['action'] == 'HOLD':
+                self.logger.info(f"MAIN: Decision was to HOLD {item.key}, no trade executed")
+                continue
+            item.data['decision'] = decision
+            ready.append(item)
+        return ready
+    
+    def _execute_trade(self, item):
+        """Submit the order for one decision."""
+        decision = item.data['decision']
+        self.logger.info(f"MAIN: Decision made to {decision['action']} {item.key} - EXPLICITLY CALLING ORDER EXECUTION")
+        trade_result = self.order_executor.execute_trade_with_retry(item.key, decision)
+        if trade_result:
+            self.logger.info(f"MAIN: Trade executed successfully: {trade_result}")
+        else:
+            self.logger.error(f"MAIN: *** TRADE EXECUTION FAILED FOR {item.key} ***")
+        return item
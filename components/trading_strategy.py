@@ -1,17 +1,50 @@
 # components/trading_strategy.py
 import logging
 import numpy as np
+from components.metrics import REGISTRY
+
+# Action codes used by the batch decision API
+HOLD, BUY, SELL = 0, 1, 2
+ACTIONS = ('HOLD', 'BUY', 'SELL')
+LABEL_DIRECTIONS = {'positive': 1, 'negative': -1}
 
 class TradingStrategy:
-    def __init__(self, config_manager):
-        """Initialize the trading strategy."""
+    def __init__(self, config_manager, sentiment_accumulator=None):
+        """
+        Initialize the trading strategy.
+        
+        Args:
+            sentiment_accumulator: Optional SentimentAccumulator; when given,
+                decisions read each ticker's running time-decayed score from it
+                instead of averaging the sentiment results passed in
+        """
         self.config_manager = config_manager
+        self.sentiment_accumulator = sentiment_accumulator
         self.logger = logging.getLogger('TradingStrategy')
-        self.model_config = config_manager.get_model_config()
+        self.apply_model_config(config_manager.get_model_config())
+    
+    def apply_model_config(self, model_config):
+        """Read the sentiment threshold and decision settings (also used when the config is reloaded)."""
+        self.model_config = model_config
         self.sentiment_threshold = self.model_config['sentiment_analysis']['confidence_threshold']
+        
+        # "exclusive": the original rules (RSI, else MACD, else sentiment only)
+        # "weighted": a weighted blend of sentiment, RSI and MACD signals
+        decision_config = self.model_config.get('decision') or {}
+        self.decision_mode = decision_config.get('mode', 'exclusive')
+        weights = decision_config.get('weights') or {}
+        self.sentiment_weight = weights.get('sentiment', 1.0)
+        self.rsi_weight = weights.get('rsi', 0.5)
+        self.macd_weight = weights.get('macd', 0.5)
+        self.macd_scale = decision_config.get('macd_scale', 1.0)
+        self.buy_threshold = decision_config.get('buy_threshold', 0.3)
+        self.sell_threshold = decision_config.get('sell_threshold', 0.3)
     
     def make_trading_decision(self, ticker, sentiment_data, technical_indicators):
         """Make a trading decision based on sentiment and technical indicators."""
+        if self.decision_mode != 'exclusive' or self.sentiment_accumulator is not None:
+            return self.make_trading_decisions({ticker: sentiment_data}, {ticker: technical_indicators})[ticker]
+        
         # Default decision
         decision = 'HOLD'
         confidence = 0.0
@@ -69,7 +102,7 @@ class TradingStrategy:
                             confidence = abs(sentiment_score)
             
             self.logger.info(f"Decision for {ticker}: {decision} (confidence: {confidence:.2f})")
-            
+        
         except Exception as e:
             self.logger.error(f"Error making trading decision for {ticker}: {e}")
         
@@ -77,3 +110,212 @@ class TradingStrategy:
             'action': decision,
             'confidence': confidence
         }
+    
+    @REGISTRY.timed('make_trading_decisions')
+    def make_trading_decisions(self, sentiment_by_ticker, indicators_by_ticker):
+        """
+        Make trading decisions for many tickers at once.
+        
+        Args:
+            sentiment_by_ticker: Dict of ticker -> list of sentiment results
+            indicators_by_ticker: Dict of ticker -> technical indicators dict
+        
+        Returns:
+            Dict of ticker -> decision dict, as from make_trading_decision
+        """
+        tickers = list(sentiment_by_ticker)
+        if not tickers:
+            return {}
+        
+        columns = self.build_decision_columns(tickers, sentiment_by_ticker, indicators_by_ticker)
+        actions, confidences = self.decide_batch(**columns)
+        
+        decisions = {}
+        for ticker, action, confidence in zip(tickers, actions.tolist(), confidences.tolist()):
+            decisions[ticker] = {'action': ACTIONS[action], 'confidence': confidence}
+            if action != HOLD:
+                self.logger.info(f"Decision for {ticker}: {ACTIONS[action]} (confidence: {confidence:.2f})")
+        
+        buys = int((actions == BUY).sum())
+        sells = int((actions == SELL).sum())
+        self.logger.info(f"Decided {len(tickers)} tickers: {buys} BUY, {sells} SELL, {len(tickers) - buys - sells} HOLD")
+        return decisions
+    
+    def build_decision_columns(self, tickers, sentiment_by_ticker, indicators_by_ticker):
+        """
+        Convert per-ticker sentiment lists and indicator dicts to the columns decide_batch takes.
+        
+        Missing indicators become NaN. With a sentiment accumulator attached,
+        the sentiment columns are its current scores and evidence weights.
+        """
+        columns = self._indicator_columns(tickers, indicators_by_ticker)
+        if self.sentiment_accumulator is not None:
+            columns['sentiment_score'], columns['sentiment_count'] = self.sentiment_accumulator.scores(tickers)
+            return columns
+        
+        count = len(tickers)
+        lengths = np.fromiter((len(sentiment_by_ticker[ticker] or []) for ticker in tickers), dtype=np.int64, count=count)
+        results = [result for ticker in tickers for result in (sentiment_by_ticker[ticker] or [])]
+        confidence = np.fromiter((result['confidence'] for result in results), dtype=np.float64, count=len(results))
+        direction = np.fromiter((LABEL_DIRECTIONS.get(result['label'], 0) for result in results),
+                                dtype=np.float64, count=len(results))
+        
+        # Average confidence-signed sentiment over the results above the confidence threshold
+        owner = np.repeat(np.arange(count), lengths)
+        kept = confidence >= self.sentiment_threshold
+        sentiment_count = np.bincount(owner[kept], minlength=count)
+        totals = np.bincount(owner[kept], weights=(confidence * direction)[kept], minlength=count)
+        sentiment_score = np.divide(totals, sentiment_count, out=np.zeros(count), where=sentiment_count > 0)
+        
+        columns['sentiment_score'] = sentiment_score
+        columns['sentiment_count'] = sentiment_count
+        return columns
+    
+    def _indicator_columns(self, tickers, indicators_by_ticker):
+        """Get RSI and MACD columns, with NaN for missing indicators."""
+        count = len(tickers)
+        columns = {name: np.full(count, np.nan) for name in
+                   ('rsi', 'overbought', 'oversold', 'macd_line', 'signal_line', 'histogram')}
+        for row, ticker in enumerate(tickers):
+            indicators = indicators_by_ticker.get(ticker) or {}
+            rsi = indicators.get('RSI')
+            if rsi is not None:
+                columns['rsi'][row] = rsi['value']
+                columns['overbought'][row] = rsi['overbought']
+                columns['oversold'][row] = rsi['oversold']
+            macd = indicators.get('MACD')
+            if macd is not None:
+                columns['macd_line'][row] = macd['macd_line']
+                columns['signal_line'][row] = macd['signal_line']
+                columns['histogram'][row] = macd['histogram']
+        return columns
+    
+    def decide_batch(self, sentiment_score, sentiment_count, rsi, overbought, oversold,
+                     macd_line, signal_line, histogram):
+        """
+        Decide for every row of the given columns with array operations.
+        
+        All arguments are equal-length arrays; NaN marks a missing indicator.
+        
+        Returns:
+            (actions, confidences): int8 array of HOLD/BUY/SELL codes and float array
+        
+        A row has sentiment when sentiment_count (article count or accumulated
+        evidence weight) is above zero.
+        """
+        sentiment_score = np.asarray(sentiment_score, dtype=np.float64)
+        has_sentiment = np.asarray(sentiment_count) > 0
+        rsi = np.asarray(rsi, dtype=np.float64)
+        overbought = np.asarray(overbought, dtype=np.float64)
+        histogram = np.asarray(histogram, dtype=np.float64)
+        has_rsi = ~np.isnan(rsi)
+        has_macd = ~np.isnan(histogram)
+        
+        actions = np.full(len(sentiment_score), HOLD, dtype=np.int8)
+        confidences = np.zeros(len(sentiment_score))
+        
+        with np.errstate(invalid='ignore'):
+            if self.decision_mode == 'exclusive':
+                macd_line = np.asarray(macd_line, dtype=np.float64)
+                signal_line = np.asarray(signal_line, dtype=np.float64)
+                strength = np.abs(sentiment_score)
+                
+                # RSI rules
+                rows = has_sentiment & has_rsi
+                buy = rows & (sentiment_score > 0.3) & (rsi < overbought)
+                sell = rows & ~buy & ((sentiment_score < -0.3) | (rsi > overbought))
+                confidences[buy] = (sentiment_score * (1 - rsi / 100))[buy]
+                confidences[sell] = (strength * (rsi / 100))[sell]
+                actions[buy] = BUY
+                actions[sell] = SELL
+                
+                # MACD rules where RSI is missing
+                rows = has_sentiment & ~has_rsi & has_macd
+                buy = rows & (macd_line > signal_line) & (sentiment_score > 0)
+                sell = rows & (macd_line < signal_line) & (sentiment_score < 0)
+                confidences[buy | sell] = (strength * np.abs(histogram))[buy | sell]
+                actions[buy] = BUY
+                actions[sell] = SELL
+                
+                # Sentiment only
+                rows = has_sentiment & ~has_rsi & ~has_macd
+                buy = rows & (sentiment_score > 0.5)
+                sell = rows & (sentiment_score < -0.5)
+                confidences[buy | sell] = strength[buy | sell]
+                actions[buy] = BUY
+                actions[sell] = SELL
+            else:
+                # Oversold RSI pushes towards buying, overbought towards selling
+                oversold = np.asarray(oversold, dtype=np.float64)
+                middle = (overbought + oversold) / 2
+                rsi_signal = np.clip((middle - rsi) / ((overbought - oversold) / 2), -1, 1)
+                macd_signal = np.tanh(histogram / self.macd_scale)
+                
+                # Missing indicators drop out of the blend instead of counting as neutral
+                rsi_weight = np.where(has_rsi, self.rsi_weight, 0.)
+                macd_weight = np.where(has_macd, self.macd_weight, 0.)
+                total_weight = self.sentiment_weight + rsi_weight + macd_weight
+                score = (self.sentiment_weight * sentiment_score
+                         + rsi_weight * np.nan_to_num(rsi_signal)
+                         + macd_weight * np.nan_to_num(macd_signal)) / total_weight
+                
+                buy = has_sentiment & (score > self.buy_threshold)
+                sell = has_sentiment & (score < -self.sell_threshold)
+                confidences[buy | sell] = np.abs(score)[buy | sell]
+                actions[buy] = BUY
+                actions[sell] = SELL
+        
+        return actions, confidences
+
+
+def main():
+    """Benchmark batch decisions against the per-ticker path on random inputs."""
+    import argparse
+    import time
+    from components.config_manager import ConfigManager
+    
+    parser = argparse.ArgumentParser(description="Benchmark TradingStrategy decision paths")
+    parser.add_argument('--config', default='config.yaml')
+    parser.add_argument('--tickers', type=int, default=5000)
+    parser.add_argument('--articles', type=int, default=5, help="Sentiment results per ticker")
+    args = parser.parse_args()
+    
+    strategy = TradingStrategy(ConfigManager(args.config))
+    strategy.logger.setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    labels = ('positive', 'negative', 'neutral')
+    tickers = [f"T{i}" for i in range(args.tickers)]
+    sentiment_by_ticker = {
+        ticker: [{'label': labels[rng.integers(3)], 'confidence': float(rng.uniform(0.5, 1))}
+                 for _ in range(args.articles)]
+        for ticker in tickers
+    }
+    indicators_by_ticker = {
+        ticker: {
+            'RSI': {'value': float(rng.uniform(0, 100)), 'overbought': 70, 'oversold': 30},
+            'MACD': {'macd_line': float(rng.normal()), 'signal_line': float(rng.normal()), 'histogram': float(rng.normal())}
+        }
+        for ticker in tickers
+    }
+    
+    started = time.perf_counter()
+    single = {ticker: strategy.make_trading_decision(ticker, sentiment_by_ticker[ticker], indicators_by_ticker[ticker])
+              for ticker in tickers}
+    single_time = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    columns = strategy.build_decision_columns(tickers, sentiment_by_ticker, indicators_by_ticker)
+    build_time = time.perf_counter() - started
+    started = time.perf_counter()
+    actions, confidences = strategy.decide_batch(**columns)
+    batch_time = time.perf_counter() - started
+    
+    mismatches = sum(single[ticker]['action'] != ACTIONS[action] for ticker, action in zip(tickers, actions.tolist()))
+    print(f"per-ticker: {single_time * 1e6 / len(tickers):.2f}us/decision")
+    print(f"batch: {batch_time * 1e6 / len(tickers):.3f}us/decision "
+          f"(+{build_time * 1e6 / len(tickers):.2f}us/ticker building columns from dicts)")
+    print(f"action mismatches: {mismatches}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,148 +1,314 @@
-import logging
 import time
-import alpaca_trade_api as tradeapi
+
+# Measured at process start so the startup summary includes the imports
+_PROCESS_STARTED = time.perf_counter()
+
+import logging
 import os
 import sys
-from logging.handlers import RotatingFileHandler
 
 # Add the current directory to the path so we can import our components
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from components.config_manager import ConfigManager
-from components.data_collector import RSSDataCollector
-from components.ai_model import SentimentAnalyzer
-from components.technical_analysis import TechnicalAnalyzer
-from components.trading_strategy import TradingStrategy
-from components.order_executor import OrderExecutor
+# Components are imported in main(): most of them pull in numpy and pandas, which
+# importing this module (e.g. for run_sequential_cycle) should not
 
 def setup_logging(config):
-    """Set up logging based on configuration."""
-    log_config = config.get_logging_config()
+    """Set up logging based on configuration (queued and JSON formatted if configured)."""
+    from components.structured_logging import configure_logging
     
-    # Configure logging
-    log_level = getattr(logging, log_config['level'])
+    configure_logging(config.get_logging_config())
+    return logging.getLogger('TradingBot')
+
+class StartupTimer:
+    def __init__(self, started=None):
+        """Time the phases of startup, from process start to the first trading decisions."""
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = []
+        self._last = self.started
     
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def mark(self, phase):
+        """End the current phase, naming it."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
     
-    # Set up root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
+    def summary(self):
+        """Format every phase and the total as one line."""
+        phases = ', '.join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases)
+        return f"{phases}; total {self._last - self.started:.2f}s"
+
+def run_sequential_cycle(tickers, data_collector, sentiment_analyzer, technical_analyzer,
+                         trading_strategy, order_executor, indicators_config, logger, sentiment_accumulator=None):
+    """Process one cycle of news and trades for every ticker in the calling thread."""
+    # Collect RSS data
+    articles = data_collector.collect_rss_data()
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(log_level)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    try:
+        process_collection(articles, tickers, data_collector, sentiment_analyzer, technical_analyzer,
+                           trading_strategy, order_executor, indicators_config, logger, sentiment_accumulator)
+    except Exception:
+        # Not known to have been acted on: collect the articles again next cycle
+        data_collector.confirm_processed(failed=articles)
+        raise
     
-    # File handler if enabled
-    if log_config['log_to_file']:
-        file_handler = RotatingFileHandler(
-            log_config['log_file'],
-            maxBytes=log_config['max_log_size'],
-            backupCount=log_config['backup_count']
-        )
-        file_handler.setLevel(log_level)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+    # Every article of the collection has been acted on
+    data_collector.confirm_processed()
+
+def process_collection(articles, tickers, data_collector, sentiment_analyzer, technical_analyzer,
+                       trading_strategy, order_executor, indicators_config, logger, sentiment_accumulator=None):
+    """Score, decide and trade one collection of articles for every ticker."""
+    # Index the collection by the tickers matched when each article was stored
+    data_collector.index_news_by_ticker(articles)
     
-    return logging.getLogger('TradingBot')
+    # Gather news and sentiment for each ticker
+    ticker_sentiment = {}
+    for ticker in tickers:
+        # Filter news for this ticker
+        ticker_news = data_collector.filter_news_by_ticker(articles, ticker)
+        
+        if ticker_news:
+            logger.info(f"Found {len(ticker_news)} news items for {ticker}")
+            
+            # Text for sentiment analysis is built once, when the article is stored
+            texts = [article.text for article in ticker_news]
+            
+            # Analyze sentiment
+            ticker_sentiment[ticker] = sentiment_analyzer.analyze_sentiment(texts)
+            if sentiment_accumulator is not None:
+                sentiment_accumulator.add_news(ticker, ticker_news, ticker_sentiment[ticker])
+        else:
+            logger.info(f"No relevant news found for {ticker}")
+    
+    # Calculate technical indicators for every ticker with news in one bulk fetch
+    indicators_by_ticker = {}
+    if ticker_sentiment:
+        indicators_by_ticker = technical_analyzer.calculate_indicators_for(list(ticker_sentiment), indicators_config)
+    
+    # Decide for every ticker that has indicators in one batch
+    ready = {}
+    for ticker, sentiment_results in ticker_sentiment.items():
+        technical_indicators = indicators_by_ticker.get(ticker, {})
+        
+        # Make trading decision only if we have technical indicators
+        if technical_indicators and len(technical_indicators) > 0:
+            ready[ticker] = sentiment_results
+        else:
+            logger.warning(f"Skipping trading decision for {ticker} due to missing technical indicators")
+    
+    trades = {}
+    for ticker, decision in trading_strategy.make_trading_decisions(ready, indicators_by_ticker).items():
+        # IMPORTANT: Remove confidence threshold completely and add explicit logging
+        if decision['action'] != 'HOLD':
+            logger.info(f"MAIN: Decision made to {decision['action']} {ticker} - EXPLICITLY CALLING ORDER EXECUTION")
+            trades[ticker] = decision
+        else:
+            logger.info(f"MAIN: Decision was to HOLD {ticker}, no trade executed")
+    
+    # Submit every order of the cycle concurrently
+    for ticker, trade_result in order_executor.execute_trades(trades).items():
+        if trade_result:
+            logger.info(f"MAIN: Trade executed successfully: {trade_result}")
+        else:
+            logger.error(f"MAIN: *** TRADE EXECUTION FAILED FOR {ticker} ***")
 
 def main():
+    startup = StartupTimer(_PROCESS_STARTED)
+    from components.config_manager import ConfigManager
+    from components.data_collector import RSSDataCollector
+    from components.ai_model import SentimentAnalyzer
+    from components.technical_analysis import TechnicalAnalyzer
+    from components.bar_store import BarStore
+    from components.trading_strategy import TradingStrategy
+    from components.sentiment_accumulator import SentimentAccumulator
+    from components.order_executor import OrderExecutor
+    from components.portfolio_state import PortfolioState
+    from components.config_reload import ConfigReloader
+    from components.metrics import InstrumentedAPI
+    from components.structured_logging import start_cycle
+    startup.mark('imports')
+    
     # Load configuration
     config = ConfigManager()
     
     # Set up logging
     logger = setup_logging(config)
     logger.info("Starting AI Trading Bot")
+    startup.mark('config')
     
     try:
-        # Initialize Alpaca API
+        # Metrics endpoint and periodic summary line
+        metrics_config = config.get_metrics_config()
+        if metrics_config.enabled:
+            from components.metrics import MetricsServer
+            try:
+                MetricsServer(
+                    host=metrics_config.host,
+                    port=metrics_config.port,
+                    summary_interval=metrics_config.summary_interval
+                ).start()
+            except OSError as e:
+                logger.warning(f"Could not start the metrics endpoint: {e}")
+        
+        # Initialize Alpaca API (imported here, it is the slowest import left at startup)
+        import alpaca_trade_api as tradeapi
         credentials = config.get_alpaca_credentials()
-        api = tradeapi.REST(
+        # Every API call is counted and timed
+        api = InstrumentedAPI(tradeapi.REST(
             key_id=credentials['api_key'],
             secret_key=credentials['api_secret'],
             base_url=credentials['base_url'],
             api_version='v2'
-        )
+        ))
         
         # Verify connection
         account = api.get_account()
         logger.info(f"Connected to Alpaca API. Account status: {account.status}")
         logger.info(f"Account buying power: ${float(account.buying_power)}, cash: ${float(account.cash)}")
+        startup.mark('broker connect')
         
-        # Initialize components
+        # Cache account and positions for order sizing, seeded from the account fetched above
+        portfolio_config = config.get_portfolio_config()
+        portfolio_state = PortfolioState(api, config.get_risk_parameters(), portfolio_config)
+        portfolio_state.seed(account)
+        if portfolio_config.stream_updates:
+            portfolio_state.start_stream(credentials)
+        startup.mark('portfolio seed')
+        
+        # Initialize components; the sentiment model can load while the first feeds are collected
         data_collector = RSSDataCollector(config)
-        sentiment_analyzer = SentimentAnalyzer(config.get_model_config())
-        technical_analyzer = TechnicalAnalyzer(api)
-        trading_strategy = TradingStrategy(config)
-        order_executor = OrderExecutor(api, config)
+        sentiment_analyzer = SentimentAnalyzer(
+            config.get_model_config(), background=config.get_startup_config().background_model_load
+        )
+        market_data_config = config.get_market_data_config()
+        bar_store = BarStore(market_data_config.bar_store_path) if market_data_config.bar_store_enabled else None
+        technical_analyzer = TechnicalAnalyzer(api, bar_store, bulk_chunk_size=market_data_config.bulk_chunk_size)
+        # Optional running time-decayed, source-weighted sentiment per ticker
+        sentiment_accumulator = None
+        model_config = config.get_model_config()
+        aggregation_config = model_config['sentiment_analysis'].get('aggregation') or {}
+        if aggregation_config.get('enabled', False):
+            sentiment_accumulator = SentimentAccumulator(
+                aggregation_config, model_config['sentiment_analysis']['confidence_threshold']
+            )
+        trading_strategy = TradingStrategy(config, sentiment_accumulator)
+        order_executor = OrderExecutor(api, config, portfolio_state)
         
         # Get tickers to monitor
         tickers = config.get_tickers()
         logger.info(f"Monitoring {len(tickers)} tickers: {', '.join(tickers)}")
         
         # Get technical indicators configuration
-        indicators_config = config.get_model_config()['technical_analysis']['indicators']
+        indicators_config = config.get_indicators_config()
+        
+        # Optional staged pipeline (bounded queues, concurrent I/O stages)
+        trading_pipeline = None
+        pipeline_config = config.get_pipeline_config()
+        if pipeline_config.enabled:
+            from components.trading_pipeline import TradingPipeline
+            trading_pipeline = TradingPipeline(
+                data_collector, sentiment_analyzer, technical_analyzer, trading_strategy,
+                order_executor, indicators_config, pipeline_config, sentiment_accumulator
+            )
+        
+        # Optional sharded execution: news is handled here once, shard workers decide for their tickers
+        sharded_runner = None
+        sharding_config = config.get_sharding_config()
+        if sharding_config.enabled:
+            from components.sharded_runner import OrderGateway, ShardCoordinator
+            sharded_runner = ShardCoordinator(
+                config, data_collector, sentiment_analyzer,
+                OrderGateway(order_executor, portfolio_state, sharding_config.gateway), sharding_config
+            )
+            sharded_runner.start()
+        
+        # Optional event-driven scheduling (per-feed adaptive polling instead of fixed sweeps)
+        event_scheduler = None
+        if config.schedule.mode == 'event':
+            if sharded_runner is not None:
+                logger.warning("Event scheduling is not sharded, using the fixed interval loop")
+            elif trading_pipeline is None:
+                logger.warning("Event scheduling requires trading.pipeline.enabled, using the fixed interval loop")
+            else:
+                from components.event_scheduler import EventScheduler
+                event_scheduler = EventScheduler(
+                    data_collector, trading_pipeline, technical_analyzer, tickers,
+                    indicators_config, config.get_event_config(),
+                    check_interval=config.schedule.check_interval
+                )
+        startup.mark('components')
+        
+        # Edits to config.yaml are applied between cycles without reloading the model or history
+        config.add_listener(ConfigReloader(
+            data_collector, technical_analyzer, trading_strategy, sentiment_accumulator,
+            order_executor, portfolio_state, trading_pipeline, event_scheduler
+        ))
+        
+        def keep_running():
+            # Checked between events, so changes also apply while the event scheduler runs
+            config.check_for_changes()
+            return config.is_market_open()
         
         # Trading loop
+        first_cycle = True
         while True:
             try:
+                config.check_for_changes()
+                
                 # Check if market is open
                 if not config.is_market_open():
-                    logger.info("Market is closed. Waiting...")
-                    time.sleep(60)  # Check every minute
+                    if first_cycle:
+                        # No cycle to wait for, so report startup as it stands
+                        first_cycle = False
+                        logger.info(f"Startup: {startup.summary()}")
+                    # Sleep until the open instead of polling; the calendar knows holidays and early closes
+                    wait = config.seconds_until_market_open()
+                    if wait is None:
+                        logger.warning("No trading session scheduled in the market calendar. Waiting...")
+                        wait = 3600
+                    else:
+                        logger.info(f"Market is closed. Sleeping {wait / 3600:.1f}h until the next open "
+                                    f"({config.market_calendar.next_open():%Y-%m-%d %H:%M %Z})")
+                    config.wait_for_change(max(wait, 1))
                     continue
                 
-                # Collect RSS data
-                news_df = data_collector.collect_rss_data()
+                if event_scheduler is not None:
+                    if first_cycle:
+                        first_cycle = False
+                        logger.info(f"Startup: {startup.summary()}")
+                    # React to feeds as they publish until the market closes
+                    event_scheduler.run(keep_running)
+                    continue
                 
-                # Process each ticker
-                for ticker in tickers:
-                    # Filter news for this ticker
-                    ticker_news = data_collector.filter_news_by_ticker(news_df, ticker)
-                    
-                    if not ticker_news.empty:
-                        logger.info(f"Found {len(ticker_news)} news items for {ticker}")
-                        
-                        # Prepare text for sentiment analysis
-                        texts = [f"{row['title']}: {row['summary']}" for _, row in ticker_news.iterrows()]
-                        
-                        # Analyze sentiment
-                        sentiment_results = sentiment_analyzer.analyze_sentiment(texts)
-                        
-                        # Calculate technical indicators
-                        technical_indicators = technical_analyzer.calculate_technical_indicators(ticker, indicators_config)
-                        
-                        # Make trading decision only if we have technical indicators
-                        if technical_indicators and len(technical_indicators) > 0:
-                            # Make trading decision
-                            decision = trading_strategy.make_trading_decision(ticker, sentiment_results, technical_indicators)
-                            
-                            # IMPORTANT: Remove confidence threshold completely and add explicit logging
-                            if decision['action'] != 'HOLD':
-                                logger.info(f"MAIN: Decision made to {decision['action']} {ticker} - EXPLICITLY CALLING ORDER EXECUTION")
-                                trade_result = order_executor.execute_trade_with_retry(ticker, decision)
-                                if trade_result:
-                                    logger.info(f"MAIN: Trade executed successfully: {trade_result}")
-                                else:
-                                    logger.error(f"MAIN: *** TRADE EXECUTION FAILED FOR {ticker} ***")
-                            else:
-                                logger.info(f"MAIN: Decision was to HOLD {ticker}, no trade executed")
-                        else:
-                            logger.warning(f"Skipping trading decision for {ticker} due to missing technical indicators")
-                    else:
-                        logger.info(f"No relevant news found for {ticker}")
+                # Every record logged during the cycle carries its correlation ID
+                start_cycle()
+                if sharded_runner is not None:
+                    sharded_runner.run_cycle(config.get_tickers())
+                elif trading_pipeline is not None:
+                    # Staged processing: network-bound stages overlap with inference
+                    trading_pipeline.run_cycle(config.get_tickers())
+                    trading_pipeline.log_stats()
+                else:
+                    run_sequential_cycle(config.get_tickers(), data_collector, sentiment_analyzer, technical_analyzer,
+                                         trading_strategy, order_executor, config.get_indicators_config(), logger,
+                                         sentiment_accumulator)
+                
+                if first_cycle:
+                    first_cycle = False
+                    startup.mark('first cycle')
+                    model_load = sentiment_analyzer.load_time
+                    logger.info(f"Startup to first decisions: {startup.summary()}"
+                                + (f" (model loaded in {model_load:.2f}s)" if model_load is not None else ""))
                 
                 # Sleep until next check
                 check_interval = config.get_check_interval()
                 logger.info(f"Sleeping for {check_interval} seconds until next check")
-                time.sleep(check_interval)
-                
+                config.wait_for_change(check_interval)
+            
             except Exception as e:
                 logger.error(f"Error in main loop: {e}")
                 time.sleep(60)  # Wait before retrying
-        
+    
     except KeyboardInterrupt:
         logger.info("Trading bot stopped by user")
     except Exception as e:
@@ -0,0 +1,139 @@
+# tests/conftest.py
+import copy
+import os
+import threading
+import types
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+REPO_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+
+@pytest.fixture(scope='session')
+def repo_settings():
+    """The settings in the repository's config.yaml."""
+    with open(REPO_CONFIG) as file:
+        return yaml.safe_load(file)
+
+@pytest.fixture
+def settings(repo_settings):
+    """A copy of the repository settings that a test can edit."""
+    return copy.deepcopy(repo_settings)
+
+@pytest.fixture
+def config_file(tmp_path):
+    """
+    Write settings to a temporary config.yaml.
+    
+    Returns:
+        Function taking the settings dict and returning the file path; each
+        write moves the modification time forward so edits are seen even on
+        file systems with coarse timestamps
+    """
+    path = tmp_path / 'config.yaml'
+    
+    def write(content):
+        previous = path.stat().st_mtime_ns if path.exists() else None
+        with open(path, 'w') as file:
+            yaml.safe_dump(content, file)
+        if previous is not None:
+            os.utime(path, ns=(previous, previous + 1_000_000_000))
+        return str(path)
+    
+    return write
+
+class StubFeed:
+    """An RSS feed whose ETag and Last-Modified change with its version."""
+    def __init__(self):
+        self.version = 1
+        self.items = ['a1', 'a2']
+        self.requests = []  # (If-None-Match, If-Modified-Since) of every request
+        self.url = None
+    
+    def update(self, version, items):
+        """Publish a new version of the feed."""
+        self.version = version
+        self.items = list(items)
+    
+    def body(self):
+        """Render the current items as RSS."""
+        items = ''.join(
+            f"<item><guid>{item}</guid><title>Story {item} about widget maker number {index}</title>"
+            f"<link>http://stub/{item}</link><description>Distinct body {index} for {item}.</description></item>"
+            for index, item in enumerate(self.items)
+        )
+        return f"<?xml version='1.0'?><rss version='2.0'><channel><title>Stub</title>{items}</channel></rss>"
+
+@pytest.fixture
+def stub_feed():
+    """Serve a StubFeed from a local HTTP server for the duration of a test."""
+    feed = StubFeed()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            etag = f'"v{feed.version}"'
+            feed.requests.append((self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')))
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(1_700_000_000 + feed.version * 60, usegmt=True))
+            self.end_headers()
+            self.wfile.write(feed.body().encode('utf-8'))
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed.url = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    yield feed
+    server.shutdown()
+    server.server_close()
+
+class FakeREST:
+    """Answer multi-symbol daily bar requests like Alpaca's REST client, leaving out the symbols in `absent`."""
+    def __init__(self, index, closes, absent=()):
+        self.index = index
+        self.closes = closes
+        self.absent = set(absent)
+        self.requests = []  # (symbols, start) of every get_bars call
+    
+    def get_bars(self, symbols, timeframe, start=None, end=None, adjustment=None):
+        self.requests.append((list(symbols), start))
+        rows = self.index >= pd.Timestamp(start, tz='America/New_York')
+        frames = [
+            pd.DataFrame({
+                'open': self.closes[symbol][rows], 'high': self.closes[symbol][rows], 'low': self.closes[symbol][rows],
+                'close': self.closes[symbol][rows], 'volume': 1000.0, 'symbol': symbol
+            }, index=self.index[rows])
+            for symbol in symbols if symbol not in self.absent
+        ]
+        return types.SimpleNamespace(df=pd.concat(frames) if frames else pd.DataFrame())
+
+@pytest.fixture(scope='session')
+def daily_bars():
+    """300 business days of random-walk closes for six symbols, stamped like Alpaca daily bars."""
+    # Alpaca stamps daily bars at midnight New York time, in UTC
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=300).tz_localize('America/New_York').tz_convert('UTC')
+    rng = np.random.default_rng(7)
+    closes = {symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+              for symbol in ('AAA', 'BBB', 'CCC', 'DDD', 'EEE', 'FFF')}
+    return index, closes
+
+@pytest.fixture
+def fake_rest(daily_bars):
+    """
+    Create fake Alpaca REST clients serving daily_bars.
+    
+    Returns:
+        Function taking the symbols to leave out of responses
+    """
+    index, closes = daily_bars
+    return lambda absent=(): FakeREST(index, closes, absent)
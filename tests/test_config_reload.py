@@ -0,0 +1,62 @@
+# tests/test_config_reload.py
+import copy
+import pytest
+from components.config_manager import ConfigManager
+from components.config_reload import ConfigReloader
+from components.data_collector import RSSDataCollector
+from components.sentiment_accumulator import SentimentAccumulator
+from components.technical_analysis import TechnicalAnalyzer
+from components.trading_strategy import TradingStrategy
+
+@pytest.fixture
+def running(settings, config_file):
+    """A config loaded from a temporary file, with the components that follow its edits registered."""
+    # No feed state database next to the real one
+    settings['data_sources']['incremental'] = {'enabled': False}
+    config = ConfigManager(config_file(settings))
+    data_collector = RSSDataCollector(config)
+    technical_analyzer = TechnicalAnalyzer(None)
+    trading_strategy = TradingStrategy(config)
+    accumulator = SentimentAccumulator({}, config.get_model_config()['sentiment_analysis']['confidence_threshold'])
+    config.add_listener(ConfigReloader(data_collector, technical_analyzer, trading_strategy, accumulator))
+    return config, data_collector, technical_analyzer, trading_strategy, accumulator
+
+@pytest.fixture
+def edited(settings):
+    """The settings with a new ticker, a new confidence threshold and a new first indicator period."""
+    edited = copy.deepcopy(settings)
+    edited['trading']['tickers'] = list(edited['trading']['tickers']) + ['ZZWD']
+    edited['model']['sentiment_analysis']['confidence_threshold'] = 0.9
+    edited['model']['technical_analysis']['indicators'][0]['period'] = 10
+    return edited
+
+def test_unchanged_file_applies_nothing(running):
+    config = running[0]
+    assert config.check_for_changes(force=True) == set()
+
+def test_edit_applied_in_one_check(running, edited, config_file):
+    config, data_collector, technical_analyzer, trading_strategy, accumulator = running
+    article = data_collector.store.add('a1', "Zeta Widgets (ZZWD) beats estimates", "Shares of ZZWD jumped.",
+                                       'https://example.com/a1', 'Example', float('nan'))
+    technical_analyzer._indicator_cache['AAPL'] = (0.0, {'RSI': {'value': 50.0}})
+    
+    config_file(edited)
+    assert 'trading.tickers' in config.check_for_changes(force=True)
+    assert 'ZZWD' in data_collector.matcher.tickers
+    assert 'ZZWD' in article.tickers
+    assert trading_strategy.sentiment_threshold == 0.9
+    assert accumulator.confidence_threshold == 0.9
+    assert not technical_analyzer._indicator_cache
+    assert config.get_indicators_config()[0]['period'] == 10
+
+def test_invalid_edit_rejected(running, edited, config_file):
+    config, _, _, trading_strategy, _ = running
+    config_file(edited)
+    config.check_for_changes(force=True)
+    
+    broken = copy.deepcopy(edited)
+    broken['trading']['tickers'] = []
+    config_file(broken)
+    assert config.check_for_changes(force=True) == set()
+    assert 'ZZWD' in config.get_tickers()
+    assert trading_strategy.sentiment_threshold == 0.9
@@ -0,0 +1,72 @@
+# tests/test_data_collector.py
+import pytest
+from components.config_manager import ConfigManager
+from components.data_collector import RSSDataCollector
+
+@pytest.fixture(params=['threads', 'async'])
+def make_collector(request, settings, config_file, stub_feed, tmp_path):
+    """Build collectors for the stub feed with incremental fetching, using each ingestion engine."""
+    if request.param == 'async':
+        pytest.importorskip('aiohttp')
+    settings['data_sources']['rss_feeds'] = [{'name': 'Stub', 'url': stub_feed.url}]
+    settings['data_sources']['incremental'] = {'enabled': True, 'state_path': str(tmp_path / 'feed_state.db')}
+    settings['data_sources']['ingestion'] = {'engine': request.param, 'timeout': 5}
+    path = config_file(settings)
+    collectors = []
+    
+    def make():
+        collectors.append(RSSDataCollector(ConfigManager(path)))
+        return collectors[-1]
+    
+    yield make
+    for data_collector in collectors:
+        close(data_collector)
+
+def close(data_collector):
+    """Drop the process state without confirming anything, as a crash would."""
+    if data_collector.async_fetcher is not None:
+        data_collector.async_fetcher.close()
+    data_collector.feed_state.close()
+
+def collect(data_collector, stub_feed):
+    """Collect once; returns the entry ids and the conditional headers the feed received."""
+    del stub_feed.requests[:]
+    # feedparser resolves GUIDs against the feed URL when it downloads the feed itself
+    ids = sorted(article.article_id.rsplit('/', 1)[-1] for article in data_collector.collect_rss_data())
+    return ids, stub_feed.requests[-1]
+
+def test_conditional_get(make_collector, stub_feed):
+    data_collector = make_collector()
+    ids, headers = collect(data_collector, stub_feed)
+    assert headers == (None, None)
+    assert ids == ['a1', 'a2']
+    data_collector.confirm_processed()
+    
+    ids, headers = collect(data_collector, stub_feed)
+    assert headers[0] == '"v1"' and headers[1] is not None
+    assert ids == []
+    
+    stub_feed.update(2, ['a1', 'a2', 'a3'])
+    ids, headers = collect(data_collector, stub_feed)
+    assert ids == ['a3']
+
+def test_unprocessed_entries_survive_restart(make_collector, stub_feed):
+    data_collector = make_collector()
+    collect(data_collector, stub_feed)
+    data_collector.confirm_processed()
+    stub_feed.update(2, ['a1', 'a2', 'a3'])
+    collect(data_collector, stub_feed)
+    
+    # Crash before a3 is processed: it is claimed again, so the feed is fetched unconditionally
+    close(data_collector)
+    data_collector = make_collector()
+    ids, headers = collect(data_collector, stub_feed)
+    assert headers == (None, None)
+    assert ids == ['a3']
+    data_collector.confirm_processed()
+    
+    close(data_collector)
+    data_collector = make_collector()
+    ids, headers = collect(data_collector, stub_feed)
+    assert headers[0] == '"v2"'
+    assert ids == []
@@ -0,0 +1,57 @@
+# tests/test_indicators.py
+import numpy as np
+import pytest
+from components.indicators import IndicatorEngine
+
+INDICATORS_CONFIG = [
+    {'type': 'RSI', 'period': 14, 'overbought': 70, 'oversold': 30},
+    {'type': 'MACD', 'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
+    {'type': 'BOLLINGER', 'period': 20, 'num_std': 2},
+    {'type': 'ATR', 'period': 14}
+]
+
+@pytest.fixture
+def ohlcv():
+    """(tickers x 5 x bars) random-walk OHLCV blocks with highs and lows around the closes."""
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (4, 120)), axis=1))
+    open_ = close * np.exp(rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, close.shape))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, close.shape))
+    volume = rng.uniform(1e5, 1e6, close.shape)
+    return np.stack([open_, high, low, close, volume], axis=1)
+
+def wilder_atr(high, low, close, period):
+    """Average true range the textbook way: a mean of the first true ranges, then Wilder smoothing."""
+    true_range = [max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+                  for i in range(1, len(close))]
+    atr = sum(true_range[:period]) / period
+    for value in true_range[period:]:
+        atr = (atr * (period - 1) + value) / period
+    return atr
+
+def test_atr_reads_high_and_low(ohlcv):
+    results = IndicatorEngine(INDICATORS_CONFIG).compute_batch(ohlcv)
+    for block, result in zip(ohlcv, results):
+        assert result['ATR']['value'] == pytest.approx(wilder_atr(block[1], block[2], block[3], 14), rel=1e-12)
+
+def test_stream_matches_batch(ohlcv):
+    engine = IndicatorEngine(INDICATORS_CONFIG)
+    stream = engine.create_stream(ohlcv[0, :, :60])
+    for bar in range(60, ohlcv.shape[2]):
+        values = stream.update(ohlcv[0, :, bar])
+    expected = engine.compute(ohlcv[0])
+    assert values.keys() == expected.keys() == {'RSI', 'MACD', 'BOLLINGER', 'ATR'}
+    for name in expected:
+        assert values[name] == pytest.approx(expected[name], rel=1e-9)
+    
+    # Replacing the still-forming bar gives the same values as computing without it
+    revised = ohlcv[0, :, -1] * 1.01
+    values = stream.update(revised, new_bar=False)
+    expected = engine.compute(np.concatenate([ohlcv[0, :, :-1], revised[:, np.newaxis]], axis=1))
+    for name in expected:
+        assert values[name] == pytest.approx(expected[name], rel=1e-9)
+
+def test_rejects_closes_without_the_other_columns(ohlcv):
+    with pytest.raises(ValueError):
+        IndicatorEngine(INDICATORS_CONFIG).compute(ohlcv[0, 3])
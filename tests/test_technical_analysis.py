@@ -0,0 +1,86 @@
+# tests/test_technical_analysis.py
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from components.bar_store import BarStore
+from components.config_manager import ConfigManager
+from components.technical_analysis import TechnicalAnalyzer
+
+pytest.importorskip('alpaca_trade_api.rest')
+
+TICKERS = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+
+class FallbackAnalyzer(TechnicalAnalyzer):
+    """Record yfinance fallbacks instead of downloading; `fallback` lists the symbols it can serve."""
+    def __init__(self, api, daily_bars, fallback=(), **kwargs):
+        super().__init__(api, **kwargs)
+        self.daily_bars = daily_bars
+        self.fallback = set(fallback)
+        self.fallback_requests = []
+    
+    def get_historical_data_yfinance_bulk(self, tickers, start_date, end_date):
+        self.fallback_requests.append(list(tickers))
+        index, closes = self.daily_bars
+        rows = index >= pd.Timestamp(start_date, tz='America/New_York')
+        return {
+            ticker: pd.DataFrame({
+                'Open': closes[ticker][rows], 'High': closes[ticker][rows], 'Low': closes[ticker][rows],
+                'Close': closes[ticker][rows], 'Volume': 1000.0
+            }, index=index[rows].tz_convert('America/New_York'))
+            for ticker in tickers if ticker in self.fallback
+        }
+
+@pytest.fixture
+def indicators_config(settings, config_file):
+    """The indicator specs in the repository config."""
+    return ConfigManager(config_file(settings)).get_indicators_config()
+
+@pytest.fixture
+def expected(daily_bars, indicators_config):
+    """Get the indicators computed directly from a year of bars, for comparison."""
+    index, closes = daily_bars
+    
+    def compute(symbols):
+        window = index >= pd.Timestamp(f"{datetime.now() - timedelta(days=365):%Y-%m-%d}", tz='America/New_York')
+        # Like FakeREST: every price column is the close
+        ohlcv = {symbol: np.vstack([closes[symbol][window]] * 4 + [np.full(window.sum(), 1000.0)]) for symbol in symbols}
+        return TechnicalAnalyzer(None).calculate_indicators_from_bars(ohlcv, indicators_config)
+    
+    return compute
+
+def assert_same(results, reference):
+    # Batches of different sizes can differ in the last bit
+    assert results.keys() == reference.keys()
+    for ticker in reference:
+        assert results[ticker].keys() == reference[ticker].keys()
+        for name in reference[ticker]:
+            assert np.allclose(list(results[ticker][name].values()), list(reference[ticker][name].values()))
+
+def test_bulk_requests_are_chunked(fake_rest, daily_bars, indicators_config, expected):
+    api = fake_rest()
+    analyzer = FallbackAnalyzer(api, daily_bars, bulk_chunk_size=2)
+    results = analyzer.calculate_indicators_for(TICKERS, indicators_config)
+    assert [symbols for symbols, _ in api.requests] == [['AAA', 'BBB'], ['CCC', 'DDD'], ['EEE']]
+    assert_same(results, expected(TICKERS))
+    assert analyzer.fallback_requests == []
+
+def test_missing_symbols_fall_back_together(fake_rest, daily_bars, indicators_config, expected):
+    api = fake_rest(absent={'BBB', 'DDD'})
+    analyzer = FallbackAnalyzer(api, daily_bars, fallback={'BBB'}, bulk_chunk_size=2)
+    results = analyzer.calculate_indicators_for(TICKERS, indicators_config)
+    assert analyzer.fallback_requests == [['BBB', 'DDD']]
+    assert_same({'BBB': results['BBB']}, expected(['BBB']))
+    assert results['DDD'] == {}
+    assert_same({ticker: results[ticker] for ticker in ('AAA', 'CCC', 'EEE')}, expected(['AAA', 'CCC', 'EEE']))
+
+def test_stored_bars_fetch_only_the_tail(fake_rest, daily_bars, indicators_config, expected, tmp_path):
+    index, _ = daily_bars
+    api = fake_rest()
+    analyzer = FallbackAnalyzer(api, daily_bars, bar_store=BarStore(str(tmp_path)), bulk_chunk_size=100)
+    analyzer.calculate_indicators_for(TICKERS, indicators_config)
+    del api.requests[:]
+    results = analyzer.calculate_indicators_for(TICKERS, indicators_config)
+    assert [start for _, start in api.requests] == [f"{index[-1].tz_convert('America/New_York'):%Y-%m-%d}"]
+    assert len(api.requests[0][0]) == len(TICKERS)
+    assert_same(results, expected(TICKERS))